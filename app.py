@@ -2,14 +2,25 @@
 import streamlit as st
 import pandas as pd
 from lib.data import (
-    load_df, get_teams, get_players_for_team, kpi_row,
+    load_df, quality_report, team_names, team_player_names, kpi_row,
     goto, init_router_state
 )
+from lib import warmup
+from lib.search import search_box
+from lib.export import download_buttons
 
 st.set_page_config(page_title="League Explorer", layout="wide")
 
-# Load your CSV (change path if needed)
-DF = load_df("database.csv")
+# Load your CSV (change path if needed); same cache key the warm-up and pages use
+DATA = "database.csv"
+warmup.start(DATA)
+VERSION = warmup.version(DATA)  # last published version: its caches are already built
+DF = load_df(DATA, VERSION)
+warmup.sidebar_status()
+_quality = quality_report(DATA, VERSION)
+if _quality.get("rows_dropped") or _quality.get("player_age_conflicts"):
+    st.sidebar.warning(f"Data quality: {_quality.get('rows_dropped', 0)} duplicate rows dropped "
+                       f"({_quality['policy']}), {_quality.get('player_age_conflicts', 0)} age conflicts")
 
 # URL/query-param aware state
 init_router_state()
@@ -17,16 +28,17 @@ init_router_state()
 st.title("Exploring La Liga")
 st.subheader("This website will provide you stata about teams and players in La-Liga.")
 st.caption("Browse teams → pick a player → explore stats. Use the header tabs to switch sections.")
+search_box(DATA, VERSION, key="home_search", container=st)
 
 left, right = st.columns(2)
 with left:
-    teams = get_teams(DF)
+    teams = team_names(DATA, VERSION)
     team = st.selectbox("Team", teams,
                         index=(teams.index(st.session_state.team) if st.session_state.team in teams else 0),
                         key="home_team")
 
 with right:
-    players = get_players_for_team(DF, team)
+    players = team_player_names(DATA, VERSION, team)
     player = st.selectbox("Player", players,
                           index=(players.index(st.session_state.player) if st.session_state.player in players else 0),
                           key="home_player")
@@ -42,4 +54,9 @@ c2.button("👤 Open Player", use_container_width=True, on_click=lambda: goto("p
 
 st.divider()
 st.subheader(team)
-st.write("Jump into **Teams** or **Player** pages from the sidebar.")
\ No newline at end of file
+st.write("Jump into **Teams** or **Player** pages from the sidebar.")
+
+with st.expander("Export the full dataset"):
+    st.caption("Every per-game row, encoded in chunks when clicked. For filtered or larger extracts: "
+               "`python -m lib.export --columns ... --where ...`")
+    download_buttons(lambda: DF, "league_rows", "league_export")
\ No newline at end of file
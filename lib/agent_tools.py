@@ -1,17 +1,86 @@
 # lib/agent_tools.py
+import os
 from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
-from lib.data import load_df, get_teams, get_players_for_team, build_game_labels
+from lib.backends import SQLBackend, make_backend
+from lib.data import (
+    get_teams, get_players_for_team, build_game_labels, build_team_games, team_fixtures, team_pairing_coverage,
+    CONFIDENT_PAIRINGS, data_version,
+)
+from lib.dataset import DatasetHandle, Snapshot
+from lib.cube import Cube, build_cube, cube_measures, query_cube
+from lib.identity import PlayerIndex, build_player_index, career_totals, find_player_ids
+from lib.ingest import ingested
+from lib.lineups import TeamLineups, build_lineups, partners, rotation_table, top_pairs
+from lib.metrics import LEADERBOARD_MIN_MINUTES, METRICS, SUMMARY_DERIVED, derive, resolve
+from lib.projection import COUNT_METRICS, load_projections
+from lib.query import run_query
+from lib.splits import (
+    build_team_opponent_cube, build_player_opponent_cube, opponent_tiers,
+    team_vs_opponents, head_to_head, player_opponent_split, opponent_caveat,
+)
+
+# --------- dataset + derived tables (see lib/dataset.py) ----------
+DATASET = DatasetHandle("database.csv")  # loads through the pages' st.cache_data entry
+BACKEND_NAME = os.getenv("FOOTBALL_BACKEND", "pandas").lower()
 
-# --------- lazy df ----------
-_DF: Optional[pd.DataFrame] = None
 def df() -> pd.DataFrame:
-    global _DF
-    if _DF is None:
-        _DF = load_df("database.csv")
-    return _DF
+    return DATASET.snapshot().df
+
+def _team_games(snap: Snapshot) -> pd.DataFrame:
+    return snap.derived("team_games", DERIVED["team_games"])
+
+def _sql_backend(snap: Snapshot) -> Optional[SQLBackend]:
+    """Read from the file's ingest output (not snap.df); pandas when the file no longer matches snap."""
+    if BACKEND_NAME == "pandas" or data_version(DATASET.path) != snap.version:
+        return None
+    return make_backend(BACKEND_NAME, ingested(DATASET.path, snap.version))
+
+# name -> build(snapshot); lib.warmup pre-builds these on each new snapshot before publishing it
+DERIVED = {
+    "team_games": lambda s: build_team_games(s.df),
+    "cube": lambda s: build_cube(s.df),
+    "sql_backend": _sql_backend,
+    "team_opp": lambda s: build_team_opponent_cube(_team_games(s)),
+    "player_opp": lambda s: build_player_opponent_cube(s.df),
+    "player_index": lambda s: build_player_index(s.df),
+    "lineups": lambda s: build_lineups(s.df),
+    "projections": lambda s: load_projections(DATASET.path, s.version),
+}
+
+def _derived(name: str) -> Any:
+    return DATASET.snapshot().derived(name, DERIVED[name])
+
+def team_games() -> pd.DataFrame:
+    """Reconstructed (Team, Date)-indexed team-game table, built once per snapshot."""
+    return _team_games(DATASET.snapshot())
+
+def cube() -> Cube:
+    """(Team, Player, Position) x matchday prefix-sum cube, built once per snapshot."""
+    return _derived("cube")
+
+def sql_backend() -> Optional[SQLBackend]:
+    """Embedded SQL engine loaded once per snapshot; None when running on pandas."""
+    return _derived("sql_backend")
+
+def team_opponent_cube() -> pd.DataFrame:
+    return _derived("team_opp")
+
+def player_opponent_cube() -> pd.DataFrame:
+    return _derived("player_opp")
+
+def player_index() -> PlayerIndex:
+    """Player ID -> row positions across teams (see lib/identity.py), built once per snapshot."""
+    return _derived("player_index")
+
+def lineups() -> Dict[str, TeamLineups]:
+    """Per-team participation / shared-minutes matrices and rotation numbers, built once per snapshot."""
+    return _derived("lineups")
+
+def projections() -> Dict[str, pd.DataFrame]:
+    """Monte Carlo season projections for every player and team (shares the pages' cache entry)."""
+    return _derived("projections")
 
-# --------- helpers ----------
 def _with_game_keys(frame: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     return build_game_labels(frame)
 
@@ -19,12 +88,8 @@ def _appearances(pdf: pd.DataFrame) -> int:
     if pdf.empty:
         return 0
     p_with_keys, _ = _with_game_keys(pdf)
-    if "Minutes" in p_with_keys.columns:
-        return int(
-            p_with_keys.groupby("_GAME_KEY")["Minutes"]
-            .apply(lambda s: (pd.to_numeric(s, errors="coerce").fillna(0) > 0).any())
-            .sum()
-        )
+    if "Minutes" in p_with_keys.columns:  # numeric, no NaN (lib.quality)
+        return int((p_with_keys["Minutes"] > 0).groupby(p_with_keys["_GAME_KEY"]).any().sum())
     return int(p_with_keys["_GAME_KEY"].nunique())
 
 def _team_total_games(team: str) -> int:
@@ -33,28 +98,25 @@ def _team_total_games(team: str) -> int:
         return 0
     t_with_keys, _ = _with_game_keys(tdf)
     if "Minutes" in t_with_keys.columns:
-        per_game_minutes = (
-            pd.to_numeric(t_with_keys["Minutes"], errors="coerce")
-            .fillna(0)
-            .groupby(t_with_keys["_GAME_KEY"])
-            .sum()
-        )
+        per_game_minutes = t_with_keys["Minutes"].groupby(t_with_keys["_GAME_KEY"]).sum()
         return int((per_game_minutes > 0).sum())
     return int(t_with_keys["_GAME_KEY"].nunique())
 
 def _player_slice(team: str, player: str) -> pd.DataFrame:
-    return df()[(df()["Team"] == team) & (df()["Player"] == player)].copy()
+    data, index = df(), player_index()
+    if not index.rows:
+        return data[(data["Team"] == team) & (data["Player"] == player)].copy()
+    rows = pd.concat([data.iloc[index.rows[pid]] for pid in find_player_ids(index, player, team)] or [data.iloc[:0]])
+    return rows[(rows["Team"] == team) & (rows["Player"] == player)].copy()
 
 # --------- team age ----------
 def _team_avg_age_xi(team: str) -> Optional[float]:
-    tdf = df()[df()["Team"] == team].copy()
+    tdf = df()[df()["Team"] == team]
     if tdf.empty or "Age" not in tdf.columns:
         return None
     t_with_keys, _ = _with_game_keys(tdf)
     if "_GAME_KEY" not in t_with_keys.columns or "Minutes" not in t_with_keys.columns:
         return None
-    t_with_keys["Minutes"] = pd.to_numeric(t_with_keys["Minutes"], errors="coerce").fillna(0)
-    t_with_keys["Age"] = pd.to_numeric(t_with_keys["Age"], errors="coerce")
     xi = t_with_keys[t_with_keys["Minutes"] > 0]
     if xi.empty:
         return None
@@ -64,10 +126,9 @@ def _team_avg_age_xi(team: str) -> Optional[float]:
     return float(per_game_avg.mean())
 
 def _team_avg_age_squad(team: str) -> Optional[float]:
-    tdf = df()[df()["Team"] == team].copy()
+    tdf = df()[df()["Team"] == team]
     if tdf.empty or "Age" not in tdf.columns:
         return None
-    tdf["Age"] = pd.to_numeric(tdf["Age"], errors="coerce")
     player_age = (
         tdf.dropna(subset=["Age"])
            .groupby("Player", as_index=False)["Age"]
@@ -107,8 +168,12 @@ def act_player_summary(team: str, player: str, **_) -> Dict[str, Any]:
         "avg_minutes": avg_minutes,
     }
     for m in ["Goals", "Assists", "Shots", "xG", "xA", "GCA", "SCA"]:
-        if m in totals.index:
-            out[m] = float(totals[m])
+        if resolve(m) in totals.index:
+            out[m] = float(totals[resolve(m)])
+    derived = derive(totals.to_frame().T.assign(Appearances=apps), SUMMARY_DERIVED)
+    for m in SUMMARY_DERIVED:
+        if m in derived.columns:
+            out[m] = float(derived[m].iloc[0])
     return out
 
 def act_compare_players(team_a: str, player_a: str, team_b: str, player_b: str, metrics: Optional[List[str]] = None, **_) -> Dict[str, Any]:
@@ -131,15 +196,22 @@ def act_compare_players(team_a: str, player_a: str, team_b: str, player_b: str,
         })
     return {"left": left, "right": right, "table": rows}
 
-def act_top_players(metric: str, team: Optional[str] = None, top_n: int = 5, **_) -> List[Dict[str, Any]]:
-    data = df().copy()
-    if team:
-        data = data[data["Team"] == team]
-    if metric not in data.columns:
+def act_top_players(metric: str, team: Optional[str] = None, top_n: int = 5,
+                    date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    min_minutes: Optional[float] = None, **_) -> List[Dict[str, Any]]:
+    c = cube()
+    metric = resolve(metric)
+    if metric not in cube_measures(c):
         return []
-    agg = data.groupby(["Team","Player"], dropna=True)[metric].sum(numeric_only=True).reset_index()
-    top = agg.sort_values(metric, ascending=False).head(max(1, min(50, int(top_n))))
-    return [{"team": r["Team"], "player": r["Player"], metric: float(r[metric])} for _, r in top.iterrows()]
+    if min_minutes is None and metric in METRICS:
+        min_minutes = LEADERBOARD_MIN_MINUTES  # per-90 / % leaders need a sample
+    measures = list(dict.fromkeys([metric, "Minutes"])) if min_minutes else [metric]
+    agg = query_cube(c, ["Team", "Player"], measures, filters={"Team": team} if team else None,
+                     date_from=date_from, date_to=date_to).dropna(subset=["Team", "Player", metric])
+    if min_minutes:
+        agg = agg[agg["Minutes"] >= float(min_minutes)]
+    top = agg.sort_values(metric, ascending=False, kind="mergesort").head(max(1, min(50, int(top_n))))
+    return [{"team": t, "player": p, metric: float(v)} for t, p, v in top[["Team", "Player", metric]].itertuples(index=False)]
 
 def act_best_player_by_metric(metric: str = "Goals", team: Optional[str] = None, **_) -> Dict[str, Any]:
     res = act_top_players(metric=metric, team=team, top_n=1)
@@ -149,7 +221,7 @@ def act_best_player_by_metric(metric: str = "Goals", team: Optional[str] = None,
     return {"metric": metric, "team": team or "ALL", "player": r["player"], "player_team": r["team"], "value": float(r[metric])}
 
 def act_best_player_by_avg_minutes(team: Optional[str] = None, min_apps: int = 3, **_) -> Dict[str, Any]:
-    data = df().copy()
+    data = df()
     if "Minutes" not in data.columns:
         return {"scope_team": team or "ALL", "min_apps": int(min_apps), "top_average_minutes": None, "players": [], "error": "Minutes column not found."}
     if team:
@@ -157,7 +229,7 @@ def act_best_player_by_avg_minutes(team: Optional[str] = None, min_apps: int = 3
 
     rows: List[Dict[str, Any]] = []
     for (t, p), g in data.groupby(["Team", "Player"], dropna=True):
-        mins = pd.to_numeric(g["Minutes"], errors="coerce").fillna(0).sum()
+        mins = g["Minutes"].sum()
         apps = _appearances(g)
         if apps >= max(1, int(min_apps)) and apps > 0:
             rows.append({
@@ -176,14 +248,14 @@ def act_best_player_by_avg_minutes(team: Optional[str] = None, min_apps: int = 3
     return {"scope_team": team or "ALL", "min_apps": int(min_apps), "top_average_minutes": float(top_avg), "players": tied}
 
 def act_top_players_by_avg_minutes(team: Optional[str] = None, top_n: int = 5, min_apps: int = 3, **_) -> List[Dict[str, Any]]:
-    data = df().copy()
+    data = df()
     if "Minutes" not in data.columns:
         return []
     if team:
         data = data[data["Team"] == team]
     rows: List[Dict[str, Any]] = []
     for (t, p), g in data.groupby(["Team", "Player"], dropna=True):
-        mins = pd.to_numeric(g["Minutes"], errors="coerce").fillna(0).sum()
+        mins = g["Minutes"].sum()
         apps = _appearances(g)
         if apps >= max(1, int(min_apps)) and apps > 0:
             rows.append({
@@ -219,25 +291,146 @@ def act_team_games(team: str, **_) -> List[Dict[str, Any]]:
     if tdf.empty: return []
     _, games = _with_game_keys(tdf)
     uniq = games.drop_duplicates(subset=["_GAME_KEY"])
-    return [{"game_key": r["_GAME_KEY"], "label": r["_GAME_LABEL"]} for _, r in uniq.iterrows()]
+    return [{"game_key": k, "label": l} for k, l in uniq[["_GAME_KEY", "_GAME_LABEL"]].itertuples(index=False)]
 
 def act_team_game_summary(team: str, game_key: str, **_) -> Dict[str, Any]:
-    tdf = df()[df()["Team"] == team].copy()
+    tdf = df()[df()["Team"] == team]
     if tdf.empty: return {"team": team, "game_key": game_key, "error": "No team data."}
     t_with_keys, _ = _with_game_keys(tdf)
     gdf = t_with_keys[t_with_keys["_GAME_KEY"] == game_key]
     if gdf.empty: return {"team": team, "game_key": game_key, "error": "Game not found."}
-    match_minutes = int(pd.to_numeric(gdf["Minutes"], errors="coerce").fillna(0).max()) if "Minutes" in gdf.columns else None
+    match_minutes = int(gdf["Minutes"].max()) if "Minutes" in gdf.columns else None
     goals = int(gdf["Goals"].sum()) if "Goals" in gdf.columns else None
     assists = int(gdf["Assists"].sum()) if "Assists" in gdf.columns else None
     avg_age = None
     if "Age" in gdf.columns and "Minutes" in gdf.columns:
-        xi = gdf[pd.to_numeric(gdf["Minutes"], errors="coerce").fillna(0) > 0]
+        xi = gdf[gdf["Minutes"] > 0]
         if not xi.empty:
-            avg_age = float(pd.to_numeric(xi["Age"], errors="coerce").dropna().mean())
+            avg_age = float(xi["Age"].dropna().mean())
     label = gdf["_GAME_LABEL"].iloc[0] if "_GAME_LABEL" in gdf.columns else game_key
     return {"team": team, "game_key": game_key, "label": label, "match_minutes": match_minutes, "team_goals": goals, "team_assists": assists, "avg_age_xi": avg_age}
 
+def act_team_fixtures(team: str, **_) -> Dict[str, Any]:
+    """The team's games plus how many could be paired with an opponent (rows have Opponent None otherwise)."""
+    tg = team_games()
+    games = team_fixtures(tg, team)
+    rows = games.astype(object).where(games.notna(), None).to_dict(orient="records") if not games.empty else []
+    return {"team": team, **team_pairing_coverage(tg, team), "rows": rows}
+
+# --------- opponents / head-to-head (lookups into precomputed cubes) ----------
+def act_head_to_head(team_a: str, team_b: str, **_) -> Dict[str, Any]:
+    out = head_to_head(team_opponent_cube(), team_a, team_b)
+    games = team_fixtures(team_games(), team_a)
+    if not games.empty:
+        games = games[(games["Opponent"] == team_b) & games["Pairing"].isin(CONFIDENT_PAIRINGS)]
+        out["history"] = games.astype(object).where(games.notna(), None).to_dict(orient="records")
+    if not out["games"]:
+        out["note"] = "No confidently reconstructed fixture between these teams."
+    caveat = opponent_caveat(team_games())
+    if caveat:
+        out["caveat"] = caveat
+    return out
+
+def act_team_opponent_splits(team: str, **_) -> Dict[str, Any]:
+    rows = team_vs_opponents(team_opponent_cube(), team)
+    out = {"team": team, "rows": [] if rows.empty else rows.to_dict(orient="records")}
+    caveat = opponent_caveat(team_games())
+    if caveat:
+        out["caveat"] = caveat
+    return out
+
+def act_player_opponent_split(team: str, player: str, opponents: Optional[List[str]] = None, top_n: int = 6, **_) -> Dict[str, Any]:
+    if not opponents:
+        opponents = [t for t in opponent_tiers(team_games(), top_n) if t != team]  # as on the Teams page
+    split = player_opponent_split(player_opponent_cube(), team, player, opponents)
+    if split.empty:
+        return {"error": "No data for this player/team.", "team": team, "player": player}
+    metrics = [c for c in ["Appearances", "Minutes", "Goals", "Assists", "Expected Goals (xG)", "Expected Assists (xAG)"] if c in split.columns]
+    out = {
+        "team": team, "player": player, "opponents": opponents,
+        "splits": split[["Split"] + metrics].to_dict(orient="records"),
+    }
+    caveat = opponent_caveat(team_games())
+    if caveat:
+        out["caveat"] = caveat
+    return out
+
+# --------- season projection ----------
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    return frame.round(2).astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+def act_season_projection(team: Optional[str] = None, player: Optional[str] = None, metric: str = "Goals",
+                          top_n: int = 10, **_) -> Dict[str, Any]:
+    """Projected end-of-season totals with p10/p50/p90 bands (player, team, or league leaders)."""
+    metric = next((m for m in COUNT_METRICS if m.lower() == str(metric).strip().lower()), resolve(metric))
+    if metric not in COUNT_METRICS:
+        return {"error": f"Projections cover {COUNT_METRICS}", "metric": metric}
+    proj = projections()
+    players, teams = proj["players"], proj["teams"]
+    cols = ["Team", "Player", "Games Played", "Games Left", "Minutes", "Minutes proj mean"] + \
+           [c for c in players.columns if c.split(" proj")[0] in COUNT_METRICS]
+    if player:
+        row = players[(players["Team"] == team) & (players["Player"] == player)] if team else players[players["Player"] == player]
+        if row.empty:
+            return {"error": "No data for this player/team.", "team": team, "player": player}
+        return {"projection": _records(row[cols])[0]}
+    ranked = players if not team else players[players["Team"] == team]
+    if team and ranked.empty:
+        return {"error": "No data for this team.", "team": team}
+    ranked = ranked.sort_values([f"{metric} proj mean", "Team", "Player"], ascending=[False, True, True], kind="mergesort")
+    out: Dict[str, Any] = {"metric": metric, "players": _records(ranked.head(max(1, min(50, int(top_n))))[cols])}
+    if team:
+        out["team"] = _records(teams[teams["Team"] == team])[0]
+    return out
+
+# --------- cross-team identity ----------
+def act_player_career(player: str, team: Optional[str] = None, by: Optional[str] = "Team", **_) -> Dict[str, Any]:
+    """Totals for one player across every team/season (transfers included); by = Team | Season | None."""
+    index = player_index()
+    ids = find_player_ids(index, player, team)
+    if not ids:
+        return {"error": "No data for this player.", "player": player}
+    if len(ids) > 1:
+        return {"error": "Several players share this name; pass team.", "candidates": _records(index.players.loc[ids].reset_index())}
+    pid = ids[0]
+    info = index.players.loc[pid]
+    split = {"team": "Team", "season": "Season"}.get(str(by).lower()) if by else None
+    out: Dict[str, Any] = {
+        "player_id": pid, "player": info["Player"], "nation": info.get("Nation"), "born": info.get("Born"),
+        "teams": list(info["Teams"]), "seasons": list(info["Seasons"]),
+        "career": _records(career_totals(df(), index, pid))[0],
+    }
+    if split:
+        out[f"by_{split.lower()}"] = _records(career_totals(df(), index, pid, split).reset_index())
+    return out
+
+# --------- lineups / rotation ----------
+def act_common_pairings(team: str, player: Optional[str] = None, top_n: int = 10, **_) -> Dict[str, Any]:
+    """Team-mates who play together most (by shared minutes); one player's partners if given."""
+    lu = lineups().get(team)
+    if lu is None:
+        return {"error": "No data for this team.", "team": team}
+    n = max(1, min(50, int(top_n)))
+    if player:
+        rows = partners(lu, player, n)
+        if rows.empty:
+            return {"error": "No data for this player/team.", "team": team, "player": player}
+        return {"team": team, "player": player, "partners": _records(rows)}
+    return {"team": team, "pairs": _records(top_pairs(lu, n))}
+
+def act_team_rotation(team: Optional[str] = None, **_) -> Any:
+    """Rotation depth and minutes concentration for one team, or every team ranked by rotation."""
+    table = rotation_table(lineups())
+    if not team:
+        return _records(table)
+    row = table[table["Team"] == team]
+    return _records(row)[0] if not row.empty else {"error": "No data for this team.", "team": team}
+
+# --------- generic structured query ----------
+def act_query(**spec) -> Dict[str, Any]:
+    """Validated JSON query over the aggregate cube (see lib/query.py), row- and size-limited (MAX_CELLS)."""
+    return run_query(cube(), spec)
+
 # --------- single dispatcher ----------
 ACTIONS = {
     # discovery
@@ -257,13 +450,38 @@ ACTIONS = {
     "rank_teams_by_age": act_rank_teams_by_age,
     "team_games": act_team_games,
     "team_game_summary": act_team_game_summary,
+    "team_fixtures": act_team_fixtures,
+
+    # opponents
+    "head_to_head": act_head_to_head,
+    "team_opponent_splits": act_team_opponent_splits,
+    "player_opponent_split": act_player_opponent_split,
+
+    # identity
+    "player_career": act_player_career,
+
+    # lineups
+    "common_pairings": act_common_pairings,
+    "team_rotation": act_team_rotation,
+
+    # projections
+    "season_projection": act_season_projection,
+
+    # anything else
+    "query": act_query,
 }
 
 def perform_action(action: str, **params) -> Any:
     if action not in ACTIONS:
         return {"error": f"Unknown action '{action}'", "available_actions": list(ACTIONS.keys())}
     try:
-        return ACTIONS[action](**params)
+        with DATASET.pin():  # one data version for the whole action
+            # FOOTBALL_BACKEND=sqlite|duckdb answers only SQL_ACTIONS (list_teams, list_players,
+            # top_players, team_fixtures, player_summary); every other action runs on pandas
+            backend = sql_backend()
+            if backend is not None and backend.supports(action):
+                return backend.run(action, **params)
+            return ACTIONS[action](**params)
     except TypeError as e:
         return {"error": f"Bad parameters for '{action}': {e}", "params": params}
     except Exception as e:
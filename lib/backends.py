@@ -0,0 +1,327 @@
+# lib/backends.py
+"""
+Pluggable query backends for agent actions.
+
+pandas (default) runs the act_* functions in lib.agent_tools. The SQL backends answer
+SQL_ACTIONS with prepared, parameterized statements; every other action runs on pandas.
+
+They never read the in-memory frame. Their source is the chunked ingest output of the
+data file (lib.ingest.ingested: quality-checked parquet partitions + team games, built
+once per data version), so the data can be larger than memory:
+  - duckdb: views over the parquet files, scanned out of core. Nothing is copied.
+  - sqlite: an on-disk database loaded partition by partition, once per data version
+    (a version stamp in the file makes later opens reuse it).
+
+Pick one with FOOTBALL_BACKEND=pandas|sqlite|duckdb. FOOTBALL_DB sets the database file
+(default: next to the ingest output).
+
+Parity check against pandas:  python -m lib.backends [sqlite|duckdb]
+                              python -m pytest tests/test_backends.py
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from lib.data import CONFIDENT_PAIRINGS, _slot_columns, pairing_coverage
+from lib.metrics import LEADERBOARD_MIN_MINUTES, METRICS, SUMMARY_DERIVED, derive, inputs_for, resolve
+
+# ---------- SQL statements (identifiers are whitelisted, values are bound) ----------
+def _q(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+SUMMARY_METRICS = ["Goals", "Assists", "Shots", "xG", "xA", "GCA", "SCA"]
+# the only actions answered in SQL (perform_action sends everything else to pandas);
+# tests/test_backends.py checks exactly these against pandas
+SQL_ACTIONS = ("list_teams", "list_players", "top_players", "team_fixtures", "player_summary")
+
+class SQLBackend(ABC):
+    name = "sql"
+    _order = "rowid"  # source row order inside a partition
+
+    def __init__(self, source: Path):
+        """`source`: an ingest output directory (lib.ingest.ingested)."""
+        self.source = Path(source)
+        manifest = json.loads((self.source / "manifest.json").read_text())
+        self.version = manifest["source_version"]
+        self.columns = list(manifest["schema"])
+        self.numeric = {c for c, t in manifest["schema"].items() if t == "float64"}
+        self.team_game_columns = manifest.get("team_game_columns", [])
+        self.slot = _slot_columns(pd.DataFrame(columns=self.columns))
+        self._local = threading.local()
+        self._load(manifest)
+        self.queries: Dict[str, Callable[..., Any]] = {name: getattr(self, name) for name in SQL_ACTIONS}
+
+    def _parts(self) -> List[Path]:
+        return sorted((self.source / "rows").glob("*/part-*.parquet"))
+
+    # engine specific
+    @abstractmethod
+    def _load(self, manifest: dict) -> None:
+        """Make the `rows` and `team_games` tables/views available."""
+
+    @abstractmethod
+    def _conn(self):
+        """A DB-API connection/cursor usable from the calling thread."""
+
+    def _rows(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return self._conn().execute(sql, params).fetchall()
+
+    def _records(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        cur = self._conn().execute(sql, params)
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, r)) for r in cur.fetchall()]
+
+    def _index_sql(self) -> List[str]:
+        return [
+            "CREATE INDEX IF NOT EXISTS rows_team_player ON rows (Team, Player)",
+            f"CREATE INDEX IF NOT EXISTS rows_team_date ON rows (Team, {_q('Date')})" if "Date" in self.columns else "",
+            "CREATE INDEX IF NOT EXISTS team_games_team ON team_games (Team)",
+        ]
+
+    # interface
+    def supports(self, action: str) -> bool:
+        return action in self.queries
+
+    def run(self, action: str, **params) -> Any:
+        return self.queries[action](**params)
+
+    # actions
+    def list_teams(self, **_) -> List[str]:
+        return [r[0] for r in self._rows("SELECT DISTINCT Team FROM rows WHERE Team IS NOT NULL ORDER BY Team")]
+
+    def list_players(self, team: str, **_) -> List[str]:
+        return [r[0] for r in self._rows(
+            "SELECT DISTINCT Player FROM rows WHERE Team = ? AND Player IS NOT NULL ORDER BY Player", (team,))]
+
+    def _sum_expr(self, col: str) -> str:
+        if col == "Appearances":
+            return "SUM(CASE WHEN Minutes > 0 THEN 1 ELSE 0 END) AS Appearances"
+        return f"SUM({_q(col)}) AS {_q(col)}"
+
+    def _derivable(self, metric: str) -> bool:
+        return all(c in self.numeric or (c == "Appearances" and "Minutes" in self.numeric) for c in inputs_for([metric]))
+
+    def _top_derived(self, metric: str, team: Optional[str], limit: int, date_from: Optional[str],
+                     date_to: Optional[str], min_minutes: float) -> List[Dict[str, Any]]:
+        cols = inputs_for([metric, "Minutes"])
+        where = "Team IS NOT NULL AND Player IS NOT NULL AND (? IS NULL OR Team = ?)"
+        params: tuple = (team, team)
+        if "Date" in self.columns:
+            where += f" AND (? IS NULL OR {_q('Date')} >= ?) AND (? IS NULL OR {_q('Date')} <= ?)"
+            params += (date_from, date_from, date_to, date_to)
+        frame = pd.DataFrame(self._records(
+            f"SELECT Team, Player, {', '.join(self._sum_expr(c) for c in cols)} FROM rows WHERE {where} GROUP BY Team, Player",
+            params), columns=["Team", "Player"] + cols)
+        frame = derive(frame.fillna({c: 0 for c in cols}), [metric]) if metric in METRICS else frame
+        frame = frame[frame["Minutes"] >= min_minutes].dropna(subset=[metric])
+        frame = frame.sort_values([metric, "Team", "Player"], ascending=[False, True, True], kind="mergesort").head(limit)
+        return [{"team": t, "player": p, metric: float(v)} for t, p, v in frame[["Team", "Player", metric]].itertuples(index=False)]
+
+    def top_players(self, metric: str, team: Optional[str] = None, top_n: int = 5,
+                    date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    min_minutes: Optional[float] = None, **_) -> List[Dict[str, Any]]:
+        metric = resolve(metric)
+        limit = max(1, min(50, int(top_n)))
+        if metric in METRICS or min_minutes:
+            if not self._derivable(metric):
+                return []
+            floor = float(min_minutes if min_minutes is not None else LEADERBOARD_MIN_MINUTES)
+            return self._top_derived(metric, team, limit, date_from, date_to, floor)
+        if metric not in self.numeric:
+            return []
+        sql = (
+            f"SELECT Team, Player, SUM({_q(metric)}) AS v FROM rows "
+            "WHERE Team IS NOT NULL AND Player IS NOT NULL "
+            "AND (? IS NULL OR Team = ?) "
+            f"AND (? IS NULL OR {_q('Date')} >= ?) AND (? IS NULL OR {_q('Date')} <= ?) "
+            "GROUP BY Team, Player ORDER BY v DESC, Team, Player LIMIT ?"
+        ) if "Date" in self.columns else (
+            f"SELECT Team, Player, SUM({_q(metric)}) AS v FROM rows "
+            "WHERE Team IS NOT NULL AND Player IS NOT NULL AND (? IS NULL OR Team = ?) "
+            "GROUP BY Team, Player ORDER BY v DESC, Team, Player LIMIT ?"
+        )
+        params = (team, team, date_from, date_from, date_to, date_to, limit) if "Date" in self.columns else (team, team, limit)
+        return [{"team": t, "player": p, metric: float(v or 0)} for t, p, v in self._rows(sql, params)]
+
+    def team_fixtures(self, team: str, **_) -> Dict[str, Any]:
+        cols = ", ".join(_q(c) for c in self.team_game_columns if c != "Team")
+        rows = self._records(f"SELECT {cols} FROM team_games WHERE Team = ? ORDER BY {_q('Date')}", (team,))
+        paired = sum(r.get("Pairing") in CONFIDENT_PAIRINGS for r in rows)
+        ambiguous = sum(r.get("Pairing") == "ambiguous" for r in rows)
+        return {"team": team, **pairing_coverage(len(rows), paired, ambiguous), "rows": rows}
+
+    def player_summary(self, team: str, player: str, **_) -> Dict[str, Any]:
+        metrics = [m for m in dict.fromkeys(["Minutes"] + [resolve(m) for m in SUMMARY_METRICS]
+                                             + inputs_for(SUMMARY_DERIVED)) if m in self.numeric]
+        sums = ", ".join(f"SUM({_q(m)})" for m in metrics)
+        row = self._rows(f"SELECT COUNT(*){', ' + sums if sums else ''} FROM rows WHERE Team = ? AND Player = ?", (team, player))[0]
+        if not row[0]:
+            return {"error": "No data for this player/team.", "team": team, "player": player}
+        totals = dict(zip(metrics, row[1:]))
+
+        def first(col: str):
+            if col not in self.columns:
+                return None
+            r = self._rows(f"SELECT {_q(col)} FROM rows WHERE Team = ? AND Player = ? AND {_q(col)} IS NOT NULL "
+                           f"ORDER BY {self._order} LIMIT 1", (team, player))
+            return r[0][0] if r else None
+
+        # one game of a team = one matchday slot (what Match ID encodes on the pandas side)
+        key = " || '|' || ".join(f"COALESCE(CAST({_q(c)} AS TEXT), '')" for c in self.slot) or "rowid"
+        if "Minutes" in self.numeric:
+            apps = self._rows(f"SELECT COUNT(DISTINCT {key}) FROM rows WHERE Team = ? AND Player = ? AND Minutes > 0",
+                              (team, player))[0][0]
+            team_games = self._rows(
+                f"SELECT COUNT(*) FROM (SELECT {key} FROM rows WHERE Team = ? GROUP BY {key} HAVING SUM(Minutes) > 0) g",
+                (team,))[0][0]
+        else:
+            apps = self._rows(f"SELECT COUNT(DISTINCT {key}) FROM rows WHERE Team = ? AND Player = ?", (team, player))[0][0]
+            team_games = self._rows(f"SELECT COUNT(DISTINCT {key}) FROM rows WHERE Team = ?", (team,))[0][0]
+
+        minutes = float(totals.get("Minutes") or 0.0)
+        age = first("Age")
+        out = {
+            "team": team,
+            "player": player,
+            "position": first("Position") or "—",
+            "age": int(age) if age is not None else None,
+            "appearances": int(apps),
+            "team_total_games": int(team_games),
+            "minutes_sum": minutes,
+            "avg_minutes": (minutes / apps) if apps > 0 else None,
+        }
+        for m in SUMMARY_METRICS:
+            if resolve(m) in totals:
+                out[m] = float(totals[resolve(m)] or 0)
+        derived = derive(pd.DataFrame([{**{k: v or 0 for k, v in totals.items()}, "Appearances": apps}]), SUMMARY_DERIVED)
+        for m in SUMMARY_DERIVED:
+            if m in derived.columns:
+                out[m] = float(derived[m].iloc[0])
+        return out
+
+class SQLiteBackend(SQLBackend):
+    name = "sqlite"
+
+    def _load(self, manifest: dict) -> None:
+        self._path = os.getenv("FOOTBALL_DB") or str(self.source / "football.sqlite")
+        if self._stamp(self._path) == self.version:
+            return  # built for this data version already (this or an earlier process)
+        tmp = f"{self._path}.{os.getpid()}.tmp"
+        db = sqlite3.connect(tmp)
+        try:
+            for part in self._parts():  # one partition file in memory at a time
+                pd.read_parquet(part).to_sql("rows", db, index=False, if_exists="append")
+            pd.read_parquet(self.source / "team_games.parquet").to_sql("team_games", db, index=False)
+            for stmt in filter(None, self._index_sql()):
+                db.execute(stmt)
+            db.execute("CREATE TABLE meta (version TEXT)")
+            db.execute("INSERT INTO meta VALUES (?)", (self.version,))
+            db.commit()
+        finally:
+            db.close()
+        os.replace(tmp, self._path)
+
+    @staticmethod
+    def _stamp(path: str) -> Optional[str]:
+        if not os.path.exists(path):
+            return None
+        db = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return db.execute("SELECT version FROM meta").fetchone()[0]
+        except sqlite3.Error:
+            return None
+        finally:
+            db.close()
+
+    def _conn(self) -> sqlite3.Connection:
+        # one read-only connection per thread; reads run concurrently
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(f"file:{self._path}?mode=ro", uri=True, check_same_thread=False)
+        return conn
+
+class DuckDBBackend(SQLBackend):
+    name = "duckdb"
+    _order = "filename, file_row_number"
+
+    def _load(self, manifest: dict) -> None:
+        import duckdb  # optional dependency
+        self._db = duckdb.connect(os.getenv("FOOTBALL_DB", ":memory:"))
+        parts = [str(p) for p in self._parts()]
+        # views, not tables: queries scan the parquet files (out of core, zone-mapped)
+        self._db.execute("CREATE OR REPLACE VIEW rows AS SELECT * FROM read_parquet("
+                         f"{parts!r}, filename = true, file_row_number = true, union_by_name = true, hive_partitioning = false)")
+        self._db.execute("CREATE OR REPLACE VIEW team_games AS SELECT * FROM read_parquet("
+                         f"{str(self.source / 'team_games.parquet')!r})")
+
+    def _index_sql(self) -> List[str]:
+        return []  # column store; scans are parallel and zone-mapped
+
+    def _conn(self):
+        cur = getattr(self._local, "cur", None)
+        if cur is None:
+            cur = self._local.cur = self._db.cursor()
+        return cur
+
+BACKENDS = {"sqlite": SQLiteBackend, "duckdb": DuckDBBackend}
+
+def make_backend(name: str, source: Optional[Path]) -> Optional[SQLBackend]:
+    """None means: use the pandas act_* functions. `source`: lib.ingest.ingested(path, version)."""
+    name = (name or "pandas").lower()
+    if name == "pandas":
+        return None
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}' (expected pandas, sqlite or duckdb)")
+    return BACKENDS[name](source)
+
+# ---------- Parity check against the pandas path ----------
+PARITY_CASES = [
+    ("list_teams", {}),
+    ("list_players", {"team": "Barcelona"}),
+    ("top_players", {"metric": "Goals", "top_n": 10}),
+    ("top_players", {"metric": "Assists", "team": "Real Madrid", "top_n": 5}),
+    ("top_players", {"metric": "Minutes", "top_n": 5, "date_from": "2024-09-01", "date_to": "2024-09-30"}),
+    ("top_players", {"metric": "xG", "top_n": 5}),
+    ("top_players", {"metric": "Goals/90", "top_n": 10}),
+    ("top_players", {"metric": "Conversion %", "team": "Barcelona", "top_n": 5, "min_minutes": 300}),
+    ("team_fixtures", {"team": "Getafe"}),
+    ("player_summary", {"team": "Athletic Club", "player": "Gorka Guruzeta"}),
+    ("player_summary", {"team": "Nobody FC", "player": "Nobody"}),
+]
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float):
+        return None if value != value else round(value, 6)
+    if value is pd.NA:
+        return None
+    return value
+
+def check_parity(backend: SQLBackend) -> List[str]:
+    from lib import agent_tools
+    problems = []
+    for action, params in PARITY_CASES:
+        expected = _normalize(agent_tools.ACTIONS[action](**params))
+        got = _normalize(backend.run(action, **params))
+        if expected != got:
+            problems.append(f"{action} {params}:\n  pandas: {expected}\n  {backend.name}: {got}")
+    return problems
+
+if __name__ == "__main__":
+    from lib import agent_tools
+    from lib.ingest import ingested
+    with agent_tools.DATASET.pin() as snap:
+        be = make_backend(sys.argv[1] if len(sys.argv) > 1 else "sqlite", ingested(agent_tools.DATASET.path, snap.version))
+    issues = check_parity(be)
+    print("\n".join(issues) if issues else f"{be.name}: {len(PARITY_CASES)} cases match pandas")
+    sys.exit(1 if issues else 0)
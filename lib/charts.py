@@ -0,0 +1,200 @@
+# lib/charts.py
+"""
+Chart service: render player/team charts once, then serve bytes from cache.
+
+Charts are content-addressed by (chart type, data version, entity, params, format).
+Lookups go in-memory LRU -> on-disk store (FOOTBALL_CHART_CACHE, default .cache/charts)
+-> render. prerender_popular() warms the cache in the background for the teams and
+the most-used players.
+
+Each request works on one agent_tools.DATASET snapshot: the key names snap.version and
+the renderers only read snap.df, so a key can never point at bytes drawn from other data.
+"""
+import concurrent.futures as cf
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from lib import agent_tools
+from lib.data import build_game_labels, get_teams
+from lib.dataset import Snapshot
+
+CACHE_DIR = Path(os.getenv("FOOTBALL_CHART_CACHE", ".cache/charts"))
+MEMORY_ITEMS = 256
+RADAR_METRICS = ["Goals", "Assists", "Expected Goals (xG)", "Expected Assists (xAG)",
+                 "Shot-Creating Actions", "Progressive Passes", "Tackles", "Successful Dribbles"]
+RADAR_MIN_MINUTES = 450
+
+# ---------- data helpers ----------
+def per_game(frame: pd.DataFrame, metrics: list[str]) -> pd.DataFrame:
+    """Per-game sums of `metrics`, in game order, indexed by game label."""
+    with_keys, games = build_game_labels(frame)
+    metrics = [m for m in metrics if m in with_keys.columns]
+    out = with_keys.groupby("_GAME_KEY")[metrics].sum()
+    order = games.drop_duplicates("_GAME_KEY").set_index("_GAME_KEY")["_GAME_LABEL"]
+    out = out.reindex(order.index)
+    out.index = pd.Index(order.to_numpy(dtype=object), name="Game")
+    return out
+
+def _rows(snap: Snapshot, team: str, player: Optional[str] = None) -> pd.DataFrame:
+    data = snap.df
+    rows = data[data["Team"] == team]
+    return rows if player is None else rows[rows["Player"] == player]
+
+_MEMORY_LOCK = threading.Lock()  # guards _PCT and the in-memory chart cache (_MEMORY)
+_PCT: Dict[str, pd.DataFrame] = {}
+def radar_percentiles(snap: Snapshot) -> pd.DataFrame:
+    """Per-90 percentile (0-100) of each radar metric among players with enough minutes."""
+    version = snap.version
+    with _MEMORY_LOCK:  # read from the chart worker, warm-up pool and page threads
+        if version not in _PCT:
+            data = snap.df
+            metrics = [m for m in RADAR_METRICS if m in data.columns]
+            totals = data.groupby(["Team", "Player"])[metrics + ["Minutes"]].sum()
+            totals = totals[totals["Minutes"] >= RADAR_MIN_MINUTES]
+            per90 = totals[metrics].div(totals["Minutes"], axis=0) * 90
+            _PCT.clear()
+            _PCT[version] = per90.rank(pct=True) * 100
+        return _PCT[version]
+
+# ---------- renderers (matplotlib OO API; no pyplot global state) ----------
+_RENDER_LOCK = threading.Lock()
+
+def _figure(width: float, height: float, polar: bool = False):
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(width, height), facecolor="#1a0000")
+    ax = fig.add_subplot(111, polar=polar, facecolor="#260000")
+    ax.tick_params(colors="#f5f5f5", labelsize=7)
+    for spine in ax.spines.values():
+        spine.set_color("#5c0b0b")
+    return fig, ax
+
+def _trend(frame: pd.DataFrame, title: str):
+    fig, ax = _figure(9, 3.2)
+    if frame.empty:
+        ax.text(0.5, 0.5, "No games", color="#f5f5f5", ha="center", transform=ax.transAxes)
+    for col in frame.columns:
+        ax.plot(range(len(frame)), frame[col].to_numpy(), marker="o", label=col)
+    ax.set_xticks(range(len(frame)))
+    ax.set_xticklabels([str(x)[:10] for x in frame.index], rotation=45, ha="right")
+    ax.set_title(title, color="#ffd0d0")
+    if len(frame.columns):
+        ax.legend(fontsize=7)
+    fig.tight_layout()
+    return fig
+
+def render_player_trend(snap: Snapshot, entity: tuple, params: dict):
+    team, player = entity
+    metrics = params.get("metrics") or ["Goals", "Assists", "Expected Goals (xG)"]
+    return _trend(per_game(_rows(snap, team, player), metrics), f"{player} — per game")
+
+def render_team_trend(snap: Snapshot, entity: tuple, params: dict):
+    (team,) = entity
+    metrics = params.get("metrics") or ["Goals", "Expected Goals (xG)"]
+    return _trend(per_game(_rows(snap, team), metrics), f"{team} — per game")
+
+def render_player_radar(snap: Snapshot, entity: tuple, params: dict):
+    team, player = entity
+    pct = radar_percentiles(snap)
+    fig, ax = _figure(4.2, 4.2, polar=True)
+    labels = list(pct.columns)
+    angles = np.linspace(0, 2 * np.pi, len(labels), endpoint=False)
+    if (team, player) in pct.index:
+        vals = pct.loc[(team, player)].to_numpy()
+        ax.fill(np.append(angles, angles[0]), np.append(vals, vals[0]), color="#8B0000", alpha=0.55)
+        ax.plot(np.append(angles, angles[0]), np.append(vals, vals[0]), color="#ffd0d0")
+        title = f"{player} — per-90 percentiles"
+    else:
+        title = f"{player} — under {RADAR_MIN_MINUTES} min"
+    ax.set_xticks(angles)
+    ax.set_xticklabels([l.replace(" (", "\n(") for l in labels], fontsize=6)
+    ax.set_ylim(0, 100)
+    ax.set_title(title, color="#ffd0d0", fontsize=9)
+    fig.tight_layout()
+    return fig
+
+RENDERERS: Dict[str, Callable[[Snapshot, tuple, dict], Any]] = {
+    "player_trend": render_player_trend,
+    "player_radar": render_player_radar,
+    "team_trend": render_team_trend,
+}
+
+# ---------- content-addressed cache ----------
+_MEMORY: "OrderedDict[str, bytes]" = OrderedDict()
+
+def chart_key(kind: str, version: str, entity: tuple, params: Optional[dict] = None, fmt: str = "png") -> str:
+    payload = json.dumps([kind, version, list(entity), params or {}, fmt], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _remember(key: str, blob: bytes) -> None:
+    with _MEMORY_LOCK:
+        _MEMORY[key] = blob
+        _MEMORY.move_to_end(key)
+        while len(_MEMORY) > MEMORY_ITEMS:
+            _MEMORY.popitem(last=False)
+
+def get_chart(kind: str, entity: tuple, params: Optional[dict] = None,
+              snap: Optional[Snapshot] = None, fmt: str = "png") -> bytes:
+    """PNG/SVG bytes for a chart; rendered at most once per (type, version, entity, params).
+
+    Keyed on and drawn from `snap` (default: the caller's pinned or current snapshot).
+    """
+    if kind not in RENDERERS:
+        raise ValueError(f"Unknown chart '{kind}' (expected one of {list(RENDERERS)})")
+    if snap is None:
+        with agent_tools.DATASET.pin() as snap:
+            return get_chart(kind, entity, params, snap, fmt)
+    entity = tuple(entity)
+    key = chart_key(kind, snap.version, entity, params, fmt)
+
+    with _MEMORY_LOCK:
+        blob = _MEMORY.get(key)
+        if blob is not None:
+            _MEMORY.move_to_end(key)
+            return blob
+
+    path = CACHE_DIR / key[:2] / f"{key}.{fmt}"
+    if path.exists():
+        blob = path.read_bytes()
+    else:
+        with _RENDER_LOCK:
+            fig = RENDERERS[kind](snap, entity, dict(params or {}))
+            buf = io.BytesIO()
+            fig.savefig(buf, format=fmt, dpi=110, facecolor=fig.get_facecolor())
+        blob = buf.getvalue()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)  # atomic publish; concurrent writers produce identical bytes
+    _remember(key, blob)
+    return blob
+
+# ---------- background pre-rendering ----------
+_PRERENDER = cf.ThreadPoolExecutor(max_workers=1, thread_name_prefix="charts")
+_PRERENDERED: set = set()
+
+def prerender_popular(snap: Optional[Snapshot] = None, top_players: int = 40) -> Optional[cf.Future]:
+    """Queue team trends and the top players' (by minutes) trend/radar charts, once per version."""
+    snap = snap or agent_tools.DATASET.snapshot()
+    if snap.version in _PRERENDERED:
+        return None
+    _PRERENDERED.add(snap.version)
+
+    def work():
+        data = snap.df
+        for team in get_teams(data):
+            get_chart("team_trend", (team,), snap=snap)
+        popular = data.groupby(["Team", "Player"])["Minutes"].sum().nlargest(top_players).index
+        for team, player in popular:
+            get_chart("player_trend", (team, player), snap=snap)
+            get_chart("player_radar", (team, player), snap=snap)
+
+    return _PRERENDER.submit(work)
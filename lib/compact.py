@@ -0,0 +1,129 @@
+# lib/compact.py
+"""
+Compact, token-budgeted encoding of action results for the answer prompt.
+
+    text = compact(result)                   # <= TOKEN_BUDGET (estimated) tokens
+
+Deterministic: same result -> same text. Lists of records become one pipe-separated
+table (header once, floats to 2 decimals, None -> empty); dicts become `key: value`
+lines with nested tables under their key. Over budget, every table keeps its first rows
+(results are already ranked) plus a '+N more rows' line with min/max/mean of its
+numeric columns over all rows; the row cap is the largest that fits.
+
+    python -m lib.compact               # raw vs compact size for sample actions
+"""
+import json
+import math
+import os
+from typing import Any, List
+
+TOKEN_BUDGET = int(os.getenv("FOOTBALL_CHAT_RESULT_TOKENS", "800"))
+SUMMARY_COLUMNS = 4  # numeric columns described in a truncated table's 'all rows' line
+CHARS_PER_TOKEN = 4  # rough, model-agnostic; only used to stay under the budget
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+# ---------- encoding ----------
+def _cell(v: Any) -> str:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return ""
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, float):
+        if not math.isfinite(v):
+            return "inf" if v > 0 else "-inf"
+        return f"{v:.2f}".rstrip("0").rstrip(".") if v != int(v) else str(int(v))
+    if isinstance(v, (list, tuple)):
+        return ",".join(_cell(x) for x in v)
+    if isinstance(v, dict):
+        return json.dumps(v, ensure_ascii=False, sort_keys=True, default=str)
+    return str(v).replace("|", "/").replace("\n", " ")
+
+def _is_records(v: Any) -> bool:
+    return isinstance(v, list) and bool(v) and all(isinstance(r, dict) for r in v)
+
+def _summary(records: List[dict], columns: List[str]) -> str:
+    stats = []
+    for c in columns:
+        if len(stats) == SUMMARY_COLUMNS:
+            break
+        nums = [r[c] for r in records if isinstance(r.get(c), (int, float)) and not isinstance(r.get(c), bool)]
+        if len(nums) == len(records) and nums:
+            stats.append(f"{c} min {_cell(float(min(nums)))} max {_cell(float(max(nums)))} mean {_cell(sum(nums) / len(nums))}")
+    return "; ".join(stats)
+
+def _table(records: List[dict], max_rows: int|None, summarize: bool) -> List[str]:
+    columns = list(dict.fromkeys(k for r in records for k in r))
+    shown = records if max_rows is None else records[:max_rows]
+    lines = ["|".join(columns)] + ["|".join(_cell(r.get(c)) for c in columns) for r in shown]
+    if len(shown) < len(records):
+        lines.append(f"+{len(records) - len(shown)} more rows ({len(records)} total)")
+        summary = _summary(records, columns) if summarize else ""
+        if summary:
+            lines.append(f"all rows: {summary}")
+    return lines
+
+def _encode(value: Any, max_rows: int|None, prefix: str = "", summarize: bool = True) -> List[str]:
+    if _is_records(value):
+        return ([f"{prefix}:"] if prefix else []) + _table(value, max_rows, summarize)
+    if isinstance(value, dict):
+        lines: List[str] = []
+        for k, v in value.items():
+            key = f"{prefix}.{k}" if prefix else str(k)
+            if _is_records(v) or (isinstance(v, dict) and v):
+                lines += _encode(v, max_rows, key, summarize)
+            elif isinstance(v, list) and max_rows is not None and len(v) > max_rows:
+                lines.append(f"{key}: {_cell(v[:max_rows])} (+{len(v) - max_rows} more)")
+            else:
+                lines.append(f"{key}: {_cell(v)}")
+        return lines
+    if isinstance(value, list):
+        shown = value if max_rows is None else value[:max_rows]
+        more = f" (+{len(value) - len(shown)} more)" if len(shown) < len(value) else ""
+        return [f"{prefix + ': ' if prefix else ''}{_cell(shown)}{more}"]
+    return [f"{prefix + ': ' if prefix else ''}{_cell(value)}"]
+
+def _longest(value: Any) -> int:
+    if isinstance(value, dict):
+        return max([_longest(v) for v in value.values()] + [0])
+    if isinstance(value, list):
+        return max([len(value)] + [_longest(v) for v in value if isinstance(v, (dict, list))])
+    return 0
+
+def compact(result: Any, budget: int|None = None) -> str:
+    """Encode `result` within `budget` (default TOKEN_BUDGET) estimated tokens (largest row cap that fits)."""
+    budget = TOKEN_BUDGET if budget is None else budget
+    text = "\n".join(_encode(result, None))
+    if estimate_tokens(text) <= budget:
+        return text
+    lo, hi = 1, max(1, _longest(result) - 1)
+    best = "\n".join(_encode(result, 1))
+    while lo <= hi:  # rows-per-table cap
+        mid = (lo + hi) // 2
+        candidate = "\n".join(_encode(result, mid))
+        if estimate_tokens(candidate) <= budget:
+            best, lo = candidate, mid + 1
+        else:
+            hi = mid - 1
+    if estimate_tokens(best) > budget:
+        best = "\n".join(_encode(result, 1, summarize=False))
+    limit = budget * CHARS_PER_TOKEN
+    return best if len(best) <= limit else best[:limit - 12].rstrip() + "\n[truncated]"
+
+if __name__ == "__main__":
+    from lib.agent_tools import perform_action
+
+    samples = [
+        ("rank_teams_by_age", {}),
+        ("top_players", {"metric": "Goals", "top_n": 50}),
+        ("team_rotation", {}),
+        ("player_summary", {"team": "Barcelona", "player": "Pedri"}),
+        ("season_projection", {"team": "Barcelona", "top_n": 25}),
+        ("query", {"select": ["Goals", "xG"], "group_by": ["Player"], "order_by": "Goals", "limit": 50}),
+    ]
+    for action, params in samples:
+        result = perform_action(action, **params)
+        raw = estimate_tokens(json.dumps(result, ensure_ascii=False))
+        small = estimate_tokens(compact(result))
+        print(f"{action:<20} raw ~{raw:>6} tokens -> compact ~{small:>5}")
@@ -0,0 +1,147 @@
+# lib/cube.py
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lib.data import load_df, find_game_columns
+from lib.metrics import available, derive, inputs_for
+
+# ---------- Pre-aggregated cube ----------
+DIMENSIONS = ["Team", "Player", "Position"]
+
+@dataclass(frozen=True)
+class Cube:
+    """
+    Partial aggregates keyed by (Team, Player, Position) x matchday date.
+
+    groups   : one row per (Team, Player, Position) cell
+    dates    : sorted matchday dates (the time axis)
+    prefix   : float array [group, date + 1, measure]; prefix[:, i] = totals of dates[:i]
+    measures : measure names (numeric source columns + Appearances + Rows)
+    """
+    groups: pd.DataFrame
+    dates: np.ndarray
+    prefix: np.ndarray
+    measures: list
+    int_measures: frozenset
+
+def build_cube(df: pd.DataFrame) -> Cube:
+    dims = [c for c in DIMENSIONS if c in df.columns]
+    date_col = find_game_columns(df)["date"]
+
+    rows = df.assign(Rows=1)
+    if "Minutes" in rows.columns:
+        rows = rows.assign(Appearances=(rows["Minutes"] > 0).astype("int64"))
+    num = rows.select_dtypes(include="number")
+    measures = num.columns.tolist()
+    int_measures = frozenset(c for c in measures if pd.api.types.is_integer_dtype(num[c]))
+
+    grouped = rows.groupby(dims, dropna=False, sort=True)
+    gid = grouped.ngroup().to_numpy()
+    groups = grouped.size().reset_index()[dims]
+
+    if date_col:
+        date_codes, dates = pd.factorize(rows[date_col].astype(str), sort=True)
+        dates = np.asarray(dates)
+    else:
+        date_codes, dates = np.zeros(len(rows), dtype=np.int64), np.array(["all"])
+
+    n_groups, n_dates = len(groups), len(dates)
+    dense = np.zeros((n_groups * n_dates, len(measures)))
+    np.add.at(dense, gid * n_dates + date_codes, num.fillna(0).to_numpy(dtype=float))
+    dense = dense.reshape(n_groups, n_dates, len(measures))
+
+    prefix = np.zeros((n_groups, n_dates + 1, len(measures)))
+    np.cumsum(dense, axis=1, out=prefix[:, 1:, :])
+    return Cube(groups=groups, dates=dates, prefix=prefix, measures=measures, int_measures=int_measures)
+
+@st.cache_data
+def load_cube(path: str, version: str|None = None) -> Cube:
+    return build_cube(load_df(path, version))
+
+# ---------- Declarative queries ----------
+def _filter_mask(groups: pd.DataFrame, filters: dict|None) -> np.ndarray:
+    mask = np.ones(len(groups), dtype=bool)
+    for col, val in (filters or {}).items():
+        if col not in groups.columns:
+            raise ValueError(f"Unknown filter dimension '{col}'")
+        vals = val if isinstance(val, (list, tuple, set)) else [val]
+        mask &= groups[col].isin(list(vals)).to_numpy()
+    return mask
+
+def date_window(cube: Cube, date_from: str|None = None, date_to: str|None = None) -> tuple[int, int]:
+    """Inclusive [date_from, date_to] -> half-open prefix positions [lo, hi)."""
+    lo = 0 if date_from is None else int(np.searchsorted(cube.dates, str(date_from), side="left"))
+    hi = len(cube.dates) if date_to is None else int(np.searchsorted(cube.dates, str(date_to), side="right"))
+    return lo, max(lo, hi)
+
+def query_size(cube: Cube, dims: list[str]|None = None, filters: dict|None = None,
+               date_from: str|None = None, date_to: str|None = None) -> int:
+    """Cell values query_cube would materialize (cells x matchdays when grouped by Date)."""
+    cells = int(_filter_mask(cube.groups, filters).sum())
+    if "Date" not in (dims or []):
+        return cells
+    lo, hi = date_window(cube, date_from, date_to)
+    return cells * (hi - lo)
+
+def query_cube(
+    cube: Cube,
+    dims: list[str]|None = None,
+    measures: list[str]|None = None,
+    filters: dict|None = None,
+    date_from: str|None = None,
+    date_to: str|None = None,
+) -> pd.DataFrame:
+    """
+    Roll the cube up to `dims` (subset of Team/Player/Position, plus "Date" for a
+    per-matchday breakdown), summing `measures` over the inclusive date range.
+    Range totals are two prefix lookups per cell, independent of the range length.
+    Derived metrics (lib.metrics, e.g. "Goals/90") are computed from the rolled-up sums.
+    """
+    dims = list(dims or [])
+    requested = list(measures or [m for m in cube_measures(cube) if m != "Rows"])
+    unknown = [m for m in requested if m not in cube_measures(cube)]
+    if unknown:
+        raise ValueError(f"Unknown measures: {unknown}")
+    measures = inputs_for(requested)  # derived metrics expand to their summed inputs
+    by_date = "Date" in dims
+    group_dims = [d for d in dims if d != "Date"]
+    bad = [d for d in group_dims if d not in cube.groups.columns]
+    if bad:
+        raise ValueError(f"Unknown dimensions: {bad}")
+
+    m_idx = [cube.measures.index(m) for m in measures]
+    cells = np.flatnonzero(_filter_mask(cube.groups, filters))
+    lo, hi = date_window(cube, date_from, date_to)
+    keys = cube.groups.iloc[cells][group_dims].reset_index(drop=True)
+
+    if by_date:
+        prefix = cube.prefix[cells, lo:hi + 1, :]
+        per_day = prefix[:, 1:, :] - prefix[:, :-1, :]
+        present = per_day[:, :, cube.measures.index("Rows")].reshape(-1) > 0
+        n_cells, n_days = per_day.shape[0], per_day.shape[1]
+        frame = pd.DataFrame(per_day[:, :, m_idx].reshape(n_cells * n_days, len(measures)), columns=measures)
+        frame = pd.concat([keys.loc[keys.index.repeat(n_days)].reset_index(drop=True), frame], axis=1)
+        frame["Date"] = np.tile(cube.dates[lo:hi], n_cells)
+        frame = frame[present]
+    else:
+        ends = cube.prefix[cells[:, None], [lo, hi]]  # two lookups per cell
+        totals = ends[:, 1, :] - ends[:, 0, :]
+        present = totals[:, cube.measures.index("Rows")] > 0
+        frame = pd.concat([keys, pd.DataFrame(totals[:, m_idx], columns=measures)], axis=1)[present]
+
+    if dims:
+        out = frame.groupby(dims, dropna=False, sort=True)[measures].sum().reset_index()
+    else:
+        out = frame[measures].sum().to_frame().T
+    for m in measures:
+        if m in cube.int_measures:
+            out[m] = out[m].round().astype("int64")
+    out = derive(out, [m for m in requested if m not in cube.measures])
+    return out[dims + requested]
+
+def cube_measures(cube: Cube) -> list[str]:
+    """Summable cube measures followed by the derived metrics they support."""
+    return list(cube.measures) + available(cube.measures)
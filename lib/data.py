@@ -1,8 +1,14 @@
 # lib/data.py
+import hashlib
+import os
 import re
+import unicodedata
+from collections import Counter
 import pandas as pd
 import streamlit as st
 
+from lib.quality import validate_frame
+
 # ---------- Loading & cleaning ----------
 NUMERIC_CANDIDATES = [
     # core
@@ -20,19 +26,126 @@ def _coerce_numeric(series: pd.Series) -> pd.Series:
     extracted = series.astype(str).str.extract(r'(-?\d+(?:\.\d+)?)', expand=False)
     return pd.to_numeric(extracted, errors="coerce")
 
+def data_version(path: str) -> str:
+    """Cheap fingerprint of the source file; pass it to the loaders so edits invalidate caches."""
+    try:
+        info = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{info.st_mtime_ns}-{info.st_size}"
+
 @st.cache_data
-def load_df(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
+def load_checked(path: str, version: str|None = None) -> tuple[pd.DataFrame, dict]:
+    """Load + quality pass (dedup, numeric guarantees); `version` only takes part in the cache key."""
+    df, report = validate_frame(normalize_frame(pd.read_csv(path)))
+    # opponents / match ids reconstructed from same-date team pairs
+    df = attach_fixtures(df, build_team_games(df))
+    return df, report
+
+def load_df(path: str, version: str|None = None) -> pd.DataFrame:
+    """`version` only takes part in the cache key (see data_version)."""
+    return load_checked(path, version)[0]
+
+def quality_report(path: str, version: str|None = None) -> dict:
+    """What the quality pass found/changed for this data version (see lib.quality)."""
+    return load_checked(path, version)[1]
+
+# ---------- Player identity (row-local: name + nation + birth date, shirt # as fallback) ----------
+def normalize_name(name: str) -> str:
+    """'Álex  Berenguer' -> 'alex berenguer' (unaccented, lowercased, single spaces)."""
+    plain = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return " ".join(plain.lower().split())
+
+def birth_dates(age: pd.Series, dates: pd.Series) -> pd.Series:
+    """
+    'YYYY-MM-DD' birth dates from FBref-style 'years-days' ages on the match date:
+    match date - days = last birthday, minus years = birth date. NA when age is plain years.
+    """
+    parts = age.astype(str).str.extract(r"^\s*(\d+)-(\d+)\s*$").astype(float)
+    last_birthday = pd.to_datetime(dates, errors="coerce") - pd.to_timedelta(parts[1], unit="D")
+    born = pd.to_datetime(pd.DataFrame({"year": last_birthday.dt.year - parts[0],
+                                        "month": last_birthday.dt.month, "day": last_birthday.dt.day}),
+                          errors="coerce")
+    return born.dt.strftime("%Y-%m-%d")
+
+def player_ids(df: pd.DataFrame) -> pd.Series:
+    """Stable 'p' + 10 hex id per player, the same across teams and seasons."""
+    name = df["Player"].map(normalize_name)
+    nation = df["Nation"].astype(str) if "Nation" in df.columns else ""
+    if "Born" in df.columns:
+        tail = df["Born"].fillna("#" + (df["#"].astype(str) if "#" in df.columns else ""))
+    else:
+        tail = "#" + (df["#"].astype(str) if "#" in df.columns else "")
+    keys = name + "|" + nation + "|" + tail
+    ids = {k: "p" + hashlib.blake2b(k.encode(), digest_size=5).hexdigest() for k in keys.unique()}
+    return keys.map(ids)
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Header and numeric cleanup; row-local, so it also works chunk by chunk."""
     df.columns = df.columns.str.strip()
     # normalize common headers
     rename = {"Club":"Team","Squad":"Team","Name":"Player","player":"Player","Pos":"Position"}
     df = df.rename(columns={k:v for k,v in rename.items() if k in df.columns})
+    # identity first: the birth date needs the raw 'years-days' Age string
+    date_col = find_game_columns(df)["date"]
+    if "Age" in df.columns and date_col and "Born" not in df.columns:
+        df["Born"] = birth_dates(df["Age"], df[date_col])
+    if "Player" in df.columns and "Player ID" not in df.columns:
+        df["Player ID"] = player_ids(df)
     # numeric cleanup
     for col in NUMERIC_CANDIDATES:
         if col in df.columns:
             df[col] = _coerce_numeric(df[col])
     return df
 
+@st.cache_data
+def load_team_games(path: str, version: str|None = None) -> pd.DataFrame:
+    return build_team_games(load_df(path, version))
+
+@st.cache_data
+def load_fixtures(path: str, version: str|None = None) -> pd.DataFrame:
+    return build_fixtures(load_team_games(path, version))
+
+# ---------- Memoized page inputs, keyed on (path, data version, team, player) ----------
+@st.cache_data
+def team_rows(path: str, version: str|None, team: str, date_from: str|None = None, date_to: str|None = None) -> pd.DataFrame:
+    df = load_df(path, version)
+    t = df[df["Team"] == team]
+    date_col = find_game_columns(t)["date"]
+    if date_col and (date_from or date_to):
+        d = t[date_col].astype(str)
+        t = t[d.between(date_from or d.min(), date_to or d.max())]
+    return t.reset_index(drop=True)
+
+@st.cache_data
+def team_profile(path: str, version: str|None, team: str, date_from: str|None = None, date_to: str|None = None) -> dict:
+    return team_profile_kpis(team_rows(path, version, team, date_from, date_to))
+
+@st.cache_data
+def team_game_labels(path: str, version: str|None, team: str):
+    return build_game_labels(team_rows(path, version, team))
+
+@st.cache_data
+def player_rows(path: str, version: str|None, team: str, player: str) -> pd.DataFrame:
+    t = team_rows(path, version, team)
+    return t[t["Player"] == player].reset_index(drop=True)
+
+@st.cache_data
+def player_game_log(path: str, version: str|None, team: str, player: str):
+    return build_game_labels(player_rows(path, version, team, player))
+
+@st.cache_data
+def player_totals(path: str, version: str|None, team: str, player: str) -> pd.Series:
+    return player_rows(path, version, team, player).select_dtypes(include="number").sum(numeric_only=True)
+
+@st.cache_data
+def team_names(path: str, version: str|None) -> list[str]:
+    return get_teams(load_df(path, version))
+
+@st.cache_data
+def team_player_names(path: str, version: str|None, team: str) -> list[str]:
+    return get_players_for_team(team_rows(path, version, team), team)
+
 # ---------- Router (deep-linkable) ----------
 def _get_query_params():
     try:
@@ -107,8 +220,7 @@ def kpi_row(team_df: pd.DataFrame, aggregate: bool) -> None:
         minutes_label = "Match Minutes"
 
         if "Minutes" in df.columns:
-            mins = pd.to_numeric(df["Minutes"], errors="coerce")
-            minutes_val = int(mins.max()) if not mins.dropna().empty else pd.NA
+            minutes_val = int(df["Minutes"].max()) if len(df) else pd.NA
         else:
             minutes_val = pd.NA
 
@@ -225,7 +337,7 @@ def find_game_columns(df: pd.DataFrame) -> dict:
         return next((c for c in df.columns if re.search(pattern, c, re.I)), None)
     return dict(
         date=find(r'date|match.?day|kick.?off'),
-        opp=find(r'opponent|opp|against'),
+        opp=find(r'opponent|opp|^against$'),  # not "Goals Against" / "xG Against" (box score)
         rnd=find(r'round|gw|gameweek|matchweek|md'),
         ha=find(r'home.?away|ha|isHome'),
         venue=find(r'venue|home|away'),
@@ -233,6 +345,12 @@ def find_game_columns(df: pd.DataFrame) -> dict:
         mname=find(r'(?:^|_)match$|fixture$')
     )
 
+def season_of(dates: pd.Series) -> pd.Series:
+    """'2024-25' style season label (seasons start in July)."""
+    d = pd.to_datetime(dates, errors="coerce")
+    start = d.dt.year.where(d.dt.month >= 7, d.dt.year - 1)
+    return start.astype("Int64").astype("string") + "-" + ((start + 1) % 100).astype("Int64").astype("string").str.zfill(2)
+
 def build_game_labels(team_df: pd.DataFrame):
     cols = find_game_columns(team_df)
     t = team_df.copy()
@@ -249,11 +367,14 @@ def build_game_labels(team_df: pd.DataFrame):
 
     # friendly label
     def mk_label(row):
-        d = str(row.get(cols["date"])) if cols["date"] else ""
-        opp = str(row.get(cols["opp"])) if cols["opp"] else ""
-        ha  = str(row.get(cols["ha"]))  if cols["ha"] else ""
-        venue = str(row.get(cols["venue"])) if cols["venue"] else ""
-        mname = str(row.get(cols["mname"])) if cols["mname"] else ""
+        def get(key):
+            v = row.get(cols[key]) if cols[key] else None
+            return "" if v is None or pd.isna(v) else str(v)
+        d = get("date")
+        opp = get("opp")
+        ha  = get("ha")
+        venue = get("venue")
+        mname = get("mname")
 
         at_or_vs = "vs"
         if ha:
@@ -264,6 +385,7 @@ def build_game_labels(team_df: pd.DataFrame):
         if d and opp: return f"{d} {at_or_vs} {opp}"
         if mname:     return mname
         if opp:       return f"{at_or_vs} {opp}"
+        if d:         return d
         return row["_GAME_KEY"]
 
     t["_GAME_LABEL"] = t.apply(mk_label, axis=1)
@@ -319,7 +441,7 @@ def team_profile_kpis(team_df: pd.DataFrame) -> dict:
 
     up = team_unique_players_frame(team_df)
     if "Age" in up.columns:
-        ages = pd.to_numeric(up["Age"], errors="coerce").dropna()
+        ages = up["Age"].dropna()
         if not ages.empty:
             out["avg_age"] = float(ages.mean())
             out["median_age"] = float(ages.median())
@@ -331,4 +453,237 @@ def team_profile_kpis(team_df: pd.DataFrame) -> dict:
     if "xG"  in nums: out["xg_total"]  = float(nums["xG"].sum())
     if "xA"  in nums: out["xa_total"]  = float(nums["xA"].sum())
 
-    return out
\ No newline at end of file
+    return out
+
+# ---------- Fixture reconstruction ----------
+XG_COLUMNS = ["xG", "Expected Goals (xG)"]
+# team-level "against" columns (same value on each player row of a game), mirrored by the opponent's "For"
+MIRROR_COLUMNS = {"Goals For": ["Goals Against", "GA"], "xG For": ["xG Against", "xGA"]}
+MIRROR_TOLERANCE = {"Goals For": 0.0, "xG For": 0.05}
+MAX_MEETINGS = 2          # two sides meet at most twice a season (home and away)
+MATCHING_LIMIT = 5000     # pairings enumerated per slot; beyond that none is called unique
+CONFIDENT_PAIRINGS = ("source", "unique")
+
+def _first_col(df: pd.DataFrame, candidates: list[str]) -> str|None:
+    return next((c for c in candidates if c in df.columns), None)
+
+def _slot_columns(df: pd.DataFrame) -> list[str]:
+    """Columns that identify one matchday slot: the date, plus the round when present."""
+    cols = find_game_columns(df)
+    return [c for c in (cols["date"], cols["rnd"]) if c]
+
+def _venue_side(values: pd.Series) -> pd.Series:
+    """Normalize home/away style values to 'Home' / 'Away' (NA when unknown)."""
+    s = values.astype("string").str.strip().str.lower()
+    out = pd.Series(pd.NA, index=values.index, dtype="string")
+    out[s.isin(["h", "home", "true", "1"])] = "Home"
+    out[s.isin(["a", "away", "false", "0"])] = "Away"
+    return out
+
+def _matchings(teams: list, ok, limit: int) -> list[frozenset]:
+    """Up to `limit` + 1 ways to split `teams` into allowed pairs (None = a bye for odd slots)."""
+    out: list[frozenset] = []
+    def walk(rest: list, acc: list) -> None:
+        if len(out) > limit:
+            return
+        if not rest:
+            out.append(frozenset(acc))
+            return
+        a, rest = rest[0], rest[1:]
+        for i, b in enumerate(rest):
+            if b is None or ok(a, b):
+                walk(rest[:i] + rest[i + 1:], acc + [frozenset((a, b))])
+    walk(list(teams) + ([None] if len(teams) % 2 else []), [])
+    return out
+
+def _pair_slots(tg: pd.DataFrame, slot: list[str]) -> pd.DataFrame:
+    """
+    Opponent and Pairing for every team-game when the source has no opponent column.
+
+    Within a slot each team plays exactly one other team. A pairing is allowed when the
+    sides' box scores mirror each other (Goals/xG For vs the other side's Against, when the
+    source has against columns) and the two have met fewer than MAX_MEETINGS times in
+    other slots. Pairs in every allowed split of their slot are "unique" and count as
+    meetings for the other slots; this repeats until nothing changes. The remaining slots
+    take the allowed split with the fewest repeat meetings and are tagged "ambiguous".
+    """
+    groups = [(key, g["Team"].astype(str).tolist()) for key, g in tg.groupby(slot, dropna=False, sort=True)]
+    mirrors = [(f, a, MIRROR_TOLERANCE[f]) for f, a in (("Goals For", "_GA"), ("xG For", "_XGA"))
+               if f in tg.columns and a in tg.columns]
+    stats = {(tuple(key) if isinstance(key, tuple) else (key,), str(team)): row
+             for key, g in tg.groupby(slot, dropna=False, sort=True)
+             for team, row in zip(g["Team"], g.to_dict("records"))}
+
+    def mirrored(key: tuple, a: str, b: str) -> bool:
+        ra, rb = stats[(key, a)], stats[(key, b)]
+        for f, against, tol in mirrors:
+            for x, y in ((ra, rb), (rb, ra)):
+                if pd.notna(x[against]) and pd.notna(y[f]) and abs(x[against] - y[f]) > tol:
+                    return False
+        return True
+
+    keys = [tuple(k) if isinstance(k, tuple) else (k,) for k, _ in groups]
+    unique: dict = {k: frozenset() for k in keys}
+    met: Counter = Counter()
+    options: dict = {}
+    changed = True
+    while changed:
+        changed = False
+        for key, (_, teams) in zip(keys, groups):
+            other = met - Counter(unique[key])
+            ms = _matchings(sorted(teams), lambda a, b: other[frozenset((a, b))] < MAX_MEETINGS
+                            and mirrored(key, a, b), MATCHING_LIMIT)
+            options[key] = ms[:MATCHING_LIMIT]
+            sure = frozenset.intersection(*ms) if ms and len(ms) <= MATCHING_LIMIT else frozenset()
+            sure = frozenset(p for p in sure if None not in p)
+            if sure != unique[key]:
+                met = other + Counter(sure)
+                unique[key], changed = sure, True
+
+    chosen = Counter(met)
+    out = []
+    for key in keys:
+        ms = options[key]
+        if not ms:
+            continue
+        best = min(ms, key=lambda m: sum(chosen[p] for p in m - unique[key] if None not in p))
+        for p in best:
+            if None in p:
+                continue
+            if p not in unique[key]:
+                chosen[p] += 1
+            a, b = sorted(p)
+            tag = "unique" if p in unique[key] else "ambiguous"
+            out += [(a, *key, b, tag), (b, *key, a, tag)]
+    return pd.DataFrame(out, columns=["Team", *slot, "Opponent", "Pairing"]).astype(
+        {"Team": tg["Team"].dtype, **{c: tg[c].dtype for c in slot}})
+
+def build_team_games(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (team, game) with the opponent and box-score totals, indexed by (Team, date).
+
+    The opponent comes from an opponent column when the source has one (Pairing "source").
+    Otherwise the teams that share a matchday slot (date, and round when present) are paired
+    by _pair_slots: "unique" when the constraints leave one choice, "ambiguous" when several
+    remain. Only confident pairings (CONFIDENT_PAIRINGS) get a shared Match ID.
+    """
+    slot = _slot_columns(df)
+    if "Team" not in df.columns or not slot:
+        return pd.DataFrame()
+
+    cols = find_game_columns(df)
+    rows = df.dropna(subset=["Team"])
+    keys = ["Team"] + slot
+    aggs = {}
+    if "Goals" in rows.columns:
+        aggs["Goals For"] = ("Goals", "sum")
+    xg = _first_col(rows, XG_COLUMNS)
+    if xg:
+        aggs["xG For"] = (xg, "sum")
+    for name, col in (("_GA", _first_col(rows, MIRROR_COLUMNS["Goals For"])),
+                      ("_XGA", _first_col(rows, MIRROR_COLUMNS["xG For"]))):
+        if col:
+            aggs[name] = (col, _first_non_null)
+    if cols["opp"]:
+        aggs["Opponent"] = (cols["opp"], _first_non_null)
+        if "Pairing" in rows.columns:  # rows that went through attach_fixtures keep their tags
+            aggs["Pairing"] = ("Pairing", _first_non_null)
+    side_col = cols["ha"] or cols["venue"]
+    if side_col:
+        rows = rows.assign(_VENUE=_venue_side(rows[side_col]))
+        aggs["Venue"] = ("_VENUE", _first_non_null)
+
+    tg = rows.groupby(keys, dropna=False, sort=True).agg(**aggs).reset_index() if aggs \
+        else rows[keys].drop_duplicates().reset_index(drop=True)
+
+    if "Pairing" in tg.columns:
+        tg["Pairing"] = tg["Pairing"].astype("string")
+    elif "Opponent" in tg.columns:
+        tg["Pairing"] = pd.Series("source", index=tg.index, dtype="string").where(tg["Opponent"].notna())
+    else:
+        tg = tg.merge(_pair_slots(tg, slot), on=keys, how="left")
+        tg["Pairing"] = tg["Pairing"].astype("string")
+    tg = tg.drop(columns=["_GA", "_XGA"], errors="ignore")
+    if "Venue" not in tg.columns:
+        tg["Venue"] = pd.Series(pd.NA, index=tg.index, dtype="string")
+
+    # opponent side of the box score
+    against = {"Team": "Opponent", "Goals For": "Goals Against", "xG For": "xG Against"}
+    opp_side = tg[[c for c in keys + ["Goals For", "xG For"] if c in tg.columns]].rename(columns=against)
+    tg = tg.merge(opp_side, on=slot + ["Opponent"], how="left")
+
+    if {"Goals For", "Goals Against"} <= set(tg.columns):
+        gf, ga = tg["Goals For"], tg["Goals Against"]
+        tg["Result"] = pd.Series(pd.NA, index=tg.index, dtype="string")
+        tg.loc[ga.notna() & (gf > ga), "Result"] = "W"
+        tg.loc[ga.notna() & (gf == ga), "Result"] = "D"
+        tg.loc[ga.notna() & (gf < ga), "Result"] = "L"
+
+    # stable match id shared by both sides (home first when known, else alphabetical)
+    date = tg[slot].astype(str).agg(" | ".join, axis=1) if len(slot) > 1 else tg[slot[0]].astype(str)
+    team, opp = tg["Team"].astype(str), tg["Opponent"].astype("string")
+    first = team.where((tg["Venue"] == "Home") | (tg["Venue"].isna() & (team <= opp)), opp)
+    second = opp.where(first == team, team)
+    sure = tg["Pairing"].isin(CONFIDENT_PAIRINGS)
+    tg["Match ID"] = (date + " | " + first + " v " + second).where(sure, date + " | " + team)
+
+    return tg.set_index(["Team", slot[0]]).sort_index()
+
+def build_fixtures(team_games: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per reconstructed match (confident pairings only) with home/away sides, score and xG.
+    When the venue is unknown the sides are ordered alphabetically and Venue Known is False.
+    """
+    if team_games.empty or "Opponent" not in team_games.columns:
+        return pd.DataFrame()
+    tg = team_games.reset_index()
+    tg = tg[tg["Pairing"].isin(CONFIDENT_PAIRINGS)]
+    date_col = team_games.index.names[1]
+    known = tg["Venue"].notna()
+    home = tg[(known & (tg["Venue"] == "Home")) | (~known & (tg["Team"] <= tg["Opponent"]))]
+    out = home.rename(columns={
+        "Team": "Home", "Opponent": "Away",
+        "Goals For": "Home Goals", "Goals Against": "Away Goals",
+        "xG For": "Home xG", "xG Against": "Away xG",
+    })
+    out["Venue Known"] = out["Venue"].notna()
+    keep = ["Match ID", date_col, "Home", "Away", "Home Goals", "Away Goals", "Home xG", "Away xG", "Venue Known"]
+    return out[[c for c in keep if c in out.columns]].sort_values([date_col, "Home"]).reset_index(drop=True)
+
+def attach_fixtures(df: pd.DataFrame, team_games: pd.DataFrame) -> pd.DataFrame:
+    """Add Opponent, Pairing and Match ID to per-game player rows (vectorized merge on team + slot)."""
+    if team_games.empty:
+        return df
+    slot = _slot_columns(df)
+    extra = ["Match ID", "Pairing"] + (["Opponent"] if "Opponent" not in df.columns else [])
+    tg = team_games.reset_index()[["Team"] + slot + extra]
+    return df.drop(columns=["Match ID", "Pairing"], errors="ignore").merge(tg, on=["Team"] + slot, how="left")
+
+def pairing_coverage(games: int, paired: int, ambiguous: int = 0) -> dict:
+    """How many team-games have a confident opponent; `ambiguous` ones only have a best guess."""
+    unpaired = games - paired
+    note = ""
+    if unpaired:
+        note = (f"{unpaired} of {games} games have no confident opponent: {ambiguous} are a best guess "
+                f"(Pairing 'ambiguous': several teams played that day and the box scores fit more than "
+                f"one pairing), {unpaired - ambiguous} have none")
+    return {
+        "games": games, "paired": paired, "ambiguous": ambiguous, "unpaired": unpaired,
+        "unpaired_pct": round(100 * unpaired / games, 1) if games else 0.0,
+        "note": note,
+    }
+
+def team_pairing_coverage(team_games: pd.DataFrame, team: str|None = None) -> dict:
+    """pairing_coverage for one team, or the whole league when `team` is None."""
+    if team_games.empty or "Opponent" not in team_games.columns:
+        return pairing_coverage(0 if team_games.empty else len(team_games), 0)
+    tg = team_games if team is None else team_games[team_games.index.get_level_values(0) == team]
+    pairing = tg["Pairing"]
+    return pairing_coverage(len(tg), int(pairing.isin(CONFIDENT_PAIRINGS).sum()),
+                            int((pairing == "ambiguous").sum()))
+
+def team_fixtures(team_games: pd.DataFrame, team: str) -> pd.DataFrame:
+    """All games for one team, in date order (index lookup, no scan)."""
+    if team_games.empty or team not in team_games.index.get_level_values(0):
+        return pd.DataFrame()
+    return team_games.loc[team].reset_index()
@@ -0,0 +1,175 @@
+# lib/dataset.py
+"""
+Thread-safe, versioned handle on the match dataset for code outside the page scripts
+(agent actions, chat, reports, charts, warm-up).
+
+    snap = DATASET.snapshot()            # immutable: snap.version, snap.df
+    tg = snap.derived("team_games", lambda s: build_team_games(s.df))
+    with DATASET.pin():                  # every snapshot() in this thread -> same version
+        ...
+
+- Single-flight loading: concurrent first callers wait on one load instead of each
+  reading the CSV.
+- Snapshots never change after publish; a new data version is loaded off to the side
+  and swapped in with one reference assignment. Readers that already hold (or pinned)
+  the old snapshot finish on it; while a reload is running, other readers keep being
+  served the old one.
+- Derived tables (team games, cube, SQL engine, ...) are cached on the snapshot, built
+  once per snapshot (single-flight per name), and dropped with it.
+
+The source file is re-fingerprinted (lib.data.data_version) at most every
+CHECK_SECONDS, so an edited CSV is picked up without a restart. When the background
+precompute scheduler owns the handle (lib.warmup), auto_refresh is off: readers never
+load, and the scheduler install()s each new snapshot once its derived tables are built.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import pandas as pd
+
+from lib.data import data_version, load_df
+
+CHECK_SECONDS = float(os.getenv("FOOTBALL_DATA_CHECK", "2.0"))
+INSTALL_WAIT_SECONDS = 60.0  # cold start: how long a reader waits for the scheduler's snapshot
+
+class Snapshot:
+    """One immutable data version plus its lazily built derived tables (treat df as read-only)."""
+
+    __slots__ = ("version", "df", "_cache", "_locks", "_guard")
+
+    def __init__(self, version: str, df: pd.DataFrame):
+        self.version = version
+        self.df = df
+        self._cache: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def derived(self, name: str, build: Callable[["Snapshot"], Any]) -> Any:
+        """build(self) once per snapshot; concurrent callers for the same name wait for it."""
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        with self._guard:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._cache:
+                self._cache[name] = build(self)
+            return self._cache[name]
+
+    def built(self) -> list[str]:
+        return list(self._cache)
+
+    def __repr__(self) -> str:
+        return f"Snapshot(version={self.version!r}, rows={len(self.df)}, derived={self.built()})"
+
+class DatasetHandle:
+    def __init__(self, path: str, loader: Callable[[str, str], pd.DataFrame] = load_df,
+                 check_seconds: float = CHECK_SECONDS):
+        self.path = path
+        self._loader = loader
+        self._check_seconds = check_seconds
+        self._snap: Optional[Snapshot] = None
+        self._checked = 0.0
+        self._watch = True  # re-fingerprint the file; off after publish()
+        self.auto_refresh = True  # readers may (re)load; off when a scheduler installs snapshots
+        self._installing: Optional[threading.Event] = None
+        self._load_lock = threading.Lock()
+        self._local = threading.local()
+        self.loads = 0  # completed loads, for diagnostics
+
+    # ---------- loading ----------
+    def _load(self, block: bool) -> Optional[Snapshot]:
+        """Load the current file version if it is not already published (single flight)."""
+        if not self._load_lock.acquire(blocking=block):
+            return None  # someone else is loading; caller keeps its old snapshot
+        try:
+            version = data_version(self.path)
+            if self._snap is None or self._snap.version != version:
+                self._snap = Snapshot(version, self._loader(self.path, version))
+                self.loads += 1
+            self._checked = time.monotonic()
+            return self._snap
+        finally:
+            self._load_lock.release()
+
+    def _stale(self, snap: Snapshot) -> bool:
+        if not (self._watch and self.auto_refresh):
+            return False
+        now = time.monotonic()
+        if now - self._checked < self._check_seconds:
+            return False
+        self._checked = now
+        return data_version(self.path) != snap.version
+
+    # ---------- readers ----------
+    def snapshot(self) -> Snapshot:
+        """The pinned snapshot for this thread, else the latest published one."""
+        pinned = getattr(self._local, "snap", None)
+        if pinned is not None:
+            return pinned
+        snap = self._snap
+        if snap is None:
+            pending = self._installing
+            if pending is not None and pending.wait(INSTALL_WAIT_SECONDS) and self._snap is not None:
+                return self._snap  # the scheduler's first snapshot, derived tables included
+            return self._load(block=True)
+        if self._stale(snap):
+            return self._load(block=False) or snap
+        return snap
+
+    @contextmanager
+    def pin(self) -> Iterator[Snapshot]:
+        """Hold this thread on one snapshot (nested pins reuse the outer one)."""
+        outer = getattr(self._local, "snap", None)
+        self._local.snap = outer or self.snapshot()
+        try:
+            yield self._local.snap
+        finally:
+            self._local.snap = outer
+
+    # ---------- writers ----------
+    def publish(self, df: pd.DataFrame, version: str) -> Snapshot:
+        """Swap in an already loaded frame; the file stops being watched until open()."""
+        snap = Snapshot(version, df)
+        with self._load_lock:
+            self._watch = False
+            self._snap = snap
+            self._checked = time.monotonic()
+        return snap
+
+    def expect_install(self) -> None:
+        """A scheduler is building the first snapshot: readers wait for it instead of loading."""
+        if self._snap is None and self._installing is None:
+            self._installing = threading.Event()
+
+    def install(self, snap: Snapshot) -> None:
+        """Atomically publish a snapshot a scheduler staged (and pre-built derived tables on)."""
+        with self._load_lock:
+            self._snap = snap
+            self._checked = time.monotonic()
+            self.loads += 1
+        if self._installing is not None:
+            self._installing.set()
+
+    def abandon_install(self) -> None:
+        """The scheduler could not build a snapshot: waiting readers load one themselves."""
+        if self._installing is not None:
+            self._installing.set()
+
+    def open(self, path: str) -> Snapshot:
+        """Point the handle at another file and load it (pinned readers are unaffected)."""
+        with self._load_lock:
+            self.path = path
+            self._watch = True
+            self._snap = None
+        return self._load(block=True)
+
+    def status(self) -> dict:
+        snap = self._snap
+        return {"path": self.path, "version": snap.version if snap else None,
+                "rows": len(snap.df) if snap else 0, "derived": snap.built() if snap else [],
+                "loads": self.loads}
@@ -0,0 +1,236 @@
+# lib/export.py
+import concurrent.futures as cf
+import csv
+import io
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional
+
+import pandas as pd
+import streamlit as st
+
+from lib.cube import Cube
+from lib.data import find_game_columns, season_of
+from lib.ingest import safe_name
+from lib.query import OPS, query_frame
+
+# ---------- derived partition keys ----------
+def primary_position(positions: pd.Series) -> pd.Series:
+    """'DM,CM' -> 'DM'."""
+    return positions.astype("string").str.split(",").str[0].str.strip()
+
+def partition_keys(df: pd.DataFrame, by: str) -> pd.Series:
+    if by == "Season":
+        date_col = find_game_columns(df)["date"]
+        if not date_col:
+            raise ValueError("no date column to derive seasons from")
+        return season_of(df[date_col])
+    if by == "Position" and "Position" in df.columns:
+        return primary_position(df["Position"])
+    if by not in df.columns:
+        raise ValueError(f"unknown partition column '{by}'")
+    return df[by].astype("string")
+
+# ---------- filters / projection ----------
+_WHERE = re.compile(r"^\s*(.+?)\s*(==|!=|>=|<=|=|>|<)\s*(.+?)\s*$")
+
+def parse_where(expr: str) -> tuple[str, str, str]:
+    """'Minutes>=45' -> ('Minutes', '>=', '45')."""
+    m = _WHERE.match(expr)
+    if not m:
+        raise ValueError(f"bad filter '{expr}' (expected COLUMN OP VALUE)")
+    return m.group(1), m.group(2), m.group(3)
+
+def apply_filters(df: pd.DataFrame, where: list[str]) -> pd.DataFrame:
+    mask = pd.Series(True, index=df.index)
+    for expr in where or []:
+        col, op, raw = parse_where(expr)
+        if col not in df.columns:
+            raise ValueError(f"unknown filter column '{col}'")
+        value = float(raw) if pd.api.types.is_numeric_dtype(df[col]) else raw
+        mask &= OPS[op](df[col], value).fillna(False)
+    return df[mask]
+
+# ---------- writers ----------
+def _write_part(part: pd.DataFrame, target: str, fmt: str) -> tuple[str, int]:
+    if fmt == "parquet":
+        part.to_parquet(target, index=False)
+    else:
+        part.to_csv(target, index=False)
+    return target, len(part)
+
+def export_partitions(
+    df: pd.DataFrame,
+    out_dir: str,
+    by: str = "Team",
+    fmt: str = "csv",
+    columns: Optional[list[str]] = None,
+    where: Optional[list[str]] = None,
+    workers: Optional[int] = None,
+) -> list[tuple[str, int]]:
+    """
+    Split `df` by team / season / position (or any column) in one grouped pass and write
+    one file per group on a process pool. Returns [(path, rows)].
+    """
+    keys = partition_keys(df, by)
+    data = apply_filters(df, where or [])
+    keys = keys.loc[data.index]
+    if columns:
+        missing = [c for c in columns if c not in data.columns]
+        if missing:
+            raise ValueError(f"unknown columns: {missing}")
+        data = data[columns]
+
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    ext = "parquet" if fmt == "parquet" else "csv"
+    groups = data.groupby(keys.to_numpy(), sort=True, dropna=False).indices  # single pass: key -> row positions
+
+    jobs = [(data.iloc[pos], str(out / f"{safe_name(key)}.{ext}"), ext) for key, pos in groups.items()]
+    if (workers or os.cpu_count() or 1) <= 1 or len(jobs) <= 1:
+        return [_write_part(*job) for job in jobs]
+    with cf.ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_write_part, *zip(*jobs)))
+
+# ---------- streaming (NDJSON / CSV in row chunks) ----------
+CHUNK_ROWS = 5_000
+MIME = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def iter_frames(df: pd.DataFrame, columns: Optional[list[str]] = None, where: Optional[list[str]] = None,
+                chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Filtered, projected row chunks of `df`; filters run per chunk, so working memory is one
+    chunk whatever the result size. Bad columns / filters raise before the first chunk.
+    """
+    missing = [c for c in (columns or []) if c not in df.columns]
+    missing += [col for col, _, _ in map(parse_where, where or []) if col not in df.columns]
+    if missing:
+        raise ValueError(f"unknown columns: {missing}")
+    for start in range(0, len(df), max(1, int(chunk_rows))):
+        part = apply_filters(df.iloc[start:start + chunk_rows], where or [])
+        if columns:
+            part = part[columns]
+        if len(part):
+            yield part
+
+def encode(frames: Iterable[pd.DataFrame], fmt: str = "ndjson") -> Iterator[bytes]:
+    """NDJSON lines or CSV (header once) per chunk; NaN -> null / empty."""
+    if fmt not in MIME:
+        raise ValueError(f"unknown format '{fmt}' (expected {list(MIME)})")
+    header = True
+    for part in frames:
+        if fmt == "csv":
+            yield part.to_csv(index=False, header=header).encode("utf-8")
+            header = False
+        else:
+            text = part.to_json(orient="records", lines=True, force_ascii=False, date_format="iso")
+            yield (text if text.endswith("\n") else text + "\n").encode("utf-8")
+
+def stream_rows(df: pd.DataFrame, fmt: str = "ndjson", columns: Optional[list[str]] = None,
+                where: Optional[list[str]] = None, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    return encode(iter_frames(df, columns, where, chunk_rows), fmt)
+
+def stream_query(cube: Cube, spec: dict, fmt: str = "ndjson", chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Every row of a validated cube query (lib/query.py spec; `limit` is ignored here)."""
+    return stream_rows(query_frame(cube, spec), fmt, chunk_rows=chunk_rows)
+
+def stream_records(records: Iterable[dict], fmt: str = "ndjson", chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Action results (lists of dicts) in the same formats; CSV columns come from the first record."""
+    buf = io.StringIO()
+    writer = None
+    for i, rec in enumerate(records, 1):
+        if fmt == "csv":
+            if writer is None:
+                writer = csv.DictWriter(buf, fieldnames=list(rec), extrasaction="ignore")
+                writer.writeheader()
+            writer.writerow(rec)
+        else:
+            buf.write(json.dumps(rec, ensure_ascii=False, default=str) + "\n")
+        if i % chunk_rows == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+def stream_action(action: str, params: Optional[dict] = None, fmt: str = "ndjson",
+                  chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """
+    An agent action's list result (or the list under 'rows' / 'players' / 'pairs') as a stream,
+    yielded every `chunk_rows` records. Only the encoding is chunked: actions return their
+    whole result list first, so memory grows with the result (bounded by the action's own
+    limits). Use stream_rows / stream_query for constant-memory extracts.
+    """
+    from lib.agent_tools import perform_action  # heavy; only for action exports
+    result: Any = perform_action(action, **(params or {}))
+    if isinstance(result, dict):
+        if "error" in result:
+            raise ValueError(result["error"])
+        result = next((result[k] for k in ("rows", "players", "pairs", "partners") if isinstance(result.get(k), list)), [result])
+    yield from stream_records(result, fmt, chunk_rows)
+
+# ---------- download buttons ----------
+def spool(chunks: Iterable[bytes], suffix: str = "") -> BinaryIO:
+    """
+    Write chunks to a temp file as they come and return it rewound for reading, so the
+    payload is never joined in memory. The file is unlinked right away where the OS allows
+    (it lives until closed); elsewhere it stays in the temp dir.
+    """
+    fd, path = tempfile.mkstemp(prefix="football-export-", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in chunks:
+                out.write(chunk)
+        f = open(path, "rb")
+    except BaseException:
+        os.unlink(path)
+        raise
+    try:
+        os.unlink(path)
+    except OSError:  # Windows: an open file cannot be removed
+        pass
+    return f
+
+def download_buttons(source: Callable[[], pd.DataFrame], stem: str, key: str, container=None) -> None:
+    """
+    CSV + NDJSON buttons; `source` runs only when a button is clicked, and its rows are
+    encoded chunk by chunk into a temp file (spool) that the button serves. Streamlit reads
+    that file once into its media store to send it; for extracts larger than memory, use
+    `python -m lib.export`.
+    """
+    box = container or st
+    c1, c2 = box.columns(2)
+    for col, fmt in [(c1, "csv"), (c2, "ndjson")]:
+        col.download_button(f"⬇ {fmt.upper()}", data=lambda fmt=fmt: spool(stream_rows(source(), fmt), f".{fmt}"),
+                            file_name=f"{safe_name(stem)}.{fmt}", mime=MIME[fmt], key=f"{key}_{fmt}",
+                            on_click="ignore", use_container_width=True)
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    ap = argparse.ArgumentParser(description="Stream rows, a cube query or an action result to stdout.")
+    ap.add_argument("--format", choices=list(MIME), default="ndjson")
+    ap.add_argument("--columns", help="comma-separated column projection (rows only)")
+    ap.add_argument("--where", action="append", default=[], help='filter like "Minutes>=45" (repeatable)')
+    ap.add_argument("--query", help="JSON cube query spec (see lib/query.py)")
+    ap.add_argument("--action", help="agent action name; --params JSON")
+    ap.add_argument("--params", default="{}")
+    ap.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = ap.parse_args()
+
+    from lib import agent_tools
+    if args.action:
+        chunks = stream_action(args.action, json.loads(args.params), args.format, args.chunk_rows)
+    elif args.query:
+        chunks = stream_query(agent_tools.cube(), json.loads(args.query), args.format, args.chunk_rows)
+    else:
+        columns = [c.strip() for c in args.columns.split(",")] if args.columns else None
+        chunks = stream_rows(agent_tools.df(), args.format, columns, args.where, args.chunk_rows)
+    out = sys.stdout.buffer
+    for chunk in chunks:
+        out.write(chunk)
+    out.flush()
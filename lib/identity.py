@@ -0,0 +1,91 @@
+# lib/identity.py
+"""
+Cross-team player index on the stable Player ID (lib.data.player_ids: name + nation +
+birth date, shirt # when the age has no day part).
+
+    index = load_player_index(path, version)
+    index.rows["p1a2b3c4d5"]          # row positions across every team / season
+    career_totals(df, index, pid)     # one indexed aggregation, by Season or Team if asked
+
+A player who moved clubs keeps one id, so season and career totals no longer need a
+full scan per (Team, Player) pair.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lib.data import find_game_columns, load_df, normalize_name, season_of
+from lib.metrics import SKIP_SUMS, derive
+
+@dataclass(frozen=True)
+class PlayerIndex:
+    """
+    players : one row per Player ID (Player, Nation, Born, Teams, Seasons, Rows), sorted by name
+    rows    : Player ID -> int array of row positions in the frame it was built from
+    by_name : normalized name -> Player IDs (homonyms stay apart)
+    """
+    players: pd.DataFrame
+    rows: dict
+    by_name: dict
+
+def build_player_index(df: pd.DataFrame) -> PlayerIndex:
+    if "Player ID" not in df.columns:
+        return PlayerIndex(pd.DataFrame(), {}, {})
+    date_col = find_game_columns(df)["date"]
+    ids = df["Player ID"].to_numpy()
+    rows = {pid: np.asarray(pos, dtype=np.int64) for pid, pos in pd.Series(np.arange(len(df))).groupby(ids).groups.items()}
+
+    frame = df.assign(Season=season_of(df[date_col]) if date_col else pd.NA)
+    if date_col:
+        frame = frame.sort_values(date_col, kind="stable")  # Teams in the order they were joined
+    aggs = {"Player": ("Player", "first")}
+    aggs.update({c: (c, "first") for c in ["Nation", "Born"] if c in df.columns})
+    aggs.update(
+        Teams=("Team", lambda t: tuple(dict.fromkeys(t))),
+        Seasons=("Season", lambda s: tuple(sorted(s.dropna().unique()))),
+        Rows=("Team", "size"),
+    )
+    info = frame.groupby("Player ID", sort=False).agg(**aggs).sort_values("Player", kind="stable")
+
+    by_name: dict = {}
+    for pid, name in info["Player"].items():
+        by_name.setdefault(normalize_name(name), []).append(pid)
+    return PlayerIndex(info, rows, {k: tuple(v) for k, v in by_name.items()})
+
+@st.cache_data
+def load_player_index(path: str, version: str|None = None) -> PlayerIndex:
+    return build_player_index(load_df(path, version))
+
+# ---------- lookups ----------
+def find_player_ids(index: PlayerIndex, player: str, team: str|None = None) -> list[str]:
+    """Player IDs for a name (accents/case ignored); `team` narrows homonyms to who played there."""
+    ids = list(index.by_name.get(normalize_name(player), ()))
+    if team and len(ids) > 1:
+        ids = [pid for pid in ids if team in index.players.at[pid, "Teams"]] or ids
+    return ids
+
+def player_rows(df: pd.DataFrame, index: PlayerIndex, pid: str) -> pd.DataFrame:
+    return df.iloc[index.rows.get(pid, np.empty(0, dtype=np.int64))]
+
+def career_totals(df: pd.DataFrame, index: PlayerIndex, pid: str, by: str|None = None) -> pd.DataFrame:
+    """
+    Summed numeric columns + Appearances + derived metrics for one player, across teams;
+    by='Season' or 'Team' splits the rows (otherwise one 'Career' row).
+    """
+    rows = player_rows(df, index, pid)
+    if rows.empty:
+        return pd.DataFrame()
+    sums = [c for c in rows.select_dtypes(include="number").columns if c not in SKIP_SUMS]
+    if "Minutes" in rows.columns:
+        rows = rows.assign(Appearances=(rows["Minutes"] > 0).astype("int64"))
+        sums.append("Appearances")
+    if by == "Season":
+        date_col = find_game_columns(rows)["date"]
+        keys = season_of(rows[date_col]).rename("Season")
+    elif by == "Team":
+        keys = rows["Team"]
+    else:
+        keys = pd.Series("Career", index=rows.index, name="Span")
+    return derive(rows.groupby(keys, sort=True)[sums].sum())
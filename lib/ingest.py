@@ -0,0 +1,269 @@
+# lib/ingest.py
+"""
+Chunked ingestion for per-game CSVs too large to load at once.
+
+Reads the source in chunks, normalizes and quality-checks each chunk like load_df, keeps running aggregates
+(player season totals, team-game box scores) and appends each chunk to partitioned
+columnar output. Peak memory is one chunk plus the aggregates plus one hash per distinct
+(Player, Team, Date) key for cross-chunk dedup (see iter_chunks).
+
+    python -m lib.ingest database.csv build/ingest --chunksize 100000 --partition-by Team
+
+Output layout:
+    <out>/rows/<partition>=<value>/part-00000.parquet   one file per chunk and partition
+    <out>/player_totals.parquet                         per (Team, Player) season totals
+    <out>/team_games.parquet                            per (Team, date) box score + opponent
+    (.csv instead of .parquet everywhere with --format csv; parquet needs pyarrow)
+    <out>/manifest.json                                 schema, counts, source version
+
+ingested(src, version) keeps one such directory per data version under INGEST_CACHE and
+reuses it; the SQL backends (lib.backends) read from there instead of the in-memory frame.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from lib.data import NUMERIC_CANDIDATES, normalize_frame, data_version, build_team_games, _slot_columns
+from lib.quality import DEDUP_POLICY, KEY_COLUMNS, POLICIES, row_hashes, validate_frame
+
+DEFAULT_CHUNKSIZE = 100_000
+INGEST_CACHE = Path(os.getenv("FOOTBALL_INGEST_DIR", ".cache/ingest"))
+KEEP_VERSIONS = 2  # ingested versions kept per source (readers of the previous one may still be open)
+# declared column kinds; other columns are numbers only if the first chunk has numeric values
+TEXT_COLUMNS = {"Player", "Team", "Nation", "Position", "Date", "Born", "Player ID"}
+NUMBER_COLUMNS = set(NUMERIC_CANDIDATES)
+
+# ---------- chunk helpers ----------
+def _kind(col: str, values: pd.Series) -> str:
+    if col in TEXT_COLUMNS:
+        return "string"
+    if col in NUMBER_COLUMNS:
+        return "number"
+    # undeclared: an all-empty column stays text so later string values survive
+    return "number" if values.notna().any() and pd.api.types.is_numeric_dtype(values) else "string"
+
+def _pin_schema(chunk: pd.DataFrame, schema: Optional[dict]) -> tuple[pd.DataFrame, dict]:
+    """Fix column kinds on the first chunk so every partition file shares one schema."""
+    if schema is None:
+        schema = {c: _kind(c, chunk[c]) for c in chunk.columns}
+    out = {}
+    for col, kind in schema.items():
+        s = chunk[col] if col in chunk.columns else pd.Series(pd.NA, index=chunk.index)
+        out[col] = pd.to_numeric(s, errors="coerce").astype("float64") if kind == "number" else s.astype("string")
+    return pd.DataFrame(out, index=chunk.index), schema
+
+def _write(frame: pd.DataFrame, target: Path, ext: str) -> None:
+    if ext == "parquet":
+        frame.to_parquet(target, index=False)
+    else:
+        frame.to_csv(target, index=False)
+
+def safe_name(value) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(value)) or "_"
+
+def _add(acc: Optional[pd.DataFrame], part: pd.DataFrame) -> pd.DataFrame:
+    return part if acc is None else acc.add(part, fill_value=0)
+
+def _max(acc: Optional[pd.Series], part: pd.Series) -> pd.Series:
+    return part if acc is None else pd.concat([acc, part]).groupby(level=list(range(part.index.nlevels))).max()
+
+def _checked_chunks(src: str, chunksize: int, policy: str) -> Iterator[tuple[pd.DataFrame, dict]]:
+    for chunk in pd.read_csv(src, chunksize=chunksize):
+        yield validate_frame(normalize_frame(chunk), policy)
+
+def _winners(src: str, chunksize: int, policy: str) -> Optional[pd.Index]:
+    """
+    First pass for 'last' / 'max_minutes': running row numbers (counting rows after each
+    chunk's own dedup) of each key's winning row. Later rows win ties, as in validate_frame.
+    None when the policy keeps everything (no key columns, or no Minutes for max_minutes).
+    """
+    best = pd.DataFrame({"hash": np.array([], dtype="uint64"), "pos": np.array([], dtype="int64"),
+                         "minutes": np.array([], dtype="float64")})  # one row per key seen so far
+    n = 0
+    for chunk, _ in _checked_chunks(src, chunksize, policy):
+        if not set(KEY_COLUMNS) <= set(chunk.columns) or (policy == "max_minutes" and "Minutes" not in chunk.columns):
+            return None
+        part = pd.DataFrame({
+            "hash": row_hashes(chunk, KEY_COLUMNS).to_numpy(),
+            "pos": np.arange(n, n + len(chunk), dtype="int64"),
+            "minutes": chunk["Minutes"].to_numpy(dtype="float64") if policy == "max_minutes" else 0.0,
+        })
+        best = pd.concat([best, part], ignore_index=True)
+        if policy == "max_minutes":
+            best = best.sort_values(["minutes", "pos"], kind="mergesort")  # winner sorts last
+        best = best[~best["hash"].duplicated(keep="last")]
+        n += len(chunk)
+    return pd.Index(best["pos"])
+
+def iter_chunks(src: str, chunksize: int = DEFAULT_CHUNKSIZE, quality: Optional[dict] = None,
+                policy: Optional[str] = None) -> Iterator[pd.DataFrame]:
+    """
+    Normalized, quality-checked chunks of the source CSV with a schema pinned from the
+    first chunk. Duplicate (Player, Team, Date) keys across chunks follow the
+    same dedup policy as load_checked (lib.quality), so both paths keep the same rows:
+    first / none / error need one pass, last / max_minutes a first pass over the file to
+    find each key's winning row. Counts accumulate into `quality` when given.
+
+    Cross-chunk dedup holds one int64 per distinct key in a pd.Index (the key hash for
+    first / error, the winning row number for last / max_minutes) and checks each chunk
+    against it with Index.isin, on top of the current chunk.
+    """
+    policy = (policy or DEDUP_POLICY).lower()
+    schema = None
+    seen = pd.Index([], dtype="uint64")
+    winners = None
+    if policy in ("last", "max_minutes"):
+        winners = _winners(src, chunksize, policy)
+        if winners is None:
+            policy = "none"  # validate_frame keeps every row in this case too
+    n = 0
+    for chunk, report in _checked_chunks(src, chunksize, policy):
+        if set(KEY_COLUMNS) <= set(chunk.columns) and policy != "none":
+            if winners is not None:
+                keep = pd.RangeIndex(n, n + len(chunk)).isin(winners)
+            else:
+                hashes = pd.Index(row_hashes(chunk, KEY_COLUMNS).to_numpy())  # unique within the chunk
+                keep = ~hashes.isin(seen)
+                seen = seen.append(hashes[keep])
+                if policy == "error" and not keep.all():
+                    raise ValueError(f"{int((~keep).sum())} duplicate (Player, Team, Date) rows across chunks; "
+                                     f"set FOOTBALL_DEDUP to first/last/max_minutes/none")
+            n += len(chunk)
+            chunk = chunk[keep]
+            report["rows_dropped"] += int((~keep).sum())
+        if quality is not None:
+            for k, v in report.items():
+                if isinstance(v, int) and k != "rows_out":
+                    quality[k] = quality.get(k, 0) + v
+        chunk, schema = _pin_schema(chunk, schema)
+        yield chunk
+
+# ---------- ingestion ----------
+def ingest_csv(
+    src: str,
+    out_dir: str,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    partition_by: str = "Team",
+    fmt: str = "parquet",
+    policy: Optional[str] = None,
+) -> dict:
+    out = Path(out_dir)
+    rows_dir = out / "rows"
+    if rows_dir.exists():
+        shutil.rmtree(rows_dir)  # previous run's parts would otherwise mix in
+    rows_dir.mkdir(parents=True)
+    ext = "parquet" if fmt == "parquet" else "csv"
+
+    player_acc = player_age = box_acc = None
+    n_rows = n_chunks = 0
+    partitions: set = set()
+    schema: dict = {}
+    slot: list = []
+    quality: dict = {}
+
+    for i, chunk in enumerate(iter_chunks(src, chunksize, quality, policy)):
+        n_chunks += 1
+        n_rows += len(chunk)
+        schema = {c: str(t) for c, t in chunk.dtypes.items()}
+        if partition_by not in chunk.columns:
+            raise ValueError(f"partition column '{partition_by}' not in source")
+
+        # partitioned columnar output (one file per chunk and partition value)
+        for value, part in chunk.groupby(partition_by, dropna=False, sort=False):
+            pdir = rows_dir / f"{partition_by}={safe_name(value)}"
+            pdir.mkdir(exist_ok=True)
+            _write(part, pdir / f"part-{i:05d}.{ext}", ext)
+            partitions.add(str(value))
+
+        # running aggregates
+        sums = [c for c in chunk.select_dtypes(include="number").columns if c != "Age"]
+        if "Minutes" in chunk.columns:
+            chunk = chunk.assign(Appearances=(chunk["Minutes"].fillna(0) > 0).astype("float64"))
+            sums.append("Appearances")
+        if {"Team", "Player"} <= set(chunk.columns):
+            by_player = chunk.groupby(["Team", "Player"])
+            player_acc = _add(player_acc, by_player[sums].sum())
+            if "Age" in chunk.columns:
+                player_age = _max(player_age, by_player["Age"].max())
+        slot = _slot_columns(chunk)
+        if slot and "Team" in chunk.columns:
+            box_acc = _add(box_acc, chunk.groupby(["Team"] + slot)[sums].sum())
+
+    summary = {
+        "source": str(src), "source_version": data_version(str(src)),
+        "rows": n_rows, "chunks": n_chunks, "chunksize": chunksize,
+        "partition_by": partition_by, "partitions": sorted(partitions),
+        "format": ext, "schema": schema, "quality": quality,
+    }
+
+    if player_acc is not None:
+        totals = player_acc.join(player_age) if player_age is not None else player_acc
+        _write(totals.reset_index(), out / f"player_totals.{ext}", ext)
+    if box_acc is not None:
+        # opponents can only be paired once every team of a slot has been seen
+        box = box_acc.reset_index()
+        paired = build_team_games(box).reset_index()
+        extra = [c for c in paired.columns if c not in box.columns]
+        _write(box.merge(paired[["Team"] + slot + extra], on=["Team"] + slot, how="left"),
+               out / f"team_games.{ext}", ext)
+        summary["team_game_columns"] = list(paired.columns)  # the build_team_games view of the file
+
+    (out / "manifest.json").write_text(json.dumps(summary, indent=2, ensure_ascii=False))
+    return summary
+
+_INGEST_LOCK = threading.Lock()
+
+def ingested(src: str, version: Optional[str] = None) -> Path:
+    """
+    Parquet ingest output for this version of `src`, built on first use and reused after
+    (across processes too). Older versions beyond KEEP_VERSIONS are removed.
+    """
+    version = version or data_version(src)
+    base = INGEST_CACHE / safe_name(Path(src).name)
+    out = base / safe_name(version)
+    with _INGEST_LOCK:
+        if not (out / "manifest.json").exists():
+            tmp = base / f".{out.name}.{os.getpid()}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            ingest_csv(src, str(tmp), fmt="parquet")
+            try:
+                os.replace(tmp, out)  # atomic publish of the whole directory
+            except OSError:  # another process published it first
+                shutil.rmtree(tmp, ignore_errors=True)
+            done = sorted((d for d in base.iterdir() if d.is_dir() and not d.name.startswith(".")),
+                          key=lambda d: d.stat().st_mtime, reverse=True)
+            for old in done[KEEP_VERSIONS:]:
+                if old != out:
+                    shutil.rmtree(old, ignore_errors=True)
+    return out
+
+def read_partitions(out_dir: str, values: Optional[list] = None, columns: Optional[list] = None) -> pd.DataFrame:
+    """Read back ingested rows, optionally only some partitions and columns."""
+    manifest = json.loads((Path(out_dir) / "manifest.json").read_text())
+    key, ext = manifest["partition_by"], manifest["format"]
+    wanted = manifest["partitions"] if values is None else [str(v) for v in values]
+    frames = []
+    for value in wanted:
+        for f in sorted((Path(out_dir) / "rows" / f"{key}={safe_name(value)}").glob(f"part-*.{ext}")):
+            frames.append(pd.read_parquet(f, columns=columns) if ext == "parquet" else pd.read_csv(f, usecols=columns))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Chunked CSV ingestion into partitioned columnar files.")
+    ap.add_argument("src")
+    ap.add_argument("out_dir")
+    ap.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    ap.add_argument("--partition-by", default="Team")
+    ap.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    ap.add_argument("--dedup", choices=POLICIES, default=None, help="default: FOOTBALL_DEDUP or 'first'")
+    args = ap.parse_args()
+    info = ingest_csv(args.src, args.out_dir, args.chunksize, args.partition_by, args.format, args.dedup)
+    print(f"{info['rows']} rows in {info['chunks']} chunks -> {len(info['partitions'])} partitions in {args.out_dir}")
@@ -0,0 +1,118 @@
+# lib/lineups.py
+"""
+Lineup co-occurrence and rotation, precomputed per team.
+
+For each team: minutes[P, G] (player x team game) and participation = minutes > 0.
+    together[i, j] = games both i and j played          (participation @ participation.T)
+    shared[i, j]   = sum over games of min(minutes_i, minutes_j)
+                     (an upper bound on minutes on the pitch together: no sub timings)
+Pair tables and rotation numbers are built once per data version, so queries are lookups.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lib.data import find_game_columns, load_df
+
+DEPTH_SHARE = 0.8  # rotation depth = players needed to cover this share of minutes
+
+@dataclass(frozen=True)
+class TeamLineups:
+    """
+    players  : squad, most minutes first
+    dates    : the team's game dates (columns of minutes)
+    minutes  : float array [player, game]
+    together : int array [player, player], diagonal = appearances
+    shared   : float array [player, player], diagonal = total minutes
+    pairs    : every pair (i < j) with Games Together > 0, most shared minutes first
+    rotation : squad-level rotation numbers (see rotation_stats)
+    """
+    team: str
+    players: list
+    dates: np.ndarray
+    minutes: np.ndarray
+    together: np.ndarray
+    shared: np.ndarray
+    pairs: pd.DataFrame
+    rotation: dict
+
+# ---------- build ----------
+def rotation_stats(minutes: np.ndarray) -> dict:
+    """How widely minutes are spread: depth, concentration (HHI) and game-to-game changes."""
+    totals = minutes.sum(axis=1)
+    total = totals.sum()
+    if total <= 0:
+        return {}
+    share = np.sort(totals)[::-1] / total
+    played = minutes > 0
+    changes = (played[:, 1:] & ~played[:, :-1]).sum(axis=0) if played.shape[1] > 1 else np.zeros(0)
+    hhi = float((share ** 2).sum())
+    return {
+        "Games": int(minutes.shape[1]),
+        "Players Used": int((totals > 0).sum()),
+        "Rotation Depth": int(np.searchsorted(np.cumsum(share), DEPTH_SHARE) + 1),
+        "Top-11 Minutes %": round(float(share[:11].sum() * 100), 1),
+        "Minutes HHI": round(hhi, 4),
+        "Effective Players": round(1 / hhi, 1),
+        "New Faces / Game": round(float(changes.mean()), 2) if changes.size else 0.0,
+    }
+
+def _pairs(players: list, together: np.ndarray, shared: np.ndarray) -> pd.DataFrame:
+    i, j = np.triu_indices(len(players), k=1)
+    keep = together[i, j] > 0
+    i, j = i[keep], j[keep]
+    names = np.asarray(players, dtype=object)
+    pairs = pd.DataFrame({
+        "Player A": names[i], "Player B": names[j],
+        "Games Together": together[i, j], "Shared Minutes": shared[i, j],
+        "Shared % of A": np.round(shared[i, j] / shared[i, i] * 100, 1),
+        "Shared % of B": np.round(shared[i, j] / shared[j, j] * 100, 1),
+    })
+    return pairs.sort_values(["Shared Minutes", "Games Together"], ascending=False, ignore_index=True)
+
+def team_lineups(team: str, team_df: pd.DataFrame, date_col: str) -> TeamLineups:
+    grid = team_df.pivot_table(index="Player", columns=date_col, values="Minutes", aggfunc="sum", fill_value=0)
+    grid = grid.loc[grid.sum(axis=1).sort_values(ascending=False, kind="stable").index]
+    minutes = grid.to_numpy(dtype=float)
+    played = (minutes > 0).astype(np.int32)
+    together = played @ played.T
+    shared = np.minimum(minutes[:, None, :], minutes[None, :, :]).sum(axis=2)
+    players = grid.index.tolist()
+    return TeamLineups(team, players, grid.columns.to_numpy(), minutes, together, shared,
+                       _pairs(players, together, shared), rotation_stats(minutes))
+
+def build_lineups(df: pd.DataFrame) -> dict[str, TeamLineups]:
+    date_col = find_game_columns(df)["date"]
+    if date_col is None or "Minutes" not in df.columns:
+        return {}
+    return {team: team_lineups(team, tdf, date_col) for team, tdf in df.groupby("Team", sort=True)}
+
+@st.cache_data
+def load_lineups(path: str, version: str|None = None) -> dict[str, TeamLineups]:
+    return build_lineups(load_df(path, version))
+
+# ---------- queries ----------
+def top_pairs(lineups: TeamLineups, n: int = 10) -> pd.DataFrame:
+    return lineups.pairs.head(n)
+
+def partners(lineups: TeamLineups, player: str, n: int = 5) -> pd.DataFrame:
+    """`player`'s most frequent team-mates by shared minutes."""
+    if player not in lineups.players:
+        return pd.DataFrame()
+    i = lineups.players.index(player)
+    order = [j for j in np.argsort(-lineups.shared[i], kind="stable") if j != i and lineups.together[i, j] > 0][:n]
+    return pd.DataFrame({
+        "Player": [lineups.players[j] for j in order],
+        "Games Together": lineups.together[i, order],
+        "Shared Minutes": lineups.shared[i, order],
+        "Shared % of Minutes": np.round(lineups.shared[i, order] / max(lineups.shared[i, i], 1) * 100, 1),
+    })
+
+def rotation_table(all_lineups: dict[str, TeamLineups]) -> pd.DataFrame:
+    """One row of rotation numbers per team, most rotated (effective players) first."""
+    rows = [{"Team": t, **lu.rotation} for t, lu in all_lineups.items() if lu.rotation]
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).sort_values("Effective Players", ascending=False, ignore_index=True)
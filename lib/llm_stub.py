@@ -0,0 +1,95 @@
+# lib/llm_stub.py
+"""
+Local stand-in for the OpenAI client, for load tests and offline development.
+
+    FOOTBALL_LLM=stub streamlit run streamlit_app.py
+    FOOTBALL_LLM_LATENCY=0.3          # seconds per completion, or a range "0.1-0.6"
+    FOOTBALL_LLM_TOKEN_LATENCY=0.05   # extra seconds per 1k prompt tokens (~4 chars each)
+
+Only the surface the chat page uses is implemented: client.chat.completions.create()
+returning .choices[0].message.content. Router calls (response_format json_object) get
+canned intent JSON picked from keywords in the question; answer calls get a short
+summary of the JSON result they were given.
+"""
+import json
+import os
+import random
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+def _latency(spec: str) -> tuple[float, float]:
+    lo, _, hi = spec.partition("-")
+    return float(lo or 0), float(hi or lo or 0)
+
+# keyword -> (action, params); {team}/{player} are filled from the question when found
+ROUTES: List[tuple] = [
+    (r"\bproject|finish|end of (the )?season", ("season_projection", {"team": "{team}", "player": "{player}"})),
+    (r"\bcompare\b|\bvs\.?\b|\bversus\b", ("compare_players", {"team_a": "{team}", "player_a": "{player}",
+                                                               "team_b": "{team}", "player_b": "{player}"})),
+    (r"\btogether\b|\bpairings?\b|\bpartners?\b", ("common_pairings", {"team": "{team}"})),
+    (r"\brotat", ("team_rotation", {"team": "{team}"})),
+    (r"\bhead[- ]to[- ]head\b", ("head_to_head", {"team_a": "{team}", "team_b": "Barcelona"})),
+    (r"\bfixtures?\b|\bresults?\b", ("team_fixtures", {"team": "{team}"})),
+    (r"\bage\b|\boldest\b|\byoungest\b", ("team_average_age", {"team": "{team}"})),
+    (r"\bplayers\b.*\bin\b|\bsquad\b", ("list_players", {"team": "{team}"})),
+    (r"\btop\b|\bbest\b|\bmost\b|\bleaders?\b", ("top_players", {"metric": "Goals", "top_n": 5})),
+    (r"\bteams\b", ("list_teams", {})),
+]
+
+class StubOpenAI:
+    """Drop-in for openai.OpenAI(...) as used by pages/04_Chat.py."""
+
+    def __init__(self, teams: List[str]|None = None, players: Dict[str, List[str]]|None = None,
+                 latency: str|None = None, **_):
+        self.latency = _latency(latency or os.getenv("FOOTBALL_LLM_LATENCY", "0.2"))
+        self.token_latency = float(os.getenv("FOOTBALL_LLM_TOKEN_LATENCY", "0"))
+        self.prompt_tokens = 0
+        self.teams = teams
+        self.players = players or {}
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    # ---------- helpers ----------
+    def _teams(self) -> List[str]:
+        if self.teams is None:
+            from lib import agent_tools
+            self.teams = agent_tools.act_list_teams()
+        return self.teams
+
+    def _players(self, team: str) -> List[str]:
+        if team not in self.players:
+            from lib import agent_tools
+            self.players[team] = agent_tools.act_list_players(team)
+        return self.players[team]
+
+    def _route(self, text: str) -> Dict[str, Any]:
+        teams = self._teams()
+        lowered = text.lower()
+        team = next((t for t in teams if t.lower() in lowered), teams[0] if teams else "")
+        roster = self._players(team) if team else []
+        player = next((p for p in roster if p.lower() in lowered), roster[0] if roster else "")
+        for pattern, (action, params) in ROUTES:
+            if re.search(pattern, lowered):
+                filled = {k: (v.format(team=team, player=player) if isinstance(v, str) else v) for k, v in params.items()}
+                return {"action": action, "params": filled}
+        return {"action": "player_summary", "params": {"team": team, "player": player}}
+
+    # ---------- API surface ----------
+    def _create(self, model: str = "", messages: List[dict]|None = None, response_format: dict|None = None, **_):
+        self.calls += 1
+        messages = messages or []
+        tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        self.prompt_tokens += tokens
+        lo, hi = self.latency
+        time.sleep((random.uniform(lo, hi) if hi > lo else lo) + self.token_latency * tokens / 1000)
+        user = [m.get("content", "") for m in messages if m.get("role") == "user"]
+        if response_format and response_format.get("type") == "json_object":
+            content = json.dumps(self._route(user[-1] if user else ""))
+        elif len(user) > 1:
+            content = f"(stub) {user[0]} → {user[-1][:300]}"
+        else:
+            content = "pong"
+        message = SimpleNamespace(role="assistant", content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")], model=model or "stub")
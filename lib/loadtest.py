@@ -0,0 +1,179 @@
+# lib/loadtest.py
+"""
+Headless load test: N concurrent simulated users clicking through the pages.
+
+    python -m lib.loadtest --sessions 8 --steps 20
+    python -m lib.loadtest --sessions 4 --pages chat --llm-latency 0.5-1.5
+
+Each session is a thread driving its own streamlit AppTest (a full script run per
+interaction, like a browser rerun): it picks random teams, players, games and chat
+questions. The chat page runs against lib.llm_stub (FOOTBALL_LLM=stub), so no API key
+or network is needed; --llm-latency sets its simulated completion time.
+
+Reports throughput, p50/p95/p99 latency per page and overall, and resident memory per
+live session: process RSS with every session's AppTest still alive, minus the
+warmed-up baseline, divided by the number of sessions.
+"""
+import argparse
+import concurrent.futures as cf
+import json
+import logging
+import os
+import random
+import resource
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+PAGES = {
+    "home": "app.py",
+    "teams": "pages/01_Teams.py",
+    "player": "pages/02_Player.py",
+    "compare": "pages/03_Compare.py",
+    "chat": "pages/04_Chat.py",
+}
+QUESTIONS = [
+    "Who are the top scorers?", "Show {team} fixtures", "Compare players at {team}",
+    "How old is the {team} squad?", "Where will {team} finish in goals this season?",
+    "Which players are in {team}?", "Head to head {team} vs Barcelona",
+]
+
+# ---------- memory ----------
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc), else peak RSS from getrusage."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# ---------- user behaviour ----------
+def _options(at, key: str) -> list:
+    return list(at.selectbox(key=key).options)
+
+def _pick(at, key: str, rng: random.Random) -> None:
+    at.selectbox(key=key).set_value(rng.choice(_options(at, key)))
+
+def _teams_step(at, rng: random.Random) -> None:
+    roll = rng.random()
+    if roll < 0.4:
+        _pick(at, "teams_team", rng)
+    elif roll < 0.7 and at.radio:
+        at.radio[0].set_value(rng.choice(list(at.radio[0].options)))
+    else:
+        game = [s for s in at.selectbox if str(s.key).endswith("_game_pick")]
+        if game:
+            game[0].set_value(rng.choice(list(game[0].options)))
+        else:
+            _pick(at, "teams_team", rng)
+
+def _player_step(at, rng: random.Random) -> None:
+    _pick(at, "player_team" if rng.random() < 0.3 else "player_name", rng)
+
+def _compare_step(at, rng: random.Random) -> None:
+    _pick(at, rng.choice(["cmp_team_a", "cmp_player_a", "cmp_team_b", "cmp_player_b"]), rng)
+
+def _home_step(at, rng: random.Random) -> None:
+    _pick(at, rng.choice(["home_team", "home_player"]), rng)
+
+def _chat_step(at, rng: random.Random, teams: List[str]) -> None:
+    at.chat_input[0].set_value(rng.choice(QUESTIONS).format(team=rng.choice(teams)))
+
+# ---------- runner ----------
+def _session(page: str, steps: int, seed: int, teams: List[str], timeout: float, keep: list) -> List[tuple]:
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    step: Dict[str, Callable] = {
+        "home": _home_step, "teams": _teams_step, "player": _player_step, "compare": _compare_step,
+        "chat": lambda at, r: _chat_step(at, r, teams),
+    }
+    at = AppTest.from_file(str(ROOT / PAGES[page]), default_timeout=timeout)
+    samples = []
+    for i in range(steps + 1):
+        if i:
+            step[page](at, rng)
+        t0 = time.perf_counter()
+        at.run()
+        samples.append((page, time.perf_counter() - t0, bool(at.exception)))
+    keep.append(at)  # stays alive until memory is sampled
+    return samples
+
+def _stats(latencies: List[float]) -> dict:
+    arr = np.asarray(latencies) * 1000
+    return {
+        "n": int(arr.size),
+        "p50_ms": round(float(np.percentile(arr, 50)), 1),
+        "p95_ms": round(float(np.percentile(arr, 95)), 1),
+        "p99_ms": round(float(np.percentile(arr, 99)), 1),
+        "max_ms": round(float(arr.max()), 1),
+    }
+
+def run_load(sessions: int = 8, steps: int = 20, pages: List[str]|None = None, seed: int = 0,
+             timeout: float = 120.0, llm_latency: str = "0.2") -> dict:
+    os.environ["FOOTBALL_LLM"] = "stub"
+    os.environ["FOOTBALL_LLM_LATENCY"] = llm_latency
+    os.chdir(ROOT)  # pages read database.csv relative to the working directory
+    logging.getLogger("streamlit").setLevel(logging.ERROR)  # bare-mode / deprecation noise per run
+    pages = pages or ["teams", "player", "compare", "chat"]
+
+    from lib import agent_tools, warmup
+    warmup.start()
+    warmup.wait()
+    teams = agent_tools.act_list_teams()
+    warm: list = []
+    for page in pages:  # one cold pass per page so the measurement is steady state
+        _session(page, 0, seed, teams, timeout, warm)
+    baseline = rss_mb()
+
+    keep: list = []
+    t0 = time.perf_counter()
+    with cf.ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="session") as pool:
+        futures = [pool.submit(_session, pages[i % len(pages)], steps, seed + i + 1, teams, timeout, keep)
+                   for i in range(sessions)]
+        samples = [s for f in futures for s in f.result()]
+    wall = time.perf_counter() - t0
+    loaded = rss_mb()
+
+    per_page = {p: _stats([s[1] for s in samples if s[0] == p]) for p in pages if any(s[0] == p for s in samples)}
+    return {
+        "sessions": sessions, "steps_per_session": steps, "pages": pages,
+        "threads_alive": threading.active_count(),
+        "requests": len(samples),
+        "errors": sum(s[2] for s in samples),
+        "wall_s": round(wall, 2),
+        "throughput_rps": round(len(samples) / wall, 2),
+        "latency": _stats([s[1] for s in samples]),
+        "per_page": per_page,
+        "rss_baseline_mb": round(baseline, 1),
+        "rss_loaded_mb": round(loaded, 1),
+        "mb_per_session": round((loaded - baseline) / max(sessions, 1), 2),
+    }
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Concurrent headless sessions against the Streamlit pages.")
+    ap.add_argument("--sessions", type=int, default=8)
+    ap.add_argument("--steps", type=int, default=20, help="interactions per session after the first load")
+    ap.add_argument("--pages", default="teams,player,compare,chat", help=f"comma list of {list(PAGES)}")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--timeout", type=float, default=120.0, help="per script run")
+    ap.add_argument("--llm-latency", default="0.2", help="stub completion latency: seconds or 'lo-hi'")
+    ap.add_argument("--json", action="store_true", help="print the raw report")
+    args = ap.parse_args()
+    report = run_load(args.sessions, args.steps, [p.strip() for p in args.pages.split(",") if p.strip()],
+                      args.seed, args.timeout, args.llm_latency)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        lat = report["latency"]
+        print(f"{report['requests']} runs / {report['wall_s']}s = {report['throughput_rps']} runs/s, "
+              f"{report['errors']} errors")
+        print(f"latency p50 {lat['p50_ms']} ms  p95 {lat['p95_ms']} ms  p99 {lat['p99_ms']} ms")
+        for page, s in report["per_page"].items():
+            print(f"  {page:<8} n={s['n']:<4} p50 {s['p50_ms']:>8} ms  p95 {s['p95_ms']:>8} ms  p99 {s['p99_ms']:>8} ms")
+        print(f"memory: {report['rss_baseline_mb']} MB warm -> {report['rss_loaded_mb']} MB loaded, "
+              f"~{report['mb_per_session']} MB per session")
@@ -0,0 +1,129 @@
+# lib/metrics.py
+"""
+Derived-metric registry: per-90, per-appearance and efficiency columns.
+
+Derived metrics are ratios/differences of *summed* base columns, so they are computed
+after aggregation (never summed themselves): derive() adds them to any totals frame
+(cube query, squad aggregate, player season table) that carries the inputs.
+load_player_metrics() materializes the player season table once per data version.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lib.data import load_df
+
+# ---------- column aliases ----------
+ALIASES = {
+    "xG": "Expected Goals (xG)",
+    "xA": "Expected Assists (xAG)",
+    "xAG": "Expected Assists (xAG)",
+    "npxG": "Non-Penalty xG (npxG)",
+    "SCA": "Shot-Creating Actions",
+    "GCA": "Goal-Creating Actions",
+    "Shots": "Total Shoot",
+    "Shots on Target": "Shoot on Target",
+    "PK Goals": "Penalty Shoot on Goal",
+}
+
+def resolve(name: str) -> str:
+    """Alias or case-insensitive name -> canonical column / metric name (unchanged if unknown)."""
+    if name in ALIASES:
+        return ALIASES[name]
+    lowered = name.strip().lower()
+    for key in list(ALIASES) + list(METRICS):
+        if key.lower() == lowered:
+            return ALIASES.get(key, key)
+    return name
+
+# ---------- registry ----------
+@dataclass(frozen=True)
+class Metric:
+    """
+    value = (sum(plus) - sum(minus)) / den * scale     (den None -> no division)
+    Columns are canonical names; a zero denominator gives NaN.
+    """
+    name: str
+    plus: tuple
+    minus: tuple = ()
+    den: str|None = None
+    scale: float = 1.0
+    doc: str = ""
+
+    @property
+    def inputs(self) -> tuple:
+        return self.plus + self.minus + ((self.den,) if self.den else ())
+
+PER_90 = ["Goals", "Assists", "xG", "xAG", "npxG", "Shots", "SCA", "GCA", "Tackles",
+          "Progressive Passes", "Progressive Carries", "Successful Dribbles"]
+PER_APP = ["Minutes", "Goals", "Assists", "Tackles", "Passes Completed"]
+
+_DEFS = (
+    [Metric(f"{n}/90", (ALIASES.get(n, n),), den="Minutes", scale=90, doc=f"{n} per 90 minutes") for n in PER_90]
+    + [Metric(f"{n}/app", (ALIASES.get(n, n),), den="Appearances", doc=f"{n} per appearance") for n in PER_APP]
+    + [
+        Metric("Conversion %", ("Goals",), den="Total Shoot", scale=100, doc="goals per shot"),
+        Metric("Shot Accuracy %", ("Shoot on Target",), den="Total Shoot", scale=100, doc="shots on target per shot"),
+        Metric("Pass Completion %", ("Passes Completed",), den="Passes Attempted", scale=100, doc="completed / attempted passes"),
+        Metric("Dribble Success %", ("Successful Dribbles",), den="Dribble Attempts", scale=100, doc="successful / attempted dribbles"),
+        Metric("xG +/-", ("Goals",), ("Expected Goals (xG)",), doc="goals minus xG (finishing over/under)"),
+        Metric("npxG +/-", ("Goals",), ("Penalty Shoot on Goal", "Non-Penalty xG (npxG)"), doc="non-penalty goals minus npxG"),
+        Metric("xAG +/-", ("Assists",), ("Expected Assists (xAG)",), doc="assists minus xAG"),
+    ]
+)
+METRICS = {m.name: m for m in _DEFS}
+
+# shown in player summaries; leaderboards on derived metrics need a minutes floor
+SUMMARY_DERIVED = ["Minutes/app", "Goals/90", "Assists/90", "xG/90", "xAG/90", "Tackles/app",
+                   "Conversion %", "Pass Completion %", "xG +/-"]
+LEADERBOARD_MIN_MINUTES = 450
+
+def available(columns) -> list[str]:
+    """Derived metrics whose inputs are all in `columns`."""
+    cols = set(columns)
+    return [name for name, m in METRICS.items() if set(m.inputs) <= cols]
+
+def inputs_for(names) -> list[str]:
+    """Base columns needed to derive `names` (non-derived names pass through)."""
+    out: list[str] = []
+    for n in names:
+        out += list(METRICS[n].inputs) if n in METRICS else [n]
+    return list(dict.fromkeys(out))
+
+def derive(totals: pd.DataFrame, names: list[str]|None = None) -> pd.DataFrame:
+    """Copy of `totals` with derived columns added (all derivable ones by default)."""
+    names = available(totals.columns) if names is None else [n for n in names if n in available(totals.columns)]
+    out = {}
+    for n in names:
+        m = METRICS[n]
+        value = totals[list(m.plus)].sum(axis=1).to_numpy(dtype=float)
+        if m.minus:
+            value = value - totals[list(m.minus)].sum(axis=1).to_numpy(dtype=float)
+        if m.den:
+            den = totals[m.den].to_numpy(dtype=float)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                value = np.where(den > 0, value / den, np.nan)
+        out[n] = np.round(value * m.scale, 3)
+    return totals.assign(**out)
+
+# ---------- materialized player season table ----------
+SKIP_SUMS = {"#", "Age"}
+
+def player_season_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """(Team, Player) season sums + Appearances + every derivable metric."""
+    sums = [c for c in df.select_dtypes(include="number").columns if c not in SKIP_SUMS]
+    rows = df.assign(Appearances=(df["Minutes"] > 0).astype("int64")) if "Minutes" in df.columns else df
+    if "Appearances" in rows.columns:
+        sums.append("Appearances")
+    return derive(rows.groupby(["Team", "Player"])[sums].sum())
+
+@st.cache_data
+def load_player_metrics(path: str, version: str|None = None) -> pd.DataFrame:
+    return player_season_totals(load_df(path, version))
+
+@st.cache_data
+def player_metric_row(path: str, version: str|None, team: str, player: str) -> pd.Series:
+    table = load_player_metrics(path, version)
+    return table.loc[(team, player)] if (team, player) in table.index else pd.Series(dtype=float)
@@ -0,0 +1,133 @@
+# lib/projection.py
+"""
+Season projections by Monte Carlo simulation of the remaining matchdays.
+
+Players: for each remaining team game, minutes are bootstrapped from the player's
+minutes in the team's games so far (0 for games the player sat out). A per-minute scoring
+rate is drawn from a Gamma posterior (league rate as a weak prior worth
+PRIOR_MINUTES), and remaining goals/assists are Poisson(rate x minutes).
+Teams: per-game Goals For / xG For are bootstrapped from the team's games so far
+(against-columns are left out: most games cannot be paired with an opponent).
+
+Players are simulated in batches of BATCH_PLAYERS with NumPy arrays, one matchday step
+at a time; each metric's draws are reduced to percentile bands before the next batch, so
+working memory stays at a few draws x batch float64 buffers (~5 MB each at the defaults)
+whatever the number of players.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lib.data import build_team_games, find_game_columns, load_df
+
+SEASON_GAMES = 38
+DRAWS = 20_000
+PERCENTILES = (10, 50, 90)
+COUNT_METRICS = ["Goals", "Assists"]
+PRIOR_MINUTES = 270.0
+BATCH_PLAYERS = 32
+
+# ---------- inputs ----------
+def minutes_matrix(df: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    (players, minutes[P, G], games[P]): per-player minutes in each of the team's games
+    so far, zero-padded to the longest schedule; games[p] = team games played.
+    """
+    date_col = find_game_columns(df)["date"]
+    slots = df[["Team", date_col]].drop_duplicates().sort_values(["Team", date_col])
+    slots["slot"] = slots.groupby("Team").cumcount()
+    games_per_team = slots.groupby("Team")["slot"].max() + 1
+
+    rows = df.merge(slots, on=["Team", date_col], how="left")
+    players = rows.groupby(["Team", "Player"], sort=True).size().index.to_frame(index=False)
+    pid = pd.MultiIndex.from_frame(players).get_indexer(pd.MultiIndex.from_frame(rows[["Team", "Player"]]))
+
+    minutes = np.zeros((len(players), int(games_per_team.max())))
+    np.add.at(minutes, (pid, rows["slot"].to_numpy()), rows["Minutes"].to_numpy(dtype=float))
+    return players, minutes, games_per_team.reindex(players["Team"]).to_numpy()
+
+def _bands(draws: np.ndarray, prefix: str, percentiles) -> dict:
+    """Percentile bands + mean over the draws axis (axis 0)."""
+    q = np.percentile(draws, percentiles, axis=0)
+    out = {f"{prefix} p{p}": q[i] for i, p in enumerate(percentiles)}
+    out[f"{prefix} mean"] = draws.mean(axis=0)
+    return out
+
+# ---------- simulation ----------
+def project_players(df: pd.DataFrame, season_games: int = SEASON_GAMES, draws: int = DRAWS,
+                    percentiles=PERCENTILES, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    players, minutes, played = minutes_matrix(df)
+    remaining = np.clip(season_games - played, 0, None).astype(int)
+    totals = df.groupby(["Team", "Player"], sort=True)[["Minutes"] + COUNT_METRICS].sum()
+    totals = totals.reindex(pd.MultiIndex.from_frame(players))
+
+    minutes_total = totals["Minutes"].to_numpy(dtype=float)
+    priors = {}
+    for metric in COUNT_METRICS:
+        current = totals[metric].to_numpy(dtype=float)
+        league_rate = current.sum() / max(minutes_total.sum(), 1.0)
+        priors[metric] = (current, current + league_rate * PRIOR_MINUTES, 1.0 / (minutes_total + PRIOR_MINUTES))
+
+    # one player batch at a time: [draws, batch] buffers, only the bands are kept
+    bands: dict = {}
+    minutes_mean = np.empty(len(players))
+    flat = minutes.ravel()
+    for lo in range(0, len(players), BATCH_PLAYERS):
+        hi = min(lo + BATCH_PLAYERS, len(players))
+        offsets = np.arange(lo, hi) * minutes.shape[1]
+        sim_minutes = np.zeros((draws, hi - lo))
+        u = np.empty((draws, hi - lo))
+        idx = np.empty((draws, hi - lo), dtype=np.intp)
+        for game in range(int(remaining[lo:hi].max(initial=0))):  # bootstrap one matchday per step
+            rng.random(out=u)
+            np.multiply(u, played[lo:hi], out=u)
+            idx[...] = u  # floor -> uniform game index in [0, played)
+            idx += offsets
+            sim_minutes += np.take(flat, idx) * (game < remaining[lo:hi])
+        minutes_mean[lo:hi] = sim_minutes.mean(axis=0)
+
+        for metric, (current, shape, scale) in priors.items():
+            rate = rng.gamma(shape[lo:hi], scale[lo:hi], size=(draws, hi - lo))
+            np.multiply(rate, sim_minutes, out=rate)
+            final = current[None, lo:hi] + rng.poisson(rate)
+            for key, value in _bands(final, f"{metric} proj", percentiles).items():
+                bands.setdefault(key, np.empty(len(players)))[lo:hi] = value
+
+    out = players.copy()
+    out["Games Played"] = played
+    out["Games Left"] = remaining
+    out["Minutes"] = minutes_total
+    for metric, (current, _, _) in priors.items():
+        out[metric] = current
+        for key in [k for k in bands if k.startswith(f"{metric} proj")]:
+            out[key] = bands[key]
+    out["Minutes proj mean"] = out["Minutes"] + minutes_mean
+    return out
+
+def project_teams(team_games: pd.DataFrame, season_games: int = SEASON_GAMES, draws: int = DRAWS,
+                  percentiles=PERCENTILES, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for team, games in team_games.groupby(level=0, sort=True):
+        played = len(games)
+        left = max(season_games - played, 0)
+        row = {"Team": team, "Games Played": played, "Games Left": left}
+        pick = rng.integers(0, played, size=(draws, left))
+        for col in ["Goals For", "xG For"]:
+            values = np.nan_to_num(games[col].to_numpy(dtype=float))
+            current = float(values.sum())
+            row[col] = current
+            row[f"{col} per game"] = current / played if played else np.nan
+            row.update({k: float(v) for k, v in _bands(current + values[pick].sum(axis=1), f"{col} proj", percentiles).items()})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+@st.cache_data
+def load_projections(path: str, version: str|None = None, draws: int = DRAWS, seed: int = 0) -> dict:
+    """{'players': frame, 'teams': frame}, simulated once per data version."""
+    df = load_df(path, version)
+    return {
+        "players": project_players(df, draws=draws, seed=seed),
+        "teams": project_teams(build_team_games(df), draws=draws, seed=seed),
+    }
@@ -0,0 +1,119 @@
+# lib/quality.py
+"""
+Load-time data quality pass.
+
+validate_frame() runs once per data version inside the loader, so everything
+downstream (aggregates, cubes, actions) can trust its input:
+  - one row per (Player, Team, Date) after the dedup policy is applied
+  - Minutes numeric with no NaN (missing -> 0), Age numeric (NaN allowed)
+and returns a report of what it found and changed.
+
+Duplicate checks hash the key columns (pd.util.hash_pandas_object) instead of
+comparing strings, so they stay vectorized on large frames.
+
+Dedup policy (FOOTBALL_DEDUP):
+    first        keep the first row of each duplicate group (default)
+    last         keep the last row
+    max_minutes  keep the row with the most minutes
+    none         keep everything, only report
+    error        raise ValueError if any duplicate key is found
+"""
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ["Player", "Team", "Date"]
+POLICIES = ("first", "last", "max_minutes", "none", "error")
+DEDUP_POLICY = os.getenv("FOOTBALL_DEDUP", "first").lower()
+AGE_SPREAD_MAX = 1  # a birthday inside the season moves age by one
+SAMPLE_ROWS = 10
+
+# ---------- hashing ----------
+def row_hashes(df: pd.DataFrame, columns: Optional[list[str]] = None) -> pd.Series:
+    """uint64 hash per row over `columns` (all columns by default)."""
+    frame = df if columns is None else df[columns]
+    return pd.util.hash_pandas_object(frame, index=False)
+
+def _sample(df: pd.DataFrame, mask, columns: list[str]) -> list[dict]:
+    cols = [c for c in columns if c in df.columns]
+    return df.loc[mask, cols].head(SAMPLE_ROWS).astype(object).where(lambda x: x.notna(), None).to_dict("records")
+
+# ---------- checks ----------
+def _group_conflicts(df: pd.DataFrame, key_hash: pd.Series, dup_mask: pd.Series, column: str) -> pd.Series:
+    """Rows in a duplicate-key group whose `column` values disagree."""
+    if column not in df.columns or not dup_mask.any():
+        return pd.Series(False, index=df.index)
+    sub = df.loc[dup_mask, column]
+    n = sub.groupby(key_hash[dup_mask]).transform("nunique")
+    return (n > 1).reindex(df.index, fill_value=False)
+
+def _age_conflicts(df: pd.DataFrame) -> pd.DataFrame:
+    """(Team, Player) whose age moves by more than AGE_SPREAD_MAX across the rows."""
+    if not {"Team", "Player", "Age"} <= set(df.columns):
+        return pd.DataFrame(columns=["Team", "Player", "min_age", "max_age"])
+    ages = df.groupby(["Team", "Player"])["Age"].agg(min_age="min", max_age="max")
+    return ages[(ages["max_age"] - ages["min_age"]) > AGE_SPREAD_MAX].reset_index()
+
+def _dedup(df: pd.DataFrame, key_hash: pd.Series, policy: str) -> pd.Series:
+    """Boolean mask of rows to keep under `policy`."""
+    if policy == "first":
+        return ~key_hash.duplicated(keep="first")
+    if policy == "last":
+        return ~key_hash.duplicated(keep="last")
+    if policy == "max_minutes" and "Minutes" in df.columns:
+        order = df["Minutes"].to_numpy().argsort(kind="mergesort")[::-1]  # most minutes first, stable
+        keep = np.zeros(len(df), dtype=bool)
+        first = ~key_hash.iloc[order].duplicated(keep="first").to_numpy()
+        keep[order[first]] = True
+        return pd.Series(keep, index=df.index)
+    return pd.Series(True, index=df.index)
+
+# ---------- entry point ----------
+def validate_frame(df: pd.DataFrame, policy: Optional[str] = None) -> tuple[pd.DataFrame, dict]:
+    """Check, clean and dedup a normalized frame; returns (frame, report)."""
+    policy = (policy or DEDUP_POLICY).lower()
+    if policy not in POLICIES:
+        raise ValueError(f"unknown dedup policy '{policy}' (expected one of {list(POLICIES)})")
+
+    report: dict = {"policy": policy, "rows_in": int(len(df))}
+    df = df.reset_index(drop=True)
+
+    # numeric guarantees downstream code relies on
+    if "Minutes" in df.columns:
+        minutes = pd.to_numeric(df["Minutes"], errors="coerce")
+        report["minutes_missing"] = int(minutes.isna().sum())
+        df["Minutes"] = minutes.fillna(0)
+    if "Age" in df.columns:
+        df["Age"] = pd.to_numeric(df["Age"], errors="coerce")
+        report["age_missing"] = int(df["Age"].isna().sum())
+
+    keys = [c for c in KEY_COLUMNS if c in df.columns]
+    if len(keys) == len(KEY_COLUMNS):
+        key_hash = row_hashes(df, keys)
+        dup_mask = key_hash.duplicated(keep=False)
+        exact = row_hashes(df).duplicated(keep="first")
+        pos_conflict = _group_conflicts(df, key_hash, dup_mask, "Position")
+        age_conflict = _group_conflicts(df, key_hash, dup_mask, "Age")
+        report.update({
+            "duplicate_keys": int(key_hash[dup_mask].nunique()),
+            "duplicate_rows": int(dup_mask.sum() - key_hash[dup_mask].nunique()),
+            "exact_duplicates": int(exact.sum()),
+            "position_conflicts": int(pos_conflict.sum()),
+            "age_conflicts_in_duplicates": int(age_conflict.sum()),
+            "duplicate_sample": _sample(df, dup_mask, keys + ["Position", "Age", "Minutes"]),
+        })
+        if policy == "error" and dup_mask.any():
+            raise ValueError(f"{report['duplicate_rows']} duplicate (Player, Team, Date) rows; "
+                             f"set FOOTBALL_DEDUP to first/last/max_minutes/none")
+        df = df[_dedup(df, key_hash, policy)].reset_index(drop=True)
+    else:
+        report["skipped"] = f"missing key columns {[c for c in KEY_COLUMNS if c not in df.columns]}"
+
+    age_spread = _age_conflicts(df)
+    report["player_age_conflicts"] = int(len(age_spread))
+    report["player_age_sample"] = age_spread.head(SAMPLE_ROWS).to_dict("records")
+    report["rows_out"] = int(len(df))
+    report["rows_dropped"] = report["rows_in"] - report["rows_out"]
+    return df, report
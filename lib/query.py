@@ -0,0 +1,161 @@
+# lib/query.py
+"""
+Small JSON query language over the aggregate cube, for the chat `query` action.
+
+{
+  "select":   ["Goals", "Assists", "xG/90"],  # cube columns (summed) or derived metrics
+  "group_by": ["Team", "Player"],              # Team / Player / Position / Date
+  "filters":  {"Team": "Barcelona", "Position": ["FW", "LW"]},
+  "having":   [{"metric": "Minutes", "op": ">=", "value": 450}],
+  "date_from": "2024-09-01", "date_to": "2024-10-31",
+  "order_by": "Goals", "ascending": false,
+  "limit": 10
+}
+"""
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+from lib.cube import Cube, cube_measures, query_cube, query_size
+from lib.metrics import resolve
+
+MAX_ROWS = 50
+MAX_CELLS = 2_000_000  # cube cells x matchdays a query may touch; bounds its time and memory
+GROUP_DIMS = ["Team", "Player", "Position", "Date"]
+OPS = {
+    "=": lambda s, v: s == v, "==": lambda s, v: s == v, "!=": lambda s, v: s != v,
+    ">": lambda s, v: s > v, ">=": lambda s, v: s >= v,
+    "<": lambda s, v: s < v, "<=": lambda s, v: s <= v,
+}
+def _as_list(v) -> list:
+    if v is None:
+        return []
+    return list(v) if isinstance(v, (list, tuple)) else [v]
+
+def _as_bool(v) -> bool:
+    """JSON booleans, plus the 'true'/'false' strings LLMs sometimes emit instead."""
+    if isinstance(v, bool):
+        return v
+    if isinstance(v, str) and v.strip().lower() in ("true", "false"):
+        return v.strip().lower() == "true"
+    raise ValueError(v)
+
+def _as_date(v) -> str|None:
+    """ISO 8601 date (2024-09-01, 2024-9-1, 20240901, ...) -> 'YYYY-MM-DD', the cube's date format."""
+    if v is None or v == "":
+        return None
+    if not isinstance(v, str):
+        raise ValueError(v)
+    return pd.to_datetime(v, format="ISO8601").strftime("%Y-%m-%d")
+
+def validate_spec(spec: Dict[str, Any], cube: Cube) -> Tuple[Dict[str, Any], List[str]]:
+    """Normalize a raw spec; returns (clean spec, list of problems)."""
+    errors: List[str] = []
+    if not isinstance(spec, dict):
+        return {}, ["query spec must be a JSON object"]
+    known = {"select", "group_by", "filters", "having", "date_from", "date_to", "order_by", "ascending", "limit"}
+    extra = sorted(set(spec) - known)
+    if extra:
+        errors.append(f"unknown keys: {extra}")
+
+    measures = cube_measures(cube)
+    select = [resolve(str(m)) for m in _as_list(spec.get("select"))] or ["Goals"]
+    bad = [m for m in select if m not in measures]
+    if bad:
+        errors.append(f"unknown metrics: {bad}")
+
+    group_by = [str(d) for d in _as_list(spec.get("group_by"))]
+    bad = [d for d in group_by if d not in GROUP_DIMS]
+    if bad:
+        errors.append(f"group_by must be within {GROUP_DIMS}, got {bad}")
+
+    filters = spec.get("filters") or {}
+    if not isinstance(filters, dict):
+        errors.append("filters must be an object {dimension: value or [values]}")
+        filters = {}
+    bad = [d for d in filters if d not in cube.groups.columns]
+    if bad:
+        errors.append(f"filters only support {list(cube.groups.columns)}, got {bad}")
+
+    having = []
+    for h in _as_list(spec.get("having")):
+        if isinstance(h, dict) and h.get("metric") is not None:
+            h = {**h, "metric": resolve(str(h["metric"]))}
+        if not isinstance(h, dict) or h.get("op") not in OPS or h.get("metric") not in measures:
+            errors.append(f"bad having clause {h!r}; expected {{metric, op in {list(OPS)}, value}}")
+            continue
+        try:
+            having.append({"metric": h["metric"], "op": h["op"], "value": float(h["value"])})
+        except (KeyError, TypeError, ValueError):
+            errors.append(f"having value must be numeric: {h!r}")
+
+    order_by = resolve(str(spec.get("order_by") or select[0]))
+    if order_by not in select + group_by:
+        errors.append(f"order_by must be a selected metric or group_by column, got {order_by!r}")
+
+    try:
+        ascending = _as_bool(spec.get("ascending", False))
+    except ValueError:
+        errors.append(f"ascending must be true or false, got {spec.get('ascending')!r}")
+        ascending = False
+
+    dates = {}
+    for key in ("date_from", "date_to"):
+        try:
+            dates[key] = _as_date(spec.get(key))
+        except (ValueError, OverflowError):
+            errors.append(f"{key} must be an ISO date like 2024-09-01, got {spec.get(key)!r}")
+            dates[key] = None
+    if dates["date_from"] and dates["date_to"] and dates["date_from"] > dates["date_to"]:
+        errors.append(f"date_from {dates['date_from']} is after date_to {dates['date_to']}")
+
+    try:
+        limit = max(1, min(MAX_ROWS, int(spec.get("limit") or 10)))
+    except (TypeError, ValueError):
+        errors.append("limit must be an integer")
+        limit = 10
+
+    clean = {
+        "select": select, "group_by": group_by,
+        "filters": {k: _as_list(v) for k, v in filters.items()},
+        "having": having,
+        "date_from": dates["date_from"], "date_to": dates["date_to"],
+        "order_by": order_by, "ascending": ascending,
+        "limit": limit,
+    }
+    return clean, errors
+
+def _execute(cube: Cube, q: Dict[str, Any]) -> pd.DataFrame:
+    measures = list(dict.fromkeys(q["select"] + [h["metric"] for h in q["having"]]))
+    out = query_cube(cube, q["group_by"], measures, filters=q["filters"],
+                     date_from=q["date_from"], date_to=q["date_to"])
+    for h in q["having"]:
+        out = out[OPS[h["op"]](out[h["metric"]], h["value"])]
+    out = out.sort_values(q["order_by"], ascending=q["ascending"], kind="mergesort")
+    return out[q["group_by"] + q["select"]]
+
+def query_frame(cube: Cube, spec: Dict[str, Any]) -> pd.DataFrame:
+    """Every result row of a validated spec (no limit / size cap): for streaming exports."""
+    q, errors = validate_spec(spec, cube)
+    if errors:
+        raise ValueError("; ".join(errors))
+    return _execute(cube, q)
+
+def run_query(cube: Cube, spec: Dict[str, Any], max_cells: int = MAX_CELLS) -> Dict[str, Any]:
+    """
+    Validate and run a spec. Cost is bounded up front (cube cells x matchdays, see
+    lib.cube.query_size) rather than by a timeout: a running pandas call cannot be
+    interrupted, so an oversized query is refused before it starts.
+    """
+    q, errors = validate_spec(spec, cube)
+    if errors:
+        return {"error": "; ".join(errors), "spec": spec}
+    size = query_size(cube, q["group_by"], q["filters"], q["date_from"], q["date_to"])
+    if size > max_cells:
+        return {"error": f"query too large ({size:,} cells > {max_cells:,}); add filters, "
+                         f"narrow the date range or drop Date from group_by", "spec": q}
+    out = _execute(cube, q)
+    total = int(out.shape[0])
+    rows = out.head(q["limit"])
+    rows = rows.astype(object).where(rows.notna(), None)
+    return {"spec": q, "total_rows": total, "truncated": total > q["limit"], "rows": rows.to_dict(orient="records")}
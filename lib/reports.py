@@ -0,0 +1,153 @@
+# lib/reports.py
+"""
+Headless weekly reports: one HTML page (+ PNG charts) per team and per player.
+Charts come from lib.charts, so reruns reuse the on-disk chart cache.
+
+    python -m lib.reports --out reports                 # every team and squad
+    python -m lib.reports --out reports --team Getafe --no-players
+
+Work fans out over a process pool. The dataset is loaded once in the parent; on
+platforms with fork the workers inherit it read-only, elsewhere each worker loads it
+once in its initializer.
+"""
+import argparse
+import concurrent.futures as cf
+import html
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from lib import agent_tools, charts
+from lib.metrics import derive
+from lib.data import aggregate_team, team_profile_kpis, safe_cols
+from lib.ingest import safe_name
+
+DATA_PATH = "database.csv"
+
+# ---------- shared read-only data ----------
+def _init_worker(path: str) -> None:
+    import matplotlib
+    matplotlib.use("Agg")  # headless
+    if agent_tools.DATASET.path != path:
+        agent_tools.DATASET.open(path)
+    agent_tools.DATASET.snapshot()  # no-op when inherited from the parent
+
+def _team_df(team: str) -> pd.DataFrame:
+    data = agent_tools.df()
+    return data[data["Team"] == team]
+
+# ---------- charts ----------
+def _chart(kind: str, entity: tuple, target: Path, params: Optional[dict] = None) -> str:
+    """Copy a chart from the shared chart cache next to the report (keyed on the --src snapshot)."""
+    snap = agent_tools.DATASET.snapshot()
+    target.write_bytes(charts.get_chart(kind, entity, params, snap=snap))
+    return target.name
+
+# ---------- HTML ----------
+_CSS = """
+body { background:#1a0000; color:#f5f5f5; font-family:sans-serif; margin:2rem; }
+h1, h2 { color:#ffd0d0; }
+table { border-collapse:collapse; margin:0.5rem 0 1.5rem; font-size:0.85rem; }
+th, td { border:1px solid rgba(255,255,255,0.15); padding:4px 8px; text-align:right; }
+th { background:#5c0b0b; } td:first-child, th:first-child { text-align:left; }
+.kpis td { font-size:1rem; }
+"""
+
+def _page(title: str, body: str) -> str:
+    return (f"<!doctype html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+            f"<style>{_CSS}</style></head><body><h1>{html.escape(title)}</h1>{body}"
+            f"<p><small>Generated {time.strftime('%Y-%m-%d %H:%M')}</small></p></body></html>")
+
+def _kv_table(values: dict) -> str:
+    def fmt(v):
+        if v is None or (isinstance(v, float) and pd.isna(v)) or v is pd.NA:
+            return "—"
+        return f"{v:.2f}" if isinstance(v, float) else html.escape(str(v))
+    rows = "".join(f"<tr><th>{html.escape(str(k))}</th><td>{fmt(v)}</td></tr>" for k, v in values.items())
+    return f"<table class='kpis'>{rows}</table>"
+
+def _frame_table(frame: pd.DataFrame) -> str:
+    return frame.to_html(index=False, float_format=lambda x: f"{x:.2f}", na_rep="—", border=0)
+
+def _img(name: Optional[str]) -> str:
+    return f"<img src='{html.escape(name)}' style='max-width:100%'>" if name else ""
+
+# ---------- reports ----------
+def render_team_report(team: str, out_dir: str) -> str:
+    tdf = _team_df(team)
+    target = Path(out_dir) / "teams"
+    target.mkdir(parents=True, exist_ok=True)
+    stem = safe_name(team)
+
+    prof = team_profile_kpis(tdf)
+    squad = derive(aggregate_team(tdf), ["Goals/90", "xG +/-"])
+    squad = squad[safe_cols(squad, ["Player", "Position", "Minutes", "Goals", "Assists",
+                                    "Expected Goals (xG)", "Expected Assists (xAG)", "Tackles",
+                                    "Goals/90", "xG +/-"])]
+    if "Minutes" in squad.columns:
+        squad = squad.sort_values("Minutes", ascending=False, kind="mergesort")
+    chart = _chart("team_trend", (team,), target / f"{stem}_trend.png") if len(tdf) else None
+    body = (
+        "<h2>Profile</h2>" + _kv_table({
+            "Players": tdf["Player"].nunique(), "Avg age": prof["avg_age"], "Median age": prof["median_age"],
+            "xG (total)": prof["xg_total"], "xA (total)": prof["xa_total"],
+            "GCA (total)": prof["gca_total"], "SCA (total)": prof["sca_total"],
+        })
+        + "<h2>Per game</h2>" + _img(chart)
+        + "<h2>Squad</h2>" + _frame_table(squad)
+    )
+    path = target / f"{stem}.html"
+    path.write_text(_page(f"{team} — team report", body), encoding="utf-8")
+    return str(path)
+
+def render_player_report(team: str, player: str, out_dir: str) -> str:
+    target = Path(out_dir) / "players" / safe_name(team)
+    target.mkdir(parents=True, exist_ok=True)
+    stem = safe_name(player)
+
+    summary = agent_tools.act_player_summary(team, player)
+    pdf = _team_df(team)
+    pdf = pdf[pdf["Player"] == player]
+    per_game = charts.per_game(pdf, ["Minutes", "Goals", "Assists"])
+    chart = _chart("player_trend", (team, player), target / f"{stem}_trend.png",
+                   {"metrics": ["Goals", "Assists"]}) if len(per_game) else None
+    log = per_game.reset_index()
+    body = "<h2>Summary</h2>" + _kv_table(summary) + "<h2>Per game</h2>" + _img(chart) + _frame_table(log)
+    path = target / f"{stem}.html"
+    path.write_text(_page(f"{player} ({team})", body), encoding="utf-8")
+    return str(path)
+
+def _run(job: tuple) -> str:
+    kind, args = job
+    return render_team_report(*args) if kind == "team" else render_player_report(*args)
+
+def generate_reports(out_dir: str, teams: Optional[list[str]] = None, players: bool = True,
+                     workers: Optional[int] = None, path: str = DATA_PATH) -> list[str]:
+    if agent_tools.DATASET.path != path:
+        agent_tools.DATASET.open(path)
+    agent_tools.DATASET.snapshot()  # loaded once; forked workers inherit it
+    teams = teams or agent_tools.act_list_teams()
+    jobs = [("team", (t, out_dir)) for t in teams]
+    if players:
+        jobs += [("player", (t, p, out_dir)) for t in teams for p in agent_tools.act_list_players(t)]
+
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    with cf.ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=ctx,
+                                initializer=_init_worker, initargs=(path,)) as pool:
+        return list(pool.map(_run, jobs, chunksize=8))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Render per-team and per-player HTML/PNG reports.")
+    ap.add_argument("--out", default="reports")
+    ap.add_argument("--team", action="append", help="limit to these teams (repeatable)")
+    ap.add_argument("--no-players", action="store_true")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--src", default=DATA_PATH)
+    args = ap.parse_args()
+    t0 = time.perf_counter()
+    written = generate_reports(args.out, args.team, not args.no_players, args.workers, args.src)
+    print(f"{len(written)} reports in {time.perf_counter() - t0:.1f}s -> {args.out}")
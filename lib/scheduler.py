@@ -0,0 +1,189 @@
+# lib/scheduler.py
+"""
+Small in-process scheduler for derived artifacts: a dependency graph of Tasks run on a
+worker pool, once per data version.
+
+    run = SCHEDULER.submit(version, tasks, context, on_publish=install)
+    run.progress()                  # {"done": 5, "total": 12, "running": [...], ...}
+    run.wait_published(timeout)
+
+- A task starts once all its deps are done; among ready tasks the lowest priority runs
+  first (ties: declaration order). Only `workers` tasks run at a time, so a cheap,
+  high-priority task is never stuck behind a queue of heavy ones.
+- Tasks with publish=True form the foreground tier: when the last of them finishes,
+  on_publish(context) runs once (e.g. swap in the staged snapshot). Background tasks
+  (publish=False) are only started after that.
+- A failed task marks its dependents skipped; the run still publishes (consumers build
+  what is missing on first use). A newer submit() supersedes older runs: their queued
+  tasks are dropped, running ones finish.
+"""
+import heapq
+import os
+import threading
+import time
+import concurrent.futures as cf
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+WORKERS = int(os.getenv("FOOTBALL_PRECOMPUTE_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    build: Callable[[dict], Any]   # receives the run's shared context dict
+    deps: tuple = ()
+    priority: int = 50             # lower runs first among ready tasks
+    publish: bool = True           # must finish before the run is published
+
+class Run:
+    """One pass over the task graph for one key (data version)."""
+
+    def __init__(self, key: str, tasks: List[Task], context: dict,
+                 on_publish: Optional[Callable[[dict], None]]):
+        names = [t.name for t in tasks]
+        missing = {d for t in tasks for d in t.deps if d not in names}
+        if len(set(names)) != len(names) or missing:
+            raise ValueError(f"bad task graph: duplicate names or unknown deps {sorted(missing)}")
+        self.key = key
+        self.context = context
+        self.tasks = {t.name: t for t in tasks}
+        self.order = {name: i for i, name in enumerate(names)}
+        self.waiting = {t.name: set(t.deps) for t in tasks}
+        self.dependents: Dict[str, List[str]] = {name: [] for name in names}
+        for t in tasks:
+            for d in t.deps:
+                self.dependents[d].append(t.name)
+        self.state = {name: "queued" for name in names}
+        self.seconds: Dict[str, float] = {}
+        self.started = time.monotonic()
+        self.cancelled = False
+        self.seq = 0                # submit order, breaks priority ties across runs
+        self.publish_error: Optional[str] = None
+        self._publishing = False
+        self._on_publish = on_publish
+        self._foreground = {t.name for t in tasks if t.publish}
+        self.published = threading.Event()
+        self.finished = threading.Event()
+
+    def ready(self, published: bool) -> List[Task]:
+        return [self.tasks[n] for n, deps in self.waiting.items()
+                if not deps and self.state[n] == "queued" and (published or n in self._foreground)]
+
+    def progress(self) -> dict:
+        states = dict(self.state)
+        return {
+            "key": self.key,
+            "done": sum(v == "done" for v in states.values()),
+            "total": len(states),
+            "running": [n for n, v in states.items() if v == "running"],
+            "failed": {n: v for n, v in states.items() if v.startswith(("error", "skipped"))},
+            "published": self.published.is_set(),
+            "publish_error": self.publish_error,
+            "finished": self.finished.is_set(),
+            "states": states,
+            "seconds": {k: round(v, 3) for k, v in self.seconds.items()},
+            "elapsed": round(time.monotonic() - self.started, 3),
+        }
+
+    def wait_published(self, timeout: Optional[float] = None) -> bool:
+        return self.published.wait(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.finished.wait(timeout)
+
+class Scheduler:
+    def __init__(self, workers: int = WORKERS):
+        self.workers = max(1, workers)
+        self._pool = cf.ThreadPoolExecutor(self.workers, thread_name_prefix="precompute")
+        self._lock = threading.Lock()
+        self._heap: list = []       # (priority, run seq, declaration order, run, task)
+        self._seq = 0
+        self._running = 0
+        self.runs: Dict[str, Run] = {}
+        self.current: Optional[Run] = None
+
+    def submit(self, key: str, tasks: List[Task], context: dict,
+               on_publish: Optional[Callable[[dict], None]] = None) -> Run:
+        """Schedule the graph for `key` (no-op if already submitted); supersedes older runs."""
+        with self._lock:
+            if key in self.runs:
+                return self.runs[key]
+            run = Run(key, tasks, context, on_publish)
+            for old in self.runs.values():
+                if not old.finished.is_set():
+                    old.cancelled = True
+            self.runs = {key: run}
+            self.current = run
+            self._seq += 1
+            run.seq = self._seq
+            self._enqueue(run, run.ready(published=False))
+            self._dispatch()
+        return run
+
+    # ---------- internals (call with self._lock held) ----------
+    def _enqueue(self, run: Run, tasks: List[Task]) -> None:
+        for t in tasks:
+            run.state[t.name] = "ready"
+            heapq.heappush(self._heap, (t.priority, run.seq, run.order[t.name], run, t))
+
+    def _dispatch(self) -> None:
+        while self._heap and self._running < self.workers:
+            *_, run, task = heapq.heappop(self._heap)
+            if run.cancelled:
+                run.state[task.name] = "cancelled"
+                self._maybe_finish(run)
+                continue
+            run.state[task.name] = "running"
+            self._running += 1
+            self._pool.submit(self._execute, run, task)
+
+    def _maybe_finish(self, run: Run) -> None:
+        if run.finished.is_set():
+            return
+        if all(v not in ("queued", "ready", "running") for v in run.state.values()) or (
+                run.cancelled and not any(v == "running" for v in run.state.values())):
+            run.finished.set()
+
+    def _skip(self, run: Run, name: str, cause: str) -> None:
+        for child in run.dependents[name]:
+            if run.state[child] == "queued":
+                run.state[child] = f"skipped ({cause} failed)"
+                self._skip(run, child, cause)
+
+    # ---------- worker ----------
+    def _execute(self, run: Run, task: Task) -> None:
+        t0 = time.perf_counter()
+        try:
+            task.build(run.context)
+            outcome = "done"
+        except Exception as e:  # a failed artifact is rebuilt on first use instead
+            outcome = f"error: {e}"
+        publish = False
+        with self._lock:
+            run.seconds[task.name] = time.perf_counter() - t0
+            run.state[task.name] = outcome
+            self._running -= 1
+            if outcome == "done":
+                for child in run.dependents[task.name]:
+                    run.waiting[child].discard(task.name)
+            else:
+                self._skip(run, task.name, task.name)
+            if not run.cancelled:
+                if not run._publishing and all(
+                        run.state[n] not in ("queued", "ready", "running") for n in run._foreground):
+                    publish = run._publishing = True
+                self._enqueue(run, run.ready(published=run.published.is_set()))
+        if publish:
+            try:
+                if run._on_publish is not None:
+                    run._on_publish(run.context)
+            except Exception as e:
+                run.publish_error = str(e)
+            with self._lock:
+                run.published.set()
+                self._enqueue(run, run.ready(published=True))
+        with self._lock:
+            self._maybe_finish(run)
+            self._dispatch()
+
+SCHEDULER = Scheduler()
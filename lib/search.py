@@ -0,0 +1,120 @@
+# lib/search.py
+"""
+League-wide typeahead over player and team names.
+
+Every name is normalized (lib.data.normalize_name: unaccented, lowercase) and indexed
+under each word suffix ('robert lewandowski', 'lewandowski'), so 'lewa', 'Robert L'
+and 'lewandowski' all hit. Keys live in one sorted list: a query is two bisects plus a
+scan of the matching range, ranked exact > starts the name > starts a later word, then
+by minutes played. The index is built once per data version and shared across
+sessions (st.cache_resource, no per-rerun copy).
+
+    python -m lib.search lew          # ranked matches + timing
+"""
+import bisect
+import heapq
+from dataclasses import dataclass
+
+import pandas as pd
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from lib.data import goto, load_df, normalize_name
+
+MAX_RESULTS = 8
+PAGES = {"team": "pages/01_Teams.py", "player": "pages/02_Player.py"}
+# page widgets that would otherwise keep their old value over the deep-linked one
+_WIDGET_KEYS = ["teams_team", "player_team", "player_name", "home_team", "home_player"]
+
+@dataclass(frozen=True)
+class Hit:
+    kind: str          # "player" | "team"
+    team: str
+    player: str|None
+    label: str
+    minutes: float
+
+@dataclass(frozen=True)
+class SearchIndex:
+    keys: list         # sorted normalized suffix keys
+    refs: list         # refs[i] = (hit id, word position) for keys[i]
+    names: list        # normalized full name per hit
+    hits: list         # Hit per id
+
+def build_search_index(df: pd.DataFrame) -> SearchIndex:
+    rows = df.assign(Minutes=df["Minutes"] if "Minutes" in df.columns else 0.0,
+                     Position=df["Position"] if "Position" in df.columns else pd.NA)
+    hits = [Hit("team", team, None, f"{team} (team)", float(minutes))
+            for team, minutes in rows.groupby("Team", sort=True)["Minutes"].sum().items()]
+    players = rows.groupby(["Team", "Player"], sort=True).agg(Minutes=("Minutes", "sum"), Position=("Position", "first"))
+    for (team, player), minutes, pos in zip(players.index, players["Minutes"], players["Position"]):
+        label = f"{player} — {team}" + (f" · {pos}" if pd.notna(pos) else "")
+        hits.append(Hit("player", team, player, label, float(minutes)))
+
+    names = [normalize_name(h.player or h.team) for h in hits]
+    entries = []
+    for i, name in enumerate(names):
+        words = name.split(" ")
+        for w in range(len(words)):
+            entries.append((" ".join(words[w:]), i, w))
+    entries.sort()
+    return SearchIndex([e[0] for e in entries], [(e[1], e[2]) for e in entries], names, hits)
+
+@st.cache_resource
+def load_search_index(path: str, version: str|None = None) -> SearchIndex:
+    return build_search_index(load_df(path, version))
+
+def search(index: SearchIndex, query: str, limit: int = MAX_RESULTS) -> list[Hit]:
+    """Ranked prefix matches for `query` (accents/case ignored)."""
+    q = normalize_name(query)
+    if not q:
+        return []
+    lo = bisect.bisect_left(index.keys, q)
+    hi = bisect.bisect_left(index.keys, q + "\uffff", lo)
+    best: dict[int, tuple] = {}
+    for i in range(lo, hi):
+        hit_id, word = index.refs[i]
+        tier = 0 if index.names[hit_id] == q else (1 if word == 0 else 2)
+        rank = (tier, -index.hits[hit_id].minutes, index.hits[hit_id].label)
+        if hit_id not in best or rank < best[hit_id]:
+            best[hit_id] = rank
+    return [index.hits[i] for i in heapq.nsmallest(limit, best, key=best.__getitem__)]
+
+# ---------- UI ----------
+def open_hit(hit: Hit) -> None:
+    """Deep-link to the team/player page for a search result."""
+    for key in _WIDGET_KEYS:
+        st.session_state.pop(key, None)
+    goto(hit.kind, hit.team, hit.player)
+    try:
+        st.switch_page(PAGES[hit.kind])
+    except StreamlitAPIException:  # page script run on its own (not from the app root)
+        st.rerun()
+
+def search_box(path: str, version: str|None, key: str = "global_search", container=None) -> None:
+    """Search input with result buttons (sidebar by default)."""
+    box = container or st.sidebar
+    query = box.text_input("🔎 Search players & teams", key=key, placeholder="e.g. lewa, pedri, betis")
+    if not query:
+        return
+    hits = search(load_search_index(path, version), query)
+    if not hits:
+        box.caption("No matches.")
+    for i, hit in enumerate(hits):
+        if box.button(hit.label, key=f"{key}_hit_{i}", use_container_width=True):
+            open_hit(hit)
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    from lib.data import data_version
+    index = build_search_index(load_df("database.csv", data_version("database.csv")))
+    query = " ".join(sys.argv[1:]) or "lew"
+    runs = 1000
+    t0 = time.perf_counter()
+    for _ in range(runs):
+        hits = search(index, query)
+    print(f"{len(index.keys)} keys; '{query}': {(time.perf_counter() - t0) * 1000 / runs:.4f} ms/query")
+    for hit in hits:
+        print(f"  {hit.kind:<6} {hit.label}  ({hit.minutes:.0f} min)")
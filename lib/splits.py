@@ -0,0 +1,113 @@
+# lib/splits.py
+import pandas as pd
+import streamlit as st
+
+from lib.data import CONFIDENT_PAIRINGS, load_df, load_team_games, team_pairing_coverage
+
+MIN_PAIRED_PCT = 50.0  # below this league-wide share the opponent views are flagged experimental
+
+# ---------- Precomputed (team, opponent) / (player, opponent) cubes ----------
+def build_team_opponent_cube(team_games: pd.DataFrame) -> pd.DataFrame:
+    """
+    Record vs every opponent, indexed by (Team, Opponent).
+    Only confidently paired games contribute (not Pairing "ambiguous" best guesses).
+    """
+    if team_games.empty or "Opponent" not in team_games.columns:
+        return pd.DataFrame()
+    tg = team_games.reset_index()
+    tg = tg[tg["Pairing"].isin(CONFIDENT_PAIRINGS)]
+    res = tg["Result"] if "Result" in tg.columns else pd.Series(pd.NA, index=tg.index)
+    tg = tg.assign(W=(res == "W").astype(int), D=(res == "D").astype(int), L=(res == "L").astype(int))
+    aggs = {"Games": ("Team", "size"), "W": ("W", "sum"), "D": ("D", "sum"), "L": ("L", "sum")}
+    for c in ["Goals For", "Goals Against", "xG For", "xG Against"]:
+        if c in tg.columns:
+            aggs[c] = (c, "sum")
+    return tg.groupby(["Team", "Opponent"]).agg(**aggs).sort_index()
+
+def build_player_opponent_cube(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Numeric totals per (Team, Player, Opponent) plus Appearances (Minutes > 0).
+    Games without a confident opponent are kept under Opponent = NA.
+    """
+    if "Opponent" not in df.columns:
+        return pd.DataFrame()
+    num_cols = df.select_dtypes(include="number").columns.tolist()
+    rows = df
+    if "Pairing" in df.columns:
+        sure = df["Pairing"].isin(CONFIDENT_PAIRINGS)
+        rows = df.assign(Opponent=df["Opponent"].where(sure))
+    if "Minutes" in df.columns:
+        rows = rows.assign(Appearances=(rows["Minutes"] > 0).astype(int))
+        num_cols = num_cols + ["Appearances"]
+    return (
+        rows.groupby(["Team", "Player", "Opponent"], dropna=False)[num_cols]
+        .sum(numeric_only=True)
+        .sort_index()
+    )
+
+def opponent_tiers(team_games: pd.DataFrame, top_n: int = 6) -> list[str]:
+    """
+    The strongest `top_n` teams. Points are unknown for unpaired games, so strength is
+    ranked by xG created per game (goals per game when xG is missing).
+    """
+    if team_games.empty:
+        return []
+    metric = "xG For" if "xG For" in team_games.columns else "Goals For"
+    strength = team_games[metric].groupby(level=0).mean().sort_values(ascending=False)
+    return strength.head(max(1, int(top_n))).index.tolist()
+
+@st.cache_data
+def load_team_opponent_cube(path: str, version: str|None = None) -> pd.DataFrame:
+    return build_team_opponent_cube(load_team_games(path, version))
+
+@st.cache_data
+def load_player_opponent_cube(path: str, version: str|None = None) -> pd.DataFrame:
+    return build_player_opponent_cube(load_df(path, version))
+
+def opponent_caveat(team_games: pd.DataFrame) -> str:
+    """Warning for records/splits built on too few confidently paired games ('' when enough)."""
+    cov = team_pairing_coverage(team_games)
+    paired_pct = 100.0 - cov["unpaired_pct"]
+    if not cov["games"] or paired_pct >= MIN_PAIRED_PCT:
+        return ""
+    return (f"Experimental: only {cov['paired']} of {cov['games']} team-games ({paired_pct:.0f}%) have a "
+            f"confident opponent; records and splits count those games only.")
+
+# ---------- Lookups ----------
+def team_vs_opponents(cube: pd.DataFrame, team: str) -> pd.DataFrame:
+    if cube.empty or team not in cube.index.get_level_values(0):
+        return pd.DataFrame()
+    return cube.loc[team].reset_index()
+
+def head_to_head(cube: pd.DataFrame, team_a: str, team_b: str) -> dict:
+    """Aggregate record of team_a against team_b (single index lookup)."""
+    out = {"team_a": team_a, "team_b": team_b, "games": 0}
+    if cube.empty or (team_a, team_b) not in cube.index:
+        return out
+    row = cube.loc[(team_a, team_b)]
+    out.update({k.lower().replace(" ", "_"): (int(v) if k in ("Games", "W", "D", "L") else float(v)) for k, v in row.items()})
+    return out
+
+def player_opponent_split(cube: pd.DataFrame, team: str, player: str, opponents: list[str]) -> pd.DataFrame:
+    """
+    Player totals split into: vs the given opponents / vs other known opponents / opponent unknown
+    (no confident pairing).
+    """
+    try:
+        p = cube.loc[(team, player)]
+    except KeyError:
+        return pd.DataFrame()
+    opp = p.index.to_series()
+    bucket = pd.Series("vs others", index=p.index)
+    bucket[opp.isin(opponents).values] = "vs selected"
+    bucket[opp.isna().values] = "opponent unknown"
+    return p.groupby(bucket.values).sum(numeric_only=True).rename_axis("Split").reset_index()
+
+def squad_vs_opponents(cube: pd.DataFrame, team: str, opponents: list[str]) -> pd.DataFrame:
+    """Per-player totals against the given opponents only (one row per player)."""
+    try:
+        t = cube.loc[team]
+    except KeyError:
+        return pd.DataFrame()
+    t = t[t.index.get_level_values("Opponent").isin(opponents)]
+    return t.groupby(level="Player").sum(numeric_only=True).reset_index()
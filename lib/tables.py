@@ -0,0 +1,86 @@
+# lib/tables.py
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from lib.data import safe_cols
+
+# ---------- Sort-order cache ----------
+# (cache_key, column, ascending) -> row positions in sorted order. Keys carry the data
+# version, so entries never go stale; old ones simply fall off the LRU end.
+_ORDERS: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+_ORDERS_MAX = 256
+_ORDERS_LOCK = threading.Lock()
+
+def sort_order(frame: pd.DataFrame, column: str, ascending: bool, cache_key: tuple|None = None) -> np.ndarray:
+    """Stable argsort of `column` (NaN last), memoized when a cache_key is given."""
+    key = (cache_key, column, ascending) if cache_key is not None else None
+    if key is not None:
+        with _ORDERS_LOCK:
+            hit = _ORDERS.get(key)
+            if hit is not None:
+                _ORDERS.move_to_end(key)
+                return hit
+    ordered = frame[column].reset_index(drop=True).sort_values(ascending=ascending, kind="mergesort", na_position="last")
+    order = ordered.index.to_numpy()
+    if key is not None:
+        with _ORDERS_LOCK:
+            _ORDERS[key] = order
+            while len(_ORDERS) > _ORDERS_MAX:
+                _ORDERS.popitem(last=False)
+    return order
+
+def page_window(n_rows: int, page: int, page_size: int) -> tuple[int, int]:
+    page = max(1, min(page, max(1, math.ceil(n_rows / page_size))))
+    start = (page - 1) * page_size
+    return start, min(start + page_size, n_rows)
+
+# ---------- Paged table component ----------
+PAGE_SIZES = [25, 50, 100, 250]
+
+@st.fragment
+def paged_table(
+    frame: pd.DataFrame,
+    key: str,
+    default_cols: list[str],
+    sort_options: list[str]|None = None,
+    cache_key: tuple|None = None,
+) -> None:
+    """
+    Sort / paginate / column-pick a table server-side and send only the visible page.
+
+    Runs as its own fragment, so these widgets rerun only the table. Sorting reuses a
+    cached argsort per (cache_key, column, direction); only the page window's rows and
+    chosen columns are sliced out and serialized (Arrow) to the browser.
+    """
+    right = st.columns([2,1])[1]
+    if sort_options is None:
+        sort_options = frame.select_dtypes(include="number").columns.tolist()
+    sort_by = right.selectbox("Sort by", ["None"] + sort_options, key=f"{key}_sort")
+    ascending = right.checkbox("Ascending", value=False, key=f"{key}_asc")
+
+    with st.expander("Choose columns"):
+        defaults = safe_cols(frame, default_cols)
+        cols = st.multiselect("Columns", list(frame.columns), default=defaults or list(frame.columns), key=f"{key}_cols")
+    cols = cols or list(frame.columns)
+
+    n_rows = len(frame)
+    p1, p2, p3 = st.columns([1, 1, 2])
+    page_size = p1.selectbox("Rows per page", PAGE_SIZES, index=1, key=f"{key}_page_size")
+    n_pages = max(1, math.ceil(n_rows / page_size))
+    if st.session_state.get(f"{key}_page", 1) > n_pages:
+        st.session_state[f"{key}_page"] = n_pages  # page size grew or data shrank
+    page = int(p2.number_input("Page", min_value=1, max_value=n_pages, step=1, key=f"{key}_page")) \
+        if n_pages > 1 else 1
+    start, end = page_window(n_rows, page, page_size)
+    p3.caption(f"Rows {start + 1 if n_rows else 0}–{end} of {n_rows}")
+
+    if sort_by != "None" and sort_by in frame.columns:
+        rows = sort_order(frame, sort_by, ascending, cache_key)[start:end]
+    else:
+        rows = np.arange(start, end)
+    st.dataframe(frame.iloc[rows][cols], use_container_width=True)
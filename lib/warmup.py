@@ -0,0 +1,211 @@
+# lib/warmup.py
+"""
+Background precompute: every derived artifact the pages and the agent read is built
+off the request path, once per data version, by lib.scheduler.
+
+start() is idempotent and returns immediately. It submits the task graph below for the
+current data version and starts a watcher thread that re-fingerprints the CSV every
+CHECK_SECONDS; an edited file gets a new run. Each run
+
+  1. loads the frame into a *staged* snapshot (the agent's dataset handle is not touched),
+  2. fills the same st.cache_data entries the pages read (keyed on path + version) and
+     the agent's derived tables on the staged snapshot, in dependency order:
+         dataset -> game index -> opponent splits
+                 -> player index, cube, player aggregates, lineups, SQL backend (from the file)
+                 -> (after publish) projections, percentiles -> charts
+  3. publishes atomically: the staged snapshot is install()ed on agent_tools.DATASET and
+     version(path) starts returning the new version, so pages switch cache keys only
+     when everything they read is already built. Until then they keep the previous one.
+
+User requests never load or build: the agent's handle has auto_refresh off, and on a
+cold start readers wait for the first install instead of building inline.
+
+    python -m lib.warmup            # run the graph in the foreground and time each task
+"""
+import dataclasses
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+from lib.scheduler import SCHEDULER, Run, Task
+
+DATA_PATH = "database.csv"
+
+_LOCK = threading.Lock()
+_WATCHER: Optional[threading.Thread] = None
+_PUBLISHED: Dict[str, str] = {}  # abspath -> last published data version
+_BUILT: Dict[str, Dict[str, str]] = {}  # abspath -> {task name: last data version it finished for}
+
+# ---------- task graph ----------
+def _tasks(path: str) -> List[Task]:
+    # imported here so importing lib.warmup itself stays cheap
+    from lib import agent_tools, charts
+    from lib.cube import load_cube
+    from lib.data import load_df, load_team_games, load_fixtures, team_names, team_player_names
+    from lib.dataset import Snapshot
+    from lib.identity import load_player_index
+    from lib.lineups import load_lineups
+    from lib.metrics import load_player_metrics
+    from lib.projection import load_projections
+    from lib.search import load_search_index
+    from lib.splits import load_team_opponent_cube, load_player_opponent_cube
+
+    agent = os.path.abspath(path) == os.path.abspath(agent_tools.DATASET.path)
+
+    def staged(ctx: dict, *names: str) -> None:
+        """Build the agent's derived tables on the staged snapshot."""
+        if agent:
+            for name in names:
+                ctx["snap"].derived(name, agent_tools.DERIVED[name])
+
+    def dataset(ctx: dict) -> None:
+        df = load_df(path, ctx["version"])
+        if agent:
+            ctx["snap"] = Snapshot(ctx["version"], df)
+
+    def names(ctx: dict) -> None:
+        for team in team_names(path, ctx["version"]):
+            team_player_names(path, ctx["version"], team)
+
+    def game_index(ctx: dict) -> None:
+        load_team_games(path, ctx["version"])
+        load_fixtures(path, ctx["version"])
+        staged(ctx, "team_games")
+
+    def charts_(ctx: dict) -> None:
+        future = charts.prerender_popular(ctx["snap"])
+        if future is not None:
+            future.result()  # keeps the task (and its progress) open until the charts exist
+
+    def v(load):
+        return lambda ctx: load(path, ctx["version"])
+
+    def tracked(task: Task) -> Task:
+        def build(ctx: dict) -> None:
+            task.build(ctx)
+            _BUILT.setdefault(os.path.abspath(path), {})[task.name] = ctx["version"]
+        return dataclasses.replace(task, build=build)
+
+    return [tracked(t) for t in [
+        Task("dataset", dataset, priority=0),
+        Task("name lookups", names, ("dataset",), priority=5),
+        Task("game index", game_index, ("dataset",), priority=10),
+        Task("search index", v(load_search_index), ("dataset",), priority=15),
+        Task("player index", lambda ctx: (load_player_index(path, ctx["version"]), staged(ctx, "player_index")),
+             ("dataset",), priority=20),
+        Task("cube", lambda ctx: (load_cube(path, ctx["version"]), staged(ctx, "cube")), ("dataset",), priority=20),
+        Task("player aggregates", v(load_player_metrics), ("dataset",), priority=25),
+        Task("lineups", lambda ctx: (load_lineups(path, ctx["version"]), staged(ctx, "lineups")),
+             ("dataset",), priority=30),
+        Task("opponent splits", lambda ctx: (load_team_opponent_cube(path, ctx["version"]),
+                                             load_player_opponent_cube(path, ctx["version"]),
+                                             staged(ctx, "team_opp", "player_opp")),
+             ("game index",), priority=30),
+        Task("sql backend", lambda ctx: staged(ctx, "sql_backend"), ("dataset",), priority=40),
+        # background tier: started right after the swap, ordered by priority; projections are a
+        # multi-second Monte Carlo, so the Player page shows a placeholder until ready("projections")
+        Task("projections", lambda ctx: (load_projections(path, ctx["version"]), staged(ctx, "projections")),
+             ("dataset",), priority=60, publish=False),
+    ] + ([  # charts are keyed on and drawn from the staged agent snapshot
+        Task("percentiles", lambda ctx: charts.radar_percentiles(ctx["snap"]), ("dataset",),
+             priority=70, publish=False),
+        Task("charts", charts_, ("percentiles",), priority=90, publish=False),
+    ] if agent else [])]
+
+def _publish(path: str):
+    def install(ctx: dict) -> None:
+        from lib import agent_tools
+        if "snap" in ctx:
+            agent_tools.DATASET.install(ctx["snap"])
+        elif os.path.abspath(path) == os.path.abspath(agent_tools.DATASET.path):
+            agent_tools.DATASET.abandon_install()  # dataset task failed
+            return
+        _PUBLISHED[os.path.abspath(path)] = ctx["version"]
+    return install
+
+def _submit(path: str, version: str) -> Run:
+    return SCHEDULER.submit(version, _tasks(path), {"path": path, "version": version}, _publish(path))
+
+def _watch(path: str) -> None:
+    from lib.data import data_version
+    from lib.dataset import CHECK_SECONDS
+    while True:
+        time.sleep(CHECK_SECONDS)
+        version = data_version(path)
+        if version == "missing":  # file being replaced; keep the in-flight run, look again next tick
+            continue
+        if SCHEDULER.current is None or SCHEDULER.current.key != version:
+            _submit(path, version)
+
+# ---------- public ----------
+def start(path: str = DATA_PATH) -> None:
+    """Schedule the precompute for the current data version and watch the file, once per process."""
+    global _WATCHER
+    with _LOCK:
+        if _WATCHER is not None:
+            return
+        from lib import agent_tools
+        from lib.data import data_version
+        if os.path.abspath(path) == os.path.abspath(agent_tools.DATASET.path):
+            agent_tools.DATASET.auto_refresh = False  # new versions arrive via install()
+            agent_tools.DATASET.expect_install()
+        _submit(path, data_version(path))
+        _WATCHER = threading.Thread(target=_watch, args=(path,), name="data-watcher", daemon=True)
+        _WATCHER.start()
+
+def version(path: str = DATA_PATH) -> str:
+    """Data version pages should key their caches on: the last published one (else the file's)."""
+    published = _PUBLISHED.get(os.path.abspath(path))
+    if published is not None:
+        return published
+    from lib.data import data_version
+    return data_version(path)
+
+def ready(task: str, path: str = DATA_PATH) -> bool:
+    """Whether `task` has finished for the version pages read; background artifacts (projections,
+    charts) arrive after publish, so pages check this instead of building them inline."""
+    return _BUILT.get(os.path.abspath(path), {}).get(task) == version(path)
+
+def wait(timeout: Optional[float] = None) -> bool:
+    run = SCHEDULER.current
+    return run.wait(timeout) if run is not None else False
+
+def status() -> dict:
+    run = SCHEDULER.current
+    if run is None:
+        return {"started": False, "ready": False, "published": False, "steps": {}, "seconds": {}}
+    p = run.progress()
+    return {"started": True, "ready": p["finished"], "published": p["published"], "version": p["key"],
+            "done": p["done"], "total": p["total"], "running": p["running"], "failed": p["failed"],
+            "steps": p["states"], "seconds": p["seconds"]}
+
+def sidebar_status() -> None:
+    s = status()
+    if not s["started"]:
+        return
+    if s["ready"]:
+        failed = list(s["failed"])
+        st.sidebar.caption(f"⚠️ Precompute incomplete: {', '.join(failed)}" if failed else "✅ Data ready")
+    elif s["published"]:
+        st.sidebar.caption(f"✅ Data ready — finishing {', '.join(s['running']) or 'background tasks'}")
+    else:
+        running = ", ".join(s["running"])
+        serving = " (serving previous version)" if _PUBLISHED else ""
+        st.sidebar.caption(f"⏳ Preparing data {s['done']}/{s['total']}{serving} — {running}")
+
+if __name__ == "__main__":
+    import logging
+    logging.getLogger("streamlit").setLevel(logging.ERROR)  # bare-mode noise from worker threads
+    t0 = time.perf_counter()
+    start(DATA_PATH)
+    run = SCHEDULER.current
+    run.wait_published()
+    published = time.perf_counter() - t0
+    run.wait()
+    for name, state in run.progress()["states"].items():
+        print(f"{name:<18} {run.seconds.get(name, 0):6.2f}s  {state}")
+    print(f"published after    {published:6.2f}s  ({SCHEDULER.workers} workers)")
+    print(f"total              {time.perf_counter() - t0:6.2f}s")
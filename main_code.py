@@ -1,27 +1,42 @@
-import pandas as pd
-import numpy as np
-import csv
+# main_code.py
+# Bulk export: split the dataset by team / season / position into one file per group.
+#
+#   python main_code.py                                   # one CSV per team in exports/
+#   python main_code.py --by Season --format parquet
+#   python main_code.py --by Position --columns Player,Team,Minutes,Goals --where "Minutes>=45"
+import argparse
+import time
 
-df = pd.read_csv('database.csv')
+from lib.data import data_version, load_checked
+from lib.export import export_partitions
 
-    
-df_athleticclub = df[df['Team'] == 'Athletic Club']
-df_barcelona = df[df['Team'] == 'Barcelona']
 
-print(df_barcelona.head())
-    
-    
-# filter the data by team
-# and input it into a new csv file that Ive created
- 
-clean_df = len(df['Team'].unique())
-print(clean_df)
-    
-print(df_athleticclub.head())
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Partitioned export of the per-game dataset.")
+    ap.add_argument("--src", default="database.csv")
+    ap.add_argument("--out", default="exports")
+    ap.add_argument("--by", default="Team", help="Team, Season, Position or any column")
+    ap.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    ap.add_argument("--columns", help="comma-separated column projection")
+    ap.add_argument("--where", action="append", default=[], help='filter like "Minutes>=45" (repeatable)')
+    ap.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    args = ap.parse_args()
 
-with open('athleticclub.csv', 'w', newline='') as file:
-    writer = csv.writer(file)
-    writer.writerow(filtered_data.columns)
-    for index, row in filtered_data.iterrows():
-        writer.writerow(row)
-    
\ No newline at end of file
+    t0 = time.perf_counter()
+    # same quality pass (dedup per FOOTBALL_DEDUP, numeric Minutes/Age) as the app's loader
+    df, report = load_checked(args.src, data_version(args.src))
+    t_read = time.perf_counter() - t0
+    written = export_partitions(
+        df, args.out, by=args.by, fmt=args.format,
+        columns=[c.strip() for c in args.columns.split(",")] if args.columns else None,
+        where=args.where, workers=args.workers,
+    )
+    t_total = time.perf_counter() - t0
+    for path, n in written:
+        print(f"{n:>7} rows  {path}")
+    print(f"{len(written)} files in {t_total:.2f}s (read {t_read:.2f}s, "
+          f"{report['rows_dropped']} duplicate rows dropped, policy {report['policy']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,44 +2,62 @@
 import pandas as pd
 import streamlit as st
 from lib.data import (
-    load_df, get_teams, get_players_for_team,
-    kpi_row, build_game_labels, aggregate_team, goto, init_router_state, safe_cols,
-    team_profile_kpis, inject_theme_css
+    team_names, team_rows, team_game_labels, team_profile,
+    kpi_row, goto, init_router_state, safe_cols,
+    inject_theme_css, load_team_games, team_fixtures, team_pairing_coverage, CONFIDENT_PAIRINGS
+)
+from lib.tables import paged_table
+from lib.export import download_buttons
+from lib import warmup
+from lib.search import search_box
+from lib.cube import load_cube, query_cube
+from lib.lineups import load_lineups, top_pairs, partners, rotation_table
+from lib.splits import (
+    load_team_opponent_cube, load_player_opponent_cube, opponent_tiers,
+    team_vs_opponents, head_to_head, squad_vs_opponents, opponent_caveat
 )
 
 st.set_page_config(layout="wide")
 
 # ---------- boot ----------
-DF = load_df("database.csv")
+DATA = "database.csv"
+warmup.start(DATA)
+VERSION = warmup.version(DATA)
 init_router_state()
 inject_theme_css()
+warmup.sidebar_status()
+search_box(DATA, VERSION)
 
 st.title("Teams in La Liga")
 
 # ---------- selectors ----------
-teams = get_teams(DF)
+teams = team_names(DATA, VERSION)
 team = st.selectbox(
     "Team", teams,
     index=(teams.index(st.session_state.team) if st.session_state.team in teams else 0),
     key="teams_team"
 )
 
-team_df = DF[DF["Team"] == team].copy()
+team_df = team_rows(DATA, VERSION, team)
 if team_df.empty:
     st.warning("No data for this team.")
     st.stop()
 
 scope = st.radio("Scope", ["Per game", "All games (aggregate)"], horizontal=True)
 
+# Each section below is a fragment: its widgets rerun only that section, and the
+# inputs it reads are memoized on (data version, team, ...).
+
 # ------------------ PER GAME ------------------
-if scope == "Per game":
-    t_with_keys, games = build_game_labels(team_df)
+@st.fragment
+def game_view(team: str):
+    t_with_keys, games = team_game_labels(DATA, VERSION, team)
     labels = games["_GAME_LABEL"].tolist()
     default_idx = max(len(labels) - 1, 0)  # latest by default
     chosen_label = st.selectbox("Game", labels, index=default_idx, key=f"{team}_game_pick")
     game_key = games.loc[games["_GAME_LABEL"] == chosen_label, "_GAME_KEY"].iloc[0]
 
-    game_df = t_with_keys[t_with_keys["_GAME_KEY"] == game_key].copy()
+    game_df = t_with_keys[t_with_keys["_GAME_KEY"] == game_key]
 
     st.subheader(f"{team} — {chosen_label}")
     kpi_row(game_df, aggregate=False)
@@ -48,13 +66,12 @@ if scope == "Per game":
     st.markdown("#### Team snapshot (this game)")
     c1, c2, c3, c4 = st.columns(4)
 
-    g_appear = game_df.copy()
+    g_appear = game_df
     if "Minutes" in g_appear.columns:
-        g_appear = g_appear[g_appear["Minutes"].fillna(0) > 0]
+        g_appear = g_appear[g_appear["Minutes"] > 0]
 
     if "Age" in g_appear.columns:
-        ages = g_appear.drop_duplicates("Player")["Age"]
-        ages = pd.to_numeric(ages, errors="coerce").dropna()
+        ages = g_appear.drop_duplicates("Player")["Age"].dropna()
         c1.metric("Avg Age (XI/bench used)", f"{ages.mean():.2f}" if not ages.empty else "—")
         c2.metric("Median Age", f"{ages.median():.1f}" if not ages.empty else "—")
     else:
@@ -65,32 +82,28 @@ if scope == "Per game":
     c4.metric("SCA (team)", int(game_df["SCA"].sum()) if "SCA" in game_df.columns else "—")
 
     # ---- Sorting & table ----
-    right = st.columns([2,1])[1]
-    numeric_cols = game_df.select_dtypes(include="number").columns.tolist()
-    sort_by = right.selectbox("Sort by", ["None"] + numeric_cols)
-    ascending = right.checkbox("Ascending", value=False)
-
-    view_df = game_df.copy()
-    if sort_by != "None" and sort_by in view_df.columns:
-        view_df = view_df.sort_values(sort_by, ascending=ascending, kind="mergesort")
-
-    with st.expander("Choose columns"):
-        defaults = safe_cols(view_df, ["Player","Position","Minutes","Goals","Assists","GCA","SCA"])
-        cols = st.multiselect("Columns", list(view_df.columns), default=defaults or list(view_df.columns))
-        if cols: 
-            view_df = view_df[cols]
-
-    st.dataframe(view_df, use_container_width=True)
+    paged_table(game_df, f"{team}_game", ["Player","Position","Minutes","Goals","Assists","GCA","SCA"],
+                cache_key=(VERSION, team, game_key))
 
 # ------------------ AGGREGATE ------------------
-else:
-    agg_df = aggregate_team(team_df)
+@st.fragment
+def aggregate_view(team: str):
+    cube = load_cube(DATA, VERSION)
+    team_dates = sorted(team_df["Date"].dropna().astype(str).unique()) if "Date" in team_df.columns else []
+    if len(team_dates) > 1:
+        date_from, date_to = st.select_slider("Date range", options=team_dates,
+                                              value=(team_dates[0], team_dates[-1]), key=f"{team}_agg_range")
+    else:
+        date_from, date_to = None, None
+    range_df = team_rows(DATA, VERSION, team, date_from, date_to)
+    # per-player totals from the pre-aggregated cube (prefix sums over matchdays)
+    agg_df = query_cube(cube, ["Player", "Position"], filters={"Team": team}, date_from=date_from, date_to=date_to)
 
     st.subheader(f"{team} — All games (aggregate)")
-    kpi_row(team_df, aggregate=True)
+    kpi_row(range_df, aggregate=True)
 
     # ---- Extra subheading KPIs (season/profile) ----
-    prof = team_profile_kpis(team_df)  # pass raw per-game df for correct totals
+    prof = team_profile(DATA, VERSION, team, date_from, date_to)  # raw per-game rows for correct totals
     st.markdown("#### Team snapshot (season/selected dataset)")
     a1, a2, a3, a4 = st.columns(4)
     a1.metric("Avg Age (unique players)", f"{prof['avg_age']:.2f}" if pd.notna(prof["avg_age"]) else "—")
@@ -103,19 +116,92 @@ else:
     b2.metric("xA (total)", f"{prof['xa_total']:.2f}" if pd.notna(prof["xa_total"]) else "—")
 
     # ---- Sorting & table ----
-    right = st.columns([2,1])[1]
     num_cols = [c for c in agg_df.columns if c not in ["Player","Position"]]
-    sort_by = right.selectbox("Sort by", ["None"] + num_cols)
-    ascending = right.checkbox("Ascending", value=False, key=f"{team}_agg_asc")
-
-    view_df = agg_df.copy()
-    if sort_by != "None" and sort_by in view_df.columns:
-        view_df = view_df.sort_values(sort_by, ascending=ascending, kind="mergesort")
+    paged_table(agg_df, f"{team}_agg", ["Player","Position","Minutes","Goals","Assists","GCA","SCA","xG","xA",
+                                        "Goals/90","xG/90","xG +/-"],
+                sort_options=num_cols, cache_key=(VERSION, team, date_from, date_to))
+    e1, e2 = st.columns(2)
+    e1.caption("Player totals (this range)")
+    download_buttons(lambda: agg_df, f"{team}_totals_{date_from}_{date_to}", f"{team}_agg_export", container=e1)
+    e2.caption("Per-game rows (this range)")
+    download_buttons(lambda: range_df, f"{team}_rows_{date_from}_{date_to}", f"{team}_rows_export", container=e2)
+
+# ---- Opponents & head-to-head (precomputed cubes; lookups only) ----
+@st.fragment
+def opponents_view(team: str):
+    st.markdown("#### Opponents & head-to-head")
+    games = load_team_games(DATA, VERSION)
+    coverage = team_pairing_coverage(games, team)
+    st.caption(f"Opponents are reconstructed from who played on the same day: {coverage['paired']} of "
+               f"{coverage['games']} {team} games are paired for certain, {coverage['ambiguous']} only have a best "
+               "guess. Records and splits count certain pairings only.")
+    caveat = opponent_caveat(games)
+    if caveat:
+        st.warning(caveat)
+    with (st.expander("Records, head-to-head and opponent splits (experimental)") if caveat else st.container()):
+        opp_cube = load_team_opponent_cube(DATA, VERSION)
+        record = team_vs_opponents(opp_cube, team)
+        if record.empty:
+            st.info("No reconstructed fixtures for this team yet.")
+        else:
+            st.dataframe(record, use_container_width=True)
+
+        h1, h2 = st.columns([1, 2])
+        rival = h1.selectbox("Head-to-head vs", [t for t in teams if t != team], key=f"{team}_h2h")
+        h2h = head_to_head(opp_cube, team, rival)
+        m1, m2, m3, m4 = h2.columns(4)
+        m1.metric("Games", h2h["games"])
+        m2.metric("W / D / L", f"{h2h.get('w', 0)} / {h2h.get('d', 0)} / {h2h.get('l', 0)}")
+        m3.metric("Goals", f"{h2h['goals_for']:.0f}–{h2h['goals_against']:.0f}" if h2h["games"] else "—")
+        m4.metric("xG", f"{h2h['xg_for']:.2f}–{h2h['xg_against']:.2f}" if h2h["games"] else "—")
+        history = team_fixtures(games, team)
+        if not history.empty:
+            history = history[(history["Opponent"] == rival) & history["Pairing"].isin(CONFIDENT_PAIRINGS)]
+        if not history.empty:
+            st.dataframe(history, use_container_width=True)
+
+        tier_n = st.slider("Top sides (by xG per game)", 2, 10, 6, key=f"{team}_tier_n")
+        tier = [t for t in opponent_tiers(games, tier_n) if t != team]
+        st.caption("vs " + ", ".join(tier))
+        squad = squad_vs_opponents(load_player_opponent_cube(DATA, VERSION), team, tier)
+        if squad.empty:
+            st.info("No reconstructed games against these sides.")
+        else:
+            st.dataframe(squad[safe_cols(squad, ["Player","Appearances","Minutes","Goals","Assists","Expected Goals (xG)"])],
+                         use_container_width=True)
+
+# ---- Lineups & rotation (precomputed per team; lookups only) ----
+@st.fragment
+def lineups_view(team: str):
+    st.markdown("#### Lineups & rotation")
+    all_lineups = load_lineups(DATA, VERSION)
+    lu = all_lineups.get(team)
+    if lu is None or not lu.rotation:
+        st.info("No minutes data for this team.")
+        return
+    st.caption("Shared minutes = per game, the lower of the two players' minutes (an upper bound: no substitution times).")
+    r = lu.rotation
+    c1, c2, c3, c4, c5 = st.columns(5)
+    c1.metric("Players used", r["Players Used"])
+    c2.metric("Rotation depth", r["Rotation Depth"],
+              help="Players needed to cover 80% of the team's minutes")
+    c3.metric("Top-11 minutes", f"{r['Top-11 Minutes %']:.1f}%")
+    c4.metric("Effective players", r["Effective Players"], help="1 / HHI of minutes shares")
+    c5.metric("New faces / game", r["New Faces / Game"])
+
+    p1, p2 = st.columns(2)
+    p1.markdown("**Most common pairings**")
+    p1.dataframe(top_pairs(lu, 10), use_container_width=True, hide_index=True)
+    who = p2.selectbox("Partners of", lu.players, key=f"{team}_partners")
+    p2.dataframe(partners(lu, who, 8), use_container_width=True, hide_index=True)
+
+    table = rotation_table(all_lineups)
+    rank = int(table.index[table["Team"] == team][0]) + 1
+    st.caption(f"{team} rank {rank} of {len(table)} for rotation (effective players).")
 
-    with st.expander("Choose columns"):
-        defaults = safe_cols(view_df, ["Player","Position","Minutes","Goals","Assists","GCA","SCA","xG","xA"])
-        cols = st.multiselect("Columns", list(view_df.columns), default=defaults or list(view_df.columns), key=f"{team}_agg_cols")
-        if cols: 
-            view_df = view_df[cols]
-
-    st.dataframe(view_df, use_container_width=True)
+if scope == "Per game":
+    game_view(team)
+else:
+    aggregate_view(team)
+    lineups_view(team)
+    opponents_view(team)
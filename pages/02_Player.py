@@ -2,35 +2,47 @@
 import streamlit as st
 import pandas as pd
 from lib.data import (
-    load_df, get_teams, get_players_for_team, metric_num,
-    build_game_labels, init_router_state, goto, inject_theme_css
+    load_df, team_names, team_player_names, player_rows, player_game_log, player_totals,
+    metric_num, init_router_state, goto, inject_theme_css
 )
+from lib.tables import paged_table
+from lib.export import download_buttons
+from lib import warmup
+from lib.search import search_box
+from lib.charts import get_chart
+from lib.identity import load_player_index, find_player_ids, career_totals
+from lib.metrics import player_metric_row
+from lib.projection import load_projections
 
 st.set_page_config(layout="wide")
 
 # ---------- boot ----------
-DF = load_df("database.csv")
+DATA = "database.csv"
+warmup.start(DATA)
+VERSION = warmup.version(DATA)
 init_router_state()
 inject_theme_css()
+warmup.sidebar_status()
+search_box(DATA, VERSION)
 
 st.title("Player")
 
 # ---------- selectors ----------
-teams = get_teams(DF)
+teams = team_names(DATA, VERSION)
 team = st.selectbox(
     "Team", teams,
     index=(teams.index(st.session_state.team) if st.session_state.team in teams else 0),
     key="player_team"
 )
 
-players = get_players_for_team(DF, team)
+players = team_player_names(DATA, VERSION, team)
 player = st.selectbox(
     "Player", players,
     index=(players.index(st.session_state.player) if st.session_state.player in players else 0),
     key="player_name"
 )
 
-pdf = DF[(DF["Team"] == team) & (DF["Player"] == player)].copy()
+pdf = player_rows(DATA, VERSION, team, player)
 if pdf.empty:
     st.warning("No data for this player.")
     st.stop()
@@ -52,30 +64,29 @@ def metric_if(col, label, condition: bool, value):
         col.metric(label, "—")
 
 # ---------- compute games played ----------
-p_with_keys, _ = build_game_labels(pdf)
+p_with_keys, _ = player_game_log(DATA, VERSION, team, player)
 
 # ---------- profile strip ----------
-num_sum = pdf.select_dtypes(include="number").sum(numeric_only=True)
+num_sum = player_totals(DATA, VERSION, team, player)
 
 # Compute appearances and average minutes per appearance
 apps = 0
 if "_GAME_KEY" in p_with_keys.columns:
     if "Minutes" in p_with_keys.columns:
-        per_game_played = (
-            p_with_keys.groupby("_GAME_KEY")["Minutes"]
-            .apply(lambda s: (pd.to_numeric(s, errors="coerce").fillna(0) > 0).any())
-        )
-        apps = int(per_game_played.sum())
+        apps = int((p_with_keys["Minutes"] > 0).groupby(p_with_keys["_GAME_KEY"]).any().sum())
     else:
         apps = int(p_with_keys["_GAME_KEY"].nunique())
 
 minutes_sum = float(num_sum.get("Minutes", 0.0)) if "Minutes" in num_sum.index else 0.0
 avg_minutes = round(minutes_sum / apps, 1) if apps > 0 else pd.NA
 
-# Tackles totals and per-game average
+# derived per-90 / per-appearance / efficiency metrics (lib.metrics, once per data version)
+derived = player_metric_row(DATA, VERSION, team, player)
 _tackles_present = "Tackles" in num_sum.index
 _tackles_total = num_sum.get("Tackles") if _tackles_present else pd.NA
-_tackles_avg = round((_tackles_total / apps), 2) if (_tackles_present and apps > 0) else pd.NA
+
+def derived_if(col, label, name):
+    metric_num(col, label, derived.get(name, pd.NA))  # NaN (e.g. no shots) shows "—"
 
 # ----- Profile row -----
 st.markdown("#### Profile")
@@ -104,16 +115,70 @@ g1.metric("Games Played", f"{apps}/{TOTAL_GAMES}")
 st.markdown("#### Defensive")
 d1, d2, d3, d4 = st.columns(4)
 metric_if(d1, "Tackles", _tackles_present, _tackles_total)
-metric_if(d2, "Tackles (avg)", (_tackles_present and apps > 0), _tackles_avg)
+derived_if(d2, "Tackles / app", "Tackles/app")
 metric_if(d3, "Red Cards", "Red Cards" in num_sum.index, num_sum.get("Red Cards"))
 metric_if(d4, "Yellow Cards", "Yellow Cards" in num_sum.index, num_sum.get("Yellow Cards"))
 
+# ----- Per 90 & efficiency row -----
+st.markdown("#### Per 90 & Efficiency")
+e1, e2, e3, e4, e5 = st.columns(5)
+derived_if(e1, "Goals / 90", "Goals/90")
+derived_if(e2, "xG / 90", "xG/90")
+derived_if(e3, "Conversion %", "Conversion %")
+derived_if(e4, "Pass Completion %", "Pass Completion %")
+derived_if(e5, "Goals − xG", "xG +/-")
+
+# ----- All clubs / seasons (one Player ID across transfers) -----
+_index = load_player_index(DATA, VERSION)
+_pid = next(iter(find_player_ids(_index, player, team)), None)
+if _pid is not None and (len(_index.players.at[_pid, "Teams"]) > 1 or len(_index.players.at[_pid, "Seasons"]) > 1):
+    st.markdown("#### All Clubs & Seasons")
+    st.caption("Also played for: " + ", ".join(t for t in _index.players.at[_pid, "Teams"] if t != team))
+    _split = "Team" if len(_index.players.at[_pid, "Teams"]) > 1 else "Season"
+    _career = pd.concat([career_totals(load_df(DATA, VERSION), _index, _pid, _split),
+                         career_totals(load_df(DATA, VERSION), _index, _pid)])
+    st.dataframe(_career[[c for c in ["Appearances", "Minutes", "Goals", "Assists", "Expected Goals (xG)",
+                                       "Goals/90", "xG/90", "xG +/-"] if c in _career.columns]],
+                 use_container_width=True)
+
+# ----- Season projection (simulated once per data version, in the background) -----
+def projection_view():
+    _proj = load_projections(DATA, VERSION)["players"]
+    _proj = _proj[(_proj["Team"] == team) & (_proj["Player"] == player)]
+    if not _proj.empty:
+        pr = _proj.iloc[0]
+        s1, s2, s3 = st.columns(3)
+        for col, m in [(s1, "Goals"), (s2, "Assists")]:
+            col.metric(f"{m} (projected)", f"{pr[f'{m} proj p50']:.0f}", help=f"Now {pr[m]:.0f}")
+            col.caption(f"80% band: {pr[f'{m} proj p10']:.0f}–{pr[f'{m} proj p90']:.0f}")
+        s3.metric("Minutes (projected)", f"{pr['Minutes proj mean']:.0f}", help=f"{int(pr['Games Left'])} team games left")
+
+@st.fragment(run_every=2)
+def projection_pending():
+    # never simulate inline: wait for the warm-up task, then rerun the page once
+    if warmup.ready("projections", DATA):
+        st.rerun()
+    st.info("Season projection is being simulated in the background; it will appear here shortly.")
+
+st.markdown("#### Season Projection")
+if warmup.ready("projections", DATA):
+    projection_view()
+else:
+    projection_pending()
+
+# ----- Charts (served from the chart cache after first render) -----
+st.markdown("#### Trends")
+ch1, ch2 = st.columns([3, 1])
+ch1.image(get_chart("player_trend", (team, player)), use_container_width=True)
+ch2.image(get_chart("player_radar", (team, player)), use_container_width=True)
+
 # ---------- per-game log ----------
 st.markdown("### Per-game log (all tracked columns)")
 order_cols = [c for c in ["_GAME_LABEL", "Minutes", "Goals", "Assists",
                            "Passes Completed", "Tackles", "Red Cards", "Yellow Cards"]
               if c in p_with_keys.columns]
-log_df = p_with_keys[order_cols] if order_cols else p_with_keys
-st.dataframe(log_df, use_container_width=True)
+paged_table(p_with_keys, f"{team}_{player}_log", order_cols, cache_key=(VERSION, team, player))
+download_buttons(lambda: p_with_keys.drop(columns=[c for c in p_with_keys.columns if c.startswith("_GAME_KEY")]),
+                 f"{team}_{player}_games", f"{team}_{player}_export")
 
 st.button("◀ Back to Team", on_click=lambda: goto("team", team, None))
@@ -15,42 +15,57 @@ st.set_page_config(layout="wide")
 
 # 3) App imports
 from lib.data import (
-    load_df, get_teams, get_players_for_team,
+    team_names, team_player_names, player_totals,
     inject_theme_css, metric_num
 )
-from lib.agent_tools import act_player_summary
-
-# 4) Load data
-DATA_PATH = ROOT / "database.csv"
-DF = load_df(str(DATA_PATH))
+from lib.agent_tools import DATASET, act_player_summary
+from lib.charts import get_chart
+from lib.metrics import SUMMARY_DERIVED
+from lib import warmup
+from lib.search import search_box
+
+# 4) Load data (memoized on data version; same path + cache keys as the warm-up and other pages)
+DATA = "database.csv"
+warmup.start(DATA)
+VERSION = warmup.version(DATA)
+
+@st.cache_data
+def _player_summary(snapshot_version: str, team: str, player: str) -> dict:
+    return act_player_summary(team, player)  # reads the snapshot pinned by the caller
+
+def player_summary(team: str, player: str) -> dict:
+    """Cached on the agent snapshot the summary is computed from (not the page's VERSION)."""
+    with DATASET.pin() as snap:
+        return _player_summary(snap.version, team, player)
 
 inject_theme_css()
+warmup.sidebar_status()
+search_box(DATA, VERSION)
 st.title("Compare Players")
 
 # ------------------- UI: Pick players -------------------
 # Add a spacer column to push selectors further apart
 t_left, t_gap, t_right = st.columns([1, 0.3, 1])
-team_a = t_left.selectbox("Team A", get_teams(DF), key="cmp_team_a")
-player_a = t_left.selectbox("Player A", get_players_for_team(DF, team_a), key="cmp_player_a")
+teams = team_names(DATA, VERSION)
+team_a = t_left.selectbox("Team A", teams, key="cmp_team_a")
+player_a = t_left.selectbox("Player A", team_player_names(DATA, VERSION, team_a), key="cmp_player_a")
 
-team_b = t_right.selectbox("Team B", get_teams(DF), key="cmp_team_b")
-player_b = t_right.selectbox("Player B", get_players_for_team(DF, team_b), key="cmp_player_b")
+team_b = t_right.selectbox("Team B", teams, key="cmp_team_b")
+player_b = t_right.selectbox("Player B", team_player_names(DATA, VERSION, team_b), key="cmp_player_b")
 
 # ------------------- Compute summaries -------------------
-left_summary = act_player_summary(team_a, player_a)
-right_summary = act_player_summary(team_b, player_b)
+left_summary = player_summary(team_a, player_a)
+right_summary = player_summary(team_b, player_b)
 
 # Guard for errors
 if left_summary.get("error") or right_summary.get("error"):
     st.error("Could not load one of the players. Please pick valid team/player.")
     st.stop()
 
-# Helper to sum a numeric column for a given player from raw DF
+# Helper to read a numeric total for a given player (memoized per data version)
 def sum_col(team: str, player: str, col: str):
-    if col not in DF.columns:
-        return None
-    s = pd.to_numeric(DF[(DF["Team"] == team) & (DF["Player"] == player)][col], errors="coerce")
-    return float(s.sum()) if not s.empty else None
+    totals = player_totals(DATA, VERSION, team, player)
+    return float(totals[col]) if col in totals.index else None
 
 # ------------------- Player Overviews (match Player page stats) -------------------
 st.markdown("#### Player Overviews")
@@ -66,11 +81,9 @@ with L:
 
     r2c1, r2c2, r2c3, r2c4 = st.columns(4)
     metric_num(r2c1, "Passes Completed", sum_col(team_a, player_a, "Passes Completed"))
-    tack_sum_a = sum_col(team_a, player_a, "Tackles")
     apps_a = left_summary.get("appearances")
-    tack_avg_a = round(tack_sum_a / apps_a, 2) if (tack_sum_a is not None and apps_a) else None
-    metric_num(r2c2, "Tackles", tack_sum_a)
-    metric_num(r2c3, "Tackles (avg)", tack_avg_a)
+    metric_num(r2c2, "Tackles", sum_col(team_a, player_a, "Tackles"))
+    metric_num(r2c3, "Tackles / app", left_summary.get("Tackles/app"))
     metric_num(r2c4, "Games Played", f"{apps_a}/15")
 
     # Cards
@@ -88,17 +101,21 @@ with R:
 
     r2c1, r2c2, r2c3, r2c4 = st.columns(4)
     metric_num(r2c1, "Passes Completed", sum_col(team_b, player_b, "Passes Completed"))
-    tack_sum_b = sum_col(team_b, player_b, "Tackles")
     apps_b = right_summary.get("appearances")
-    tack_avg_b = round(tack_sum_b / apps_b, 2) if (tack_sum_b is not None and apps_b) else None
-    metric_num(r2c2, "Tackles", tack_sum_b)
-    metric_num(r2c3, "Tackles (avg)", tack_avg_b)
+    metric_num(r2c2, "Tackles", sum_col(team_b, player_b, "Tackles"))
+    metric_num(r2c3, "Tackles / app", right_summary.get("Tackles/app"))
     metric_num(r2c4, "Games Played", f"{apps_b}/15")
 
     r3c1, r3c2 = st.columns(2)
     metric_num(r3c1, "Yellow Cards", sum_col(team_b, player_b, "Yellow Cards"))
     metric_num(r3c2, "Red Cards", sum_col(team_b, player_b, "Red Cards"))
 
+# ------------------- Charts (cached per data version) -------------------
+st.markdown("#### Per-90 percentiles")
+L, gap_chart, R = st.columns([1, 0.3, 1])
+L.image(get_chart("player_radar", (team_a, player_a)), use_container_width=True)
+R.image(get_chart("player_radar", (team_b, player_b)), use_container_width=True)
+
 # ------------------- Profile & Participation -------------------
 st.markdown("#### Profile & Participation")
 p1, p2, p3, p4 = st.columns(4)
@@ -114,8 +131,8 @@ p4.metric("Apps B", f"{apps_b}/{team_games_b}" if team_games_b else apps_b)
 # ------------------- Side-by-side metrics table (Player-page stats) -------------------
 metrics_for_table = [
     "Minutes", "Avg Minutes", "Goals", "Assists", "Passes Completed",
-    "Tackles", "Tackles (avg)", "Yellow Cards", "Red Cards", "Games Played"
-]
+    "Tackles", "Tackles/app", "Yellow Cards", "Red Cards", "Games Played",
+] + [m for m in SUMMARY_DERIVED if m not in ("Minutes/app", "Tackles/app")]
 
 rows = []
 for key in metrics_for_table:
@@ -126,13 +143,8 @@ for key in metrics_for_table:
         va = sum_col(team_a, player_a, "Passes Completed"); vb = sum_col(team_b, player_b, "Passes Completed")
     elif key == "Tackles":
         va = sum_col(team_a, player_a, "Tackles"); vb = sum_col(team_b, player_b, "Tackles")
-    elif key == "Tackles (avg)":
-        tsa = sum_col(team_a, player_a, "Tackles") or 0
-        tpb_a = left_summary.get("appearances") or 0
-        va = round(tsa / tpb_a, 2) if tpb_a > 0 else None
-        tsb = sum_col(team_b, player_b, "Tackles") or 0
-        tpb_b = right_summary.get("appearances") or 0
-        vb = round(tsb / tpb_b, 2) if tpb_b > 0 else None
+    elif key in SUMMARY_DERIVED:
+        va = left_summary.get(key); vb = right_summary.get(key)
     elif key == "Yellow Cards":
         va = sum_col(team_a, player_a, "Yellow Cards"); vb = sum_col(team_b, player_b, "Yellow Cards")
     elif key == "Red Cards":
@@ -2,30 +2,45 @@
 import os
 import json
 import streamlit as st
-from dotenv import load_dotenv
-from openai import OpenAI
-from openai import APIConnectionError, RateLimitError, OpenAIError
 
 from lib.agent_tools import perform_action  # single executor
+from lib.compact import compact, estimate_tokens
 from lib.data import inject_theme_css
+from lib import warmup
 
 st.set_page_config(page_title="Football Assistant — Chat", page_icon="⚽", layout="wide")
 inject_theme_css()
+warmup.start()
+warmup.sidebar_status()
 st.title("Football Assistant — Chat")
 
-load_dotenv()
+@st.cache_resource
+def api_key() -> str:
+    from dotenv import load_dotenv  # deferred: only the chat page needs it
+    load_dotenv()
+    return (os.getenv("OPENAI_API_KEY") or "").strip()
 
-OPENAI_API_KEY = (os.getenv("OPENAI_API_KEY") or "").strip()
-if not OPENAI_API_KEY or not OPENAI_API_KEY.startswith(("sk-", "sk-proj-")):
+USE_STUB = os.getenv("FOOTBALL_LLM", "openai").lower() == "stub"  # local stand-in (lib/llm_stub.py)
+OPENAI_API_KEY = api_key()
+if not USE_STUB and (not OPENAI_API_KEY or not OPENAI_API_KEY.startswith(("sk-", "sk-proj-"))):
     st.error("❌ OPENAI_API_KEY missing/invalid. Put a valid key in your .env.")
     st.stop()
 
-client = OpenAI(api_key=OPENAI_API_KEY, timeout=30.0, max_retries=3)
+@st.cache_resource
+def get_client(key: str):
+    if USE_STUB:
+        from lib.llm_stub import StubOpenAI
+        return StubOpenAI()
+    from openai import OpenAI  # deferred until the first completion; ~1s of imports
+    return OpenAI(api_key=key, timeout=30.0, max_retries=3)
 
 
 def safe_chat_completion(**kwargs):
+    if USE_STUB:
+        return get_client(OPENAI_API_KEY).chat.completions.create(**kwargs)
+    from openai import APIConnectionError, RateLimitError, OpenAIError
     try: 
-        return client.chat.completions.create(**kwargs)
+        return get_client(OPENAI_API_KEY).chat.completions.create(**kwargs)
     except (APIConnectionError, RateLimitError, OpenAIError) as e:
         st.error(f"OpenAI error: {e}")
         return None
@@ -40,14 +55,32 @@ ROUTER_SYSTEM = (
     "- list_players: {team}\n"
     "- player_summary: {team, player}\n"
     "- compare_players: {team_a, player_a, team_b, player_b, metrics?}\n"
-    "- top_players: {metric, team?, top_n?}\n"
+    "- top_players: {metric, team?, top_n?, date_from?, date_to?, min_minutes?}  # dates as YYYY-MM-DD\n"
     "- best_player_by_metric: {metric?, team?}  # default metric 'Goals'\n"
     "- best_player_by_avg_minutes: {team?, min_apps?}\n"
     "- top_players_by_avg_minutes: {team?, top_n?, min_apps?}\n"
     "- team_average_age: {team, mode?}  # mode in ['xi','squad']\n"
     "- rank_teams_by_age: {mode?}  # mode in ['xi','squad']\n"
     "- team_games: {team}\n"
-    "- team_game_summary: {team, game_key}\n\n"
+    "- team_game_summary: {team, game_key}\n"
+    "- team_fixtures: {team}  # opponent, score and xG per game; Pairing 'ambiguous' = best-guess opponent\n"
+    "- head_to_head: {team_a, team_b}  # certain pairings only; relay 'caveat' when present\n"
+    "- team_opponent_splits: {team}  # record vs each opponent; certain pairings only, relay 'caveat'\n"
+    "- player_opponent_split: {team, player, opponents?, top_n?}  # default: vs top-6 sides; relay 'caveat'\n"
+    "- player_career: {player, team?, by?}  # totals across all clubs/seasons; by Team|Season\n"
+    "- common_pairings: {team, player?, top_n?}  # team-mates who share the most minutes\n"
+    "- team_rotation: {team?}  # rotation depth, minutes concentration; no team = all teams ranked\n"
+    "- season_projection: {team?, player?, metric?, top_n?}  # metric Goals|Assists; end-of-season\n"
+    "    p10/p50/p90 by simulation; team-only also returns the team's goals/xG pace\n"
+    "- query: {select, group_by?, filters?, having?, date_from?, date_to?, order_by?, ascending?, limit?}\n"
+    "    select: list of metric columns to sum, e.g. Goals, Assists, Minutes, Appearances, Tackles,\n"
+    "      Shot-Creating Actions, Expected Goals (xG), Expected Assists (xAG), Passes Completed\n"
+    "    derived metrics work anywhere a metric does: Goals/90, Assists/90, xG/90, xAG/90, SCA/90,\n"
+    "      Tackles/90, Minutes/app, Goals/app, Conversion %, Shot Accuracy %, Pass Completion %,\n"
+    "      Dribble Success %, xG +/-, npxG +/-, xAG +/- (aliases: xG, xA, SCA, GCA, Shots)\n"
+    "    group_by: subset of [Team, Player, Position, Date]; filters: {Team|Player|Position: value or list}\n"
+    "    having: [{metric, op in [>,>=,<,<=,=,!=], value}]  # applied after summing; limit <= 50\n\n"
+    "Prefer a specific action when one fits; use query for any other stats question. "
     "Return JSON with keys: action (string), params (object). "
     "If the request is unclear, pick the closest action and leave missing params out."
 )
@@ -78,18 +111,21 @@ ANSWER_SYSTEM = (
     "You are a football assistant. Use ONLY the JSON result provided to you. "
     "Do not invent facts. If you see a 'players' array that represents ties, list them all. "
     "If there is an 'error' field, explain briefly and suggest a supported query. "
+    "Tables are pipe-separated with a header row; '+N more rows' means the list was cut "
+    "to its top rows, and 'all rows:' summarizes the full list. "
     "Be concise; include units like minutes when relevant."
 )
 
-def compose_answer(user_text: str, result: dict | list | str) -> str:
+def compose_answer(user_text: str, payload: str) -> str:
+    """`payload` is the action result encoded by compact() (token-budgeted, lib/compact.py)."""
     resp = safe_chat_completion(
         model="gpt-4o",
         temperature=0.1,
         messages=[
             {"role":"system","content":ANSWER_SYSTEM},
             {"role":"user","content":f"User question: {user_text}"},
-            {"role":"user","content":"Here is the JSON result from the dataset:"},
-            {"role":"user","content":json.dumps(result, ensure_ascii=False)}
+            {"role":"user","content":"Here is the result from the dataset:"},
+            {"role":"user","content":payload}
         ],
         max_tokens=500
     )
@@ -98,35 +134,61 @@ def compose_answer(user_text: str, result: dict | list | str) -> str:
     return resp.choices[0].message.content or "Sorry, I couldn't compose a response."
 
 # ---------------- Chat state & UI ----------------
+HISTORY_WINDOW = 20   # messages rendered per rerun; older ones behind "show earlier"
+HISTORY_KEEP = 200    # messages kept in session state
+
 if "chat_messages" not in st.session_state:
     st.session_state.chat_messages = []
+if "chat_window" not in st.session_state:
+    st.session_state.chat_window = HISTORY_WINDOW
 
 col1, col2 = st.columns([1,1])
 with col1:
     if st.button("🧹 Clear chat"):
         st.session_state["chat_messages"] = []
+        st.session_state.chat_window = HISTORY_WINDOW
         st.rerun()
 with col2:
     if st.button("🔌 Self-test"):
         ping = safe_chat_completion(model="gpt-4o-mini", messages=[{"role":"user","content":"ping"}], max_tokens=5)
         st.success("OpenAI reachable ✅" if ping else "OpenAI not reachable")
 
-# display history
-for m in st.session_state.chat_messages:
+def render_message(m: dict) -> None:
     with st.chat_message(m["role"]):
         st.markdown(m["content"])
+        if m.get("tokens"):
+            st.caption(f"result sent: ~{m['tokens'][1]} tokens (raw ~{m['tokens'][0]})")
+
+# display history: only the newest window; earlier messages on demand (fragment rerun only)
+@st.fragment
+def history():
+    msgs = st.session_state.chat_messages
+    hidden = len(msgs) - st.session_state.chat_window
+    if hidden > 0:
+        st.button("⬆ Show earlier messages", key="chat_show_earlier",
+                  on_click=lambda: st.session_state.update(chat_window=st.session_state.chat_window + HISTORY_WINDOW))
+        st.caption(f"{hidden} earlier messages hidden")
+    for m in msgs[-st.session_state.chat_window:]:
+        render_message(m)
+
+history()
 
 user_text = st.chat_input("Ask about teams, players, matches, or comparisons…")
 if user_text:
-    st.session_state.chat_messages.append({"role":"user", "content": user_text})
+    turn = [{"role":"user", "content": user_text}]
+    render_message(turn[0])  # new messages render incrementally under the history
 
     # 1) route
     intent = route_intent(user_text)
     # 2) execute
     result = perform_action(intent.get("action","unknown"), **intent.get("params",{}))
-    # 3) answer
-    reply = compose_answer(user_text, result)
-
-    st.session_state.chat_messages.append({"role":"assistant","content": reply})
-    with st.chat_message("assistant"):
-        st.markdown(reply)
\ No newline at end of file
+    # 3) answer (from the compacted result)
+    payload = compact(result)
+    reply = compose_answer(user_text, payload=payload)
+
+    raw_tokens = estimate_tokens(json.dumps(result, ensure_ascii=False, default=str))
+    turn.append({"role":"assistant", "content": reply, "tokens": (raw_tokens, estimate_tokens(payload))})
+    render_message(turn[1])
+    msgs = st.session_state.chat_messages
+    msgs.extend(turn)
+    del msgs[:-HISTORY_KEEP]
\ No newline at end of file
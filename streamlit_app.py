@@ -1,7 +1,10 @@
 import streamlit as st
 from lib.data import inject_theme_css
+from lib import warmup
 
 st.set_page_config(page_title="Football Data", layout="wide")
 inject_theme_css()
+warmup.start()  # load data / indexes / charts in the background
+warmup.sidebar_status()
 
 st.title("Welcome to Football Data App ⚽")
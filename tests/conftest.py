@@ -0,0 +1,12 @@
+# tests/conftest.py
+import logging
+import os
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)  # loaders use the relative 'database.csv', like the pages
+os.environ.setdefault("FOOTBALL_LLM", "stub")
+logging.getLogger("streamlit").setLevel(logging.ERROR)  # bare-mode cache warnings
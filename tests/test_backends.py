@@ -0,0 +1,49 @@
+# tests/test_backends.py
+"""
+Every SQL backend answers the PARITY_CASES exactly like the pandas act_* functions.
+Only SQL_ACTIONS run on SQL (every other action stays on pandas), so only those are covered.
+"""
+import importlib.util
+
+import pytest
+
+from lib import agent_tools
+from lib.backends import PARITY_CASES, BACKENDS, SQL_ACTIONS, SQLBackend, _normalize, make_backend
+from lib.ingest import ingested
+
+ENGINES = [
+    pytest.param(name, id=name, marks=pytest.mark.skipif(
+        importlib.util.find_spec(name) is None, reason=f"{name} not installed"))
+    if name == "duckdb" else pytest.param(name, id=name)
+    for name in BACKENDS
+]
+
+@pytest.fixture(scope="module")
+def source(tmp_path_factory):
+    """The ingest output the backends read, built in a temporary cache."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr("lib.ingest.INGEST_CACHE", tmp_path_factory.mktemp("ingest"))
+        yield ingested(agent_tools.DATASET.path, agent_tools.DATASET.snapshot().version)
+
+@pytest.fixture(scope="module", params=ENGINES)
+def backend(request, source) -> SQLBackend:
+    return make_backend(request.param, source)
+
+def test_cases_cover_exactly_the_sql_actions():
+    assert {action for action, _ in PARITY_CASES} == set(SQL_ACTIONS)
+
+@pytest.mark.parametrize("action,params", PARITY_CASES, ids=[f"{a}-{i}" for i, (a, _) in enumerate(PARITY_CASES)])
+def test_matches_pandas(backend, action, params):
+    expected = _normalize(agent_tools.ACTIONS[action](**params))
+    assert _normalize(backend.run(action, **params)) == expected
+
+def test_base_class_is_abstract(source):
+    with pytest.raises(TypeError):
+        SQLBackend(source)
+
+def test_sqlite_file_is_built_once_per_version(source):
+    first = make_backend("sqlite", source)
+    built = (source / "football.sqlite").stat().st_mtime_ns
+    again = make_backend("sqlite", source)
+    assert (source / "football.sqlite").stat().st_mtime_ns == built
+    assert again.list_teams() == first.list_teams() == agent_tools.act_list_teams()
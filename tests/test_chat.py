@@ -0,0 +1,53 @@
+# tests/test_chat.py
+"""Chat page end to end on the local stub client (FOOTBALL_LLM=stub, see conftest.py)."""
+import os
+from pathlib import Path
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from lib import compact as compact_mod
+from lib.agent_tools import perform_action
+from lib.compact import compact, estimate_tokens
+
+os.environ["FOOTBALL_LLM_LATENCY"] = "0"
+PAGE = str(Path(__file__).resolve().parents[1] / "pages" / "04_Chat.py")
+BUDGET = 100  # small enough that the fixtures list has to be cut
+QUESTIONS = ["Who are the top scorers?", "Show Barcelona fixtures", "How old is the Getafe squad?",
+             "Barcelona players in the squad", "Barcelona rotation"]
+
+def test_compact_stays_within_budget():
+    result = perform_action("top_players", metric="Goals", top_n=50)
+    assert estimate_tokens(compact(result, budget=120)) <= 120
+    assert compact({"x": float("inf"), "y": [{"a": float("-inf")}]}) == "x: inf\ny:\na\n-inf"
+
+@pytest.fixture(scope="module")
+def chat() -> AppTest:
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(compact_mod, "TOKEN_BUDGET", BUDGET)
+        yield _converse()
+
+def _converse() -> AppTest:
+    at = AppTest.from_file(PAGE, default_timeout=120).run()
+    assert not at.exception
+    turns = 0
+    while len(at.session_state["chat_messages"]) <= at.session_state["chat_window"]:
+        at.chat_input[0].set_value(QUESTIONS[turns % len(QUESTIONS)]).run()
+        assert not at.exception
+        turns += 1
+    return at
+
+def test_payload_within_budget(chat):
+    replies = [m for m in chat.session_state["chat_messages"] if m["role"] == "assistant"]
+    assert replies and all(m["tokens"][1] <= BUDGET for m in replies)
+    assert any(m["tokens"][0] > BUDGET for m in replies)  # at least one result was compacted
+    assert all(m["content"].startswith("(stub)") for m in replies)
+
+def test_history_window(chat):
+    window = chat.session_state["chat_window"]
+    total = len(chat.session_state["chat_messages"])
+    chat.run()  # plain rerun: only the window is rendered
+    assert len(chat.chat_message) == window < total
+    chat.button(key="chat_show_earlier").click().run()
+    assert chat.session_state["chat_window"] == 2 * window
+    assert len(chat.chat_message) == min(total, 2 * window)
@@ -0,0 +1,60 @@
+# tests/test_cube.py
+"""query_cube's prefix-sum roll-ups equal a direct pandas groupby over the rows."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.cube import build_cube, query_cube
+
+MEASURES = ["Goals", "Minutes", "Expected Goals (xG)"]
+
+@pytest.fixture(scope="module")
+def df():
+    from lib import agent_tools
+    return agent_tools.DATASET.snapshot().df
+
+@pytest.fixture(scope="module")
+def cube(df):
+    return build_cube(df)
+
+def _expected(rows: pd.DataFrame, dims: list[str]) -> pd.DataFrame:
+    return rows.groupby(dims, sort=True)[MEASURES].sum().reset_index()
+
+def _same(got: pd.DataFrame, expected: pd.DataFrame, dims: list[str]) -> None:
+    got = got.sort_values(dims, kind="mergesort").reset_index(drop=True)
+    expected = expected.sort_values(dims, kind="mergesort").reset_index(drop=True)
+    assert got[dims].astype(str).equals(expected[dims].astype(str))
+    assert (got[["Goals", "Minutes"]].to_numpy() == expected[["Goals", "Minutes"]].to_numpy()).all()
+    np.testing.assert_allclose(got["Expected Goals (xG)"], expected["Expected Goals (xG)"], atol=1e-9)
+
+@pytest.mark.parametrize("dims", [["Team"], ["Team", "Player"], ["Position"], ["Team", "Date"]])
+def test_full_season_rollups(cube, df, dims):
+    _same(query_cube(cube, dims, MEASURES), _expected(df, dims), dims)
+
+@pytest.mark.parametrize("date_from,date_to", [("2024-09-01", "2024-10-31"), (None, "2024-08-31"),
+                                               ("2024-11-09", "2024-11-09"), ("2024-12-01", None)])
+def test_date_windows_are_inclusive(cube, df, date_from, date_to):
+    rows = df[(df["Date"] >= (date_from or "")) & (df["Date"] <= (date_to or "9999"))]
+    got = query_cube(cube, ["Team"], MEASURES, date_from=date_from, date_to=date_to)
+    _same(got, _expected(rows, ["Team"]), ["Team"])
+
+def test_filters_and_grand_total(cube, df):
+    teams = ["Barcelona", "Real Madrid"]
+    rows = df[df["Team"].isin(teams) & (df["Position"] == "FW")]
+    got = query_cube(cube, ["Player"], MEASURES, filters={"Team": teams, "Position": "FW"})
+    _same(got, _expected(rows, ["Player"]), ["Player"])
+    total = query_cube(cube, [], ["Goals", "Appearances"])
+    assert total.loc[0, "Goals"] == df["Goals"].sum()
+    assert total.loc[0, "Appearances"] == (df["Minutes"] > 0).sum()
+
+def test_derived_metrics_use_rolled_up_sums(cube, df):
+    got = query_cube(cube, ["Team"], ["Goals/90"]).set_index("Team")["Goals/90"]
+    sums = df.groupby("Team")[["Goals", "Minutes"]].sum()
+    np.testing.assert_allclose(got.loc[sums.index], (sums["Goals"] / sums["Minutes"] * 90).round(3))
+
+def test_empty_window_and_unknown_names(cube):
+    assert query_cube(cube, ["Team"], ["Goals"], date_from="2030-01-01").empty
+    with pytest.raises(ValueError, match="Unknown measures"):
+        query_cube(cube, ["Team"], ["Nope"])
+    with pytest.raises(ValueError, match="Unknown dimensions"):
+        query_cube(cube, ["Nation"], ["Goals"])
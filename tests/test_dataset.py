@@ -0,0 +1,106 @@
+# tests/test_dataset.py
+"""DatasetHandle: single-flight loads, pinned snapshots, and the scheduler's install hand-off."""
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from lib import dataset
+from lib.data import data_version
+from lib.dataset import DatasetHandle, Snapshot
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "games.csv"
+    path.write_text("Player,Goals\nAna,1\n")
+    return path
+
+def _loader(calls: list, delay: float = 0.0):
+    def load(path: str, version: str) -> pd.DataFrame:
+        calls.append(version)
+        time.sleep(delay)
+        return pd.read_csv(path)
+    return load
+
+def _edit(path, text: str) -> None:
+    before = data_version(str(path))
+    path.write_text(text)
+    assert data_version(str(path)) != before  # new size -> new version
+
+def test_concurrent_first_readers_share_one_load(src):
+    calls: list = []
+    handle = DatasetHandle(str(src), _loader(calls, delay=0.2), check_seconds=0)
+    snaps = []
+    threads = [threading.Thread(target=lambda: snaps.append(handle.snapshot())) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and handle.loads == 1
+    assert len({id(s) for s in snaps}) == 1
+
+def test_pin_holds_a_version_across_an_edit(src):
+    calls: list = []
+    handle = DatasetHandle(str(src), _loader(calls), check_seconds=0)
+    with handle.pin() as pinned:
+        _edit(src, "Player,Goals\nAna,1\nBo,2\n")
+        assert handle.snapshot() is pinned and len(pinned.df) == 1
+        with handle.pin() as inner:  # nested pins reuse the outer snapshot
+            assert inner is pinned
+    fresh = handle.snapshot()
+    assert fresh is not pinned and len(fresh.df) == 2
+    assert fresh.version == data_version(str(src)) and len(calls) == 2
+
+def test_derived_tables_are_built_once_per_snapshot(src):
+    handle = DatasetHandle(str(src), _loader([]), check_seconds=0)
+    builds: list = []
+    def total(s: Snapshot) -> int:
+        builds.append(s.version)
+        return int(s.df["Goals"].sum())
+    assert handle.snapshot().derived("total", total) == handle.snapshot().derived("total", total) == 1
+    _edit(src, "Player,Goals\nAna,1\nBo,2\n")
+    assert handle.snapshot().derived("total", total) == 3
+    assert len(builds) == 2
+
+def test_readers_wait_for_the_installed_snapshot(src):
+    calls: list = []
+    handle = DatasetHandle(str(src), _loader(calls), check_seconds=0)
+    handle.auto_refresh = False
+    handle.expect_install()
+    staged = Snapshot(data_version(str(src)), pd.read_csv(src))
+    staged.derived("cube", lambda s: "built")
+    got = []
+    reader = threading.Thread(target=lambda: got.append(handle.snapshot()))
+    reader.start()
+    time.sleep(0.1)
+    assert not got  # blocked on the scheduler, not loading
+    handle.install(staged)
+    reader.join(1)
+    assert got == [staged] and calls == [] and staged.built() == ["cube"]
+    # with auto_refresh off an edited file is not picked up by readers
+    _edit(src, "Player,Goals\nAna,1\nBo,2\n")
+    assert handle.snapshot() is staged
+
+def test_abandoned_install_lets_readers_load(src, monkeypatch):
+    monkeypatch.setattr(dataset, "INSTALL_WAIT_SECONDS", 5.0)
+    calls: list = []
+    handle = DatasetHandle(str(src), _loader(calls), check_seconds=0)
+    handle.expect_install()
+    got = []
+    reader = threading.Thread(target=lambda: got.append(handle.snapshot()))
+    reader.start()
+    time.sleep(0.1)
+    handle.abandon_install()
+    reader.join(1)
+    assert len(got) == 1 and len(got[0].df) == 1 and len(calls) == 1
+
+def test_publish_stops_watching_until_open(src, tmp_path):
+    handle = DatasetHandle(str(src), _loader([]), check_seconds=0)
+    snap = handle.publish(pd.DataFrame({"Player": ["X"], "Goals": [9]}), "manual")
+    _edit(src, "Player,Goals\nAna,1\nBo,2\n")
+    assert handle.snapshot() is snap
+    other = tmp_path / "other.csv"
+    other.write_text("Player,Goals\nCy,3\n")
+    assert handle.open(str(other)).df["Player"].tolist() == ["Cy"]
+    assert handle.status()["path"] == str(other)
@@ -0,0 +1,72 @@
+# tests/test_ingest.py
+"""Chunked ingestion gives the whole-file answers and one pinned schema across every part."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.data import normalize_frame
+from lib.ingest import ingest_csv, iter_chunks, read_partitions
+from lib.quality import validate_frame
+
+SRC = "database.csv"
+
+@pytest.fixture(scope="module")
+def whole():
+    return validate_frame(normalize_frame(pd.read_csv(SRC)))[0]
+
+@pytest.fixture(scope="module")
+def out(tmp_path_factory):
+    out = tmp_path_factory.mktemp("ingest")
+    ingest_csv(SRC, str(out), chunksize=1_000)
+    return out
+
+def test_manifest_counts_and_rows_match_the_whole_file(out, whole):
+    manifest = json.loads((out / "manifest.json").read_text())
+    assert manifest["rows"] == len(whole) and manifest["chunks"] == -(-manifest["quality"]["rows_in"] // 1_000)
+    assert sorted(manifest["partitions"]) == sorted(whole["Team"].unique())
+    rows = read_partitions(str(out), columns=["Player", "Team", "Date", "Goals"])
+    key = ["Team", "Player", "Date"]
+    got = rows.sort_values(key).reset_index(drop=True)
+    expected = whole[key + ["Goals"]].sort_values(key).reset_index(drop=True)
+    assert got[key].astype(str).equals(expected[key].astype(str))
+    assert (got["Goals"].to_numpy() == expected["Goals"].to_numpy()).all()
+
+def test_player_totals_match_a_groupby(out, whole):
+    totals = pd.read_parquet(out / "player_totals.parquet").set_index(["Team", "Player"]).sort_index()
+    expected = whole.groupby(["Team", "Player"])[["Minutes", "Goals", "Expected Goals (xG)"]].sum().sort_index()
+    assert totals.index.equals(expected.index)
+    np.testing.assert_allclose(totals[expected.columns].to_numpy(), expected.to_numpy())
+    assert (totals["Appearances"] == whole.groupby(["Team", "Player"])["Minutes"].apply(lambda m: (m > 0).sum())
+            .sort_index()).all()
+    assert (totals["Age"] == whole.groupby(["Team", "Player"])["Age"].max().sort_index()).all()
+
+def test_team_games_match_a_groupby(out, whole):
+    games = pd.read_parquet(out / "team_games.parquet").set_index(["Team", "Date"]).sort_index()
+    expected = whole.groupby(["Team", "Date"])[["Goals", "Minutes"]].sum().sort_index()
+    assert games.index.equals(expected.index)
+    assert (games["Goals"] == expected["Goals"]).all() and (games["Minutes"] == expected["Minutes"]).all()
+    assert games["Opponent"].notna().all()
+
+def test_every_part_shares_the_pinned_schema(out):
+    manifest = json.loads((out / "manifest.json").read_text())
+    parts = sorted((out / "rows").rglob("part-*.parquet"))
+    assert len(parts) > len(manifest["partitions"])  # several chunks per team
+    schemas = {tuple((c, str(t)) for c, t in pd.read_parquet(p).dtypes.items()) for p in parts}
+    assert len(schemas) == 1
+    assert dict(next(iter(schemas))) == manifest["schema"]
+
+def test_undeclared_columns_are_typed_from_the_first_chunk(tmp_path):
+    src = tmp_path / "games.csv"
+    pd.DataFrame({
+        "Player": ["Ana", "Bo", "Cy", "Dee"], "Team": ["A", "A", "B", "B"],
+        "Date": ["2024-09-01"] * 4, "Minutes": [90, 80, 70, 60],
+        "Note": [None, None, "captain", None],   # empty in the first chunk: must stay text
+        "Rating": [7.5, 6.0, "tbd", 8.0],        # numeric in the first chunk: later text -> NaN
+    }).to_csv(src, index=False)
+    chunks = list(iter_chunks(str(src), chunksize=2))
+    assert [str(c["Note"].dtype) for c in chunks] == ["string", "string"]
+    assert [str(c["Rating"].dtype) for c in chunks] == ["float64", "float64"]
+    assert chunks[1]["Note"].tolist()[0] == "captain"
+    assert chunks[1]["Rating"].isna().tolist() == [True, False]
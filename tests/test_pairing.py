@@ -0,0 +1,63 @@
+# tests/test_pairing.py
+"""build_team_games pairs teams inside multi-team matchday slots from the box-score constraints."""
+import pandas as pd
+
+from lib.data import CONFIDENT_PAIRINGS, build_fixtures, build_team_games, team_pairing_coverage
+
+def _rows(date: str, games: list[tuple], against: bool) -> list[dict]:
+    """One player row per side; `games` holds (home, away, home goals, away goals, home xG, away xG)."""
+    out = []
+    for home, away, hg, ag, hx, ax in games:
+        for team, gf, ga, xf, xa in ((home, hg, ag, hx, ax), (away, ag, hg, ax, hx)):
+            row = {"Player": f"{team} 9", "Team": team, "Minutes": 90, "Goals": gf,
+                   "Expected Goals (xG)": xf, "Date": date}
+            if against:
+                row.update({"Goals Against": ga, "xG Against": xa})
+            out.append(row)
+    return out
+
+def _opponents(tg: pd.DataFrame, date: str) -> dict:
+    day = tg.xs(date, level="Date")
+    return dict(zip(day.index, day["Opponent"]))
+
+def test_against_columns_decide_a_multi_team_slot():
+    games = [("A", "B", 2, 0, 1.8, 0.4), ("C", "D", 1, 1, 0.9, 1.1), ("E", "F", 0, 3, 0.3, 2.6)]
+    tg = build_team_games(pd.DataFrame(_rows("2024-09-01", games, against=True)))
+    assert _opponents(tg, "2024-09-01") == {"A": "B", "B": "A", "C": "D", "D": "C", "E": "F", "F": "E"}
+    assert set(tg["Pairing"]) == {"unique"}
+    assert tg.loc[("A", "2024-09-01"), "Result"] == "W"
+    assert tg.loc[("C", "2024-09-01"), "Goals Against"] == 1
+    assert len(build_fixtures(tg)) == 3
+
+def test_meeting_limit_propagates_across_slots():
+    # A-B and A-C have met twice already, so on 09-01 A must play D and B must play C
+    history = [("A", "B", 1, 0, 1.0, 0.5), ("A", "C", 0, 0, 0.7, 0.7)]
+    rows = []
+    for i, day in enumerate(["2024-08-10", "2024-08-17", "2024-08-24", "2024-08-31"]):
+        rows += _rows(day, [history[i % 2]], against=False)
+    rows += _rows("2024-09-01", [("A", "D", 2, 1, 1.5, 0.8), ("B", "C", 0, 0, 0.4, 0.6)], against=False)
+    tg = build_team_games(pd.DataFrame(rows))
+    assert _opponents(tg, "2024-09-01") == {"A": "D", "D": "A", "B": "C", "C": "B"}
+    assert set(tg["Pairing"]) == {"unique"}
+
+def test_undecidable_slots_are_tagged_not_dropped():
+    games = [("A", "B", 2, 0, 1.8, 0.4), ("C", "D", 1, 1, 0.9, 1.1)]
+    tg = build_team_games(pd.DataFrame(_rows("2024-09-01", games, against=False)))
+    assert tg["Opponent"].notna().all()
+    assert set(tg["Pairing"]) == {"ambiguous"}
+    # ambiguous pairs get no shared match id and stay out of the fixture list
+    assert tg["Match ID"].nunique() == 4 and build_fixtures(tg).empty
+    cov = team_pairing_coverage(tg)
+    assert (cov["games"], cov["paired"], cov["ambiguous"], cov["unpaired"]) == (4, 0, 4, 4)
+
+def test_pairing_is_symmetric_on_the_dataset():
+    from lib import agent_tools
+    tg = agent_tools.team_games().reset_index()
+    # built from rows that already carry attach_fixtures' tags: guesses must stay guesses
+    assert set(tg["Pairing"].dropna()) == {"unique", "ambiguous"}
+    both = tg.merge(tg, left_on=["Date", "Opponent"], right_on=["Date", "Team"], suffixes=("", "_opp"))
+    assert len(both) == tg["Opponent"].notna().sum()
+    assert (both["Opponent_opp"] == both["Team"]).all()
+    assert (both["Pairing"] == both["Pairing_opp"]).all()
+    assert (both.loc[both["Pairing"].isin(CONFIDENT_PAIRINGS), "Goals Against"]
+            == both.loc[both["Pairing"].isin(CONFIDENT_PAIRINGS), "Goals For_opp"]).all()
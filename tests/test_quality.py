@@ -0,0 +1,72 @@
+# tests/test_quality.py
+"""Dedup policies: validate_frame on the whole file and iter_chunks across chunks keep the same rows."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from lib.data import normalize_frame
+from lib.ingest import iter_chunks
+from lib.quality import validate_frame
+
+def _frame() -> pd.DataFrame:
+    """Key (Player, Team, Date) repeats inside and across 3-row chunks, with minute ties."""
+    rows = [
+        ("Ana", "A", "2024-09-01", 90, 1),
+        ("Bo", "A", "2024-09-01", 45, 0),
+        ("Ana", "A", "2024-09-01", 30, 2),   # in-chunk duplicate of row 0
+        ("Cy", "B", "2024-09-01", 90, 0),
+        ("Bo", "A", "2024-09-01", 80, 3),    # cross-chunk duplicate of row 1, more minutes
+        ("Ana", "A", "2024-09-08", 70, 0),
+        ("Ana", "A", "2024-09-01", 90, 4),   # ties row 0 on minutes, later
+        ("Cy", "B", "2024-09-01", 10, 5),
+        ("Dee", "B", "2024-09-08", 60, 0),
+    ]
+    df = pd.DataFrame(rows, columns=["Player", "Team", "Date", "Minutes", "Goals"])
+    return df.assign(Position="FW", Age=25)
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "games.csv"
+    _frame().to_csv(path, index=False)
+    return str(path)
+
+def _kept(df: pd.DataFrame) -> list:
+    # ingest pins numbers to float64, so compare values rather than dtypes
+    return sorted((str(p), str(d), float(m), float(g))
+                  for p, d, m, g in df[["Player", "Date", "Minutes", "Goals"]].itertuples(index=False))
+
+@pytest.mark.parametrize("policy,goals", [
+    ("first", {"Ana 09-01": 1, "Bo": 0, "Cy": 0}),
+    ("last", {"Ana 09-01": 4, "Bo": 3, "Cy": 5}),
+    ("max_minutes", {"Ana 09-01": 4, "Bo": 3, "Cy": 0}),  # ties go to the later row
+])
+def test_policies_pick_the_expected_rows(policy, goals):
+    out, report = validate_frame(normalize_frame(_frame()), policy)
+    assert len(out) == 5 and report["rows_dropped"] == 4 and report["duplicate_keys"] == 3
+    by_key = {("Ana 09-01" if (p, d) == ("Ana", "2024-09-01") else p): g
+              for p, d, g in out[["Player", "Date", "Goals"]].itertuples(index=False)}
+    assert {k: by_key[k] for k in goals} == goals
+
+@pytest.mark.parametrize("policy", ["first", "last", "max_minutes", "none"])
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 4, 100])
+def test_chunked_dedup_matches_whole_file(src, policy, chunksize):
+    whole, report = validate_frame(normalize_frame(pd.read_csv(src)), policy)
+    quality: dict = {}
+    chunks = pd.concat(list(iter_chunks(src, chunksize, quality, policy)), ignore_index=True)
+    assert _kept(chunks) == _kept(whole)
+    assert quality["rows_dropped"] == report["rows_dropped"]
+
+def test_error_policy_raises_within_and_across_chunks(src):
+    with pytest.raises(ValueError, match="duplicate"):
+        validate_frame(normalize_frame(_frame()), "error")
+    with pytest.raises(ValueError, match="across chunks"):
+        list(iter_chunks(src, 1, policy="error"))  # one row per chunk: only the cross-chunk check can fire
+
+def test_minutes_are_numeric_and_unknown_policy_is_refused():
+    df = _frame().astype({"Minutes": object})
+    df.loc[3, "Minutes"] = None
+    out, report = validate_frame(df, "none")
+    assert report["minutes_missing"] == 1 and out["Minutes"].dtype.kind in "if"
+    assert not np.isnan(out["Minutes"]).any()
+    with pytest.raises(ValueError, match="unknown dedup policy"):
+        validate_frame(df, "newest")
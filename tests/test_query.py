@@ -0,0 +1,66 @@
+# tests/test_query.py
+"""run_query validates specs, refuses oversized queries up front and answers like pandas."""
+import pandas as pd
+import pytest
+
+from lib import agent_tools
+from lib.query import MAX_CELLS, run_query, validate_spec
+
+@pytest.fixture(scope="module")
+def cube():
+    return agent_tools.cube()
+
+@pytest.fixture(scope="module")
+def df():
+    return agent_tools.DATASET.snapshot().df
+
+def test_team_goals_match_pandas(cube, df):
+    out = run_query(cube, {"select": ["Goals", "xG"], "group_by": ["Team"],
+                           "date_from": "2024-09-01", "date_to": "2024-10-31", "limit": 50})
+    window = df[(df["Date"] >= "2024-09-01") & (df["Date"] <= "2024-10-31")]
+    expected = window.groupby("Team")[["Goals", "Expected Goals (xG)"]].sum()
+    got = pd.DataFrame(out["rows"]).set_index("Team")
+    assert out["total_rows"] == len(expected)
+    assert (got["Goals"] == expected.loc[got.index, "Goals"]).all()
+    assert got["Expected Goals (xG)"].to_numpy() == pytest.approx(
+        expected.loc[got.index, "Expected Goals (xG)"].to_numpy())
+    assert got["Goals"].is_monotonic_decreasing
+
+def test_having_filters_after_aggregation(cube, df):
+    out = run_query(cube, {"select": ["Goals/90"], "group_by": ["Player"],
+                           "filters": {"Team": "Barcelona"},
+                           "having": [{"metric": "Minutes", "op": ">=", "value": 900}], "limit": 50})
+    totals = df[df["Team"] == "Barcelona"].groupby("Player")[["Goals", "Minutes"]].sum()
+    totals = totals[totals["Minutes"] >= 900]
+    assert {r["Player"] for r in out["rows"]} == set(totals.index)
+    for r in out["rows"]:
+        per90 = totals.loc[r["Player"], "Goals"] / totals.loc[r["Player"], "Minutes"] * 90
+        assert r["Goals/90"] == round(per90, 3)  # derived metrics are reported to 3 decimals
+
+@pytest.mark.parametrize("raw,expected", [("2024-9-1", "2024-09-01"), ("20240901", "2024-09-01"),
+                                          ("2024-09-01T18:30", "2024-09-01"), ("", None), (None, None)])
+def test_iso_dates_are_normalized(cube, raw, expected):
+    clean, errors = validate_spec({"date_from": raw}, cube)
+    assert errors == [] and clean["date_from"] == expected
+
+@pytest.mark.parametrize("raw", ["01/09/2024", "next week", "2024-13-01", 20240901])
+def test_bad_dates_are_reported(cube, raw):
+    out = run_query(cube, {"date_to": raw})
+    assert out["error"] == f"date_to must be an ISO date like 2024-09-01, got {raw!r}"
+
+def test_reversed_range_and_other_errors_are_collected(cube):
+    _, errors = validate_spec({"select": ["Nope"], "group_by": ["Nation"], "ascending": "maybe",
+                               "date_from": "2024-10-01", "date_to": "2024-09-01", "limit": "ten"}, cube)
+    assert len(errors) == 5
+    assert "date_from 2024-10-01 is after date_to 2024-09-01" in errors
+
+def test_oversized_query_is_refused_before_it_runs(cube, monkeypatch):
+    monkeypatch.setattr("lib.query._execute", lambda *a: pytest.fail("oversized query ran"))
+    spec = {"group_by": ["Player", "Date"]}
+    size = len(cube.groups) * len(cube.dates)
+    assert size <= MAX_CELLS
+    out = run_query(cube, spec, max_cells=size - 1)
+    assert out["error"].startswith(f"query too large ({size:,} cells > {size - 1:,})")
+    # a filter shrinks the footprint below the cap
+    monkeypatch.undo()
+    assert "error" not in run_query(cube, {**spec, "filters": {"Team": "Barcelona"}}, max_cells=size - 1)
@@ -0,0 +1,80 @@
+# tests/test_scheduler.py
+"""Scheduler: priority among ready tasks, publish tier, skip-on-failure and supersede."""
+import threading
+
+import pytest
+
+from lib.scheduler import Scheduler, Task
+
+def _task(name: str, log: list, deps: tuple = (), priority: int = 50, publish: bool = True, fail: bool = False,
+          gate: threading.Event = None) -> Task:
+    def build(ctx: dict) -> None:
+        if gate is not None:
+            assert gate.wait(5)
+        log.append(name)
+        if fail:
+            raise RuntimeError(f"{name} broke")
+    return Task(name, build, deps, priority, publish)
+
+def test_lowest_priority_first_then_declaration_order():
+    log: list = []
+    tasks = [_task("slow", log, priority=90), _task("a", log, priority=10), _task("b", log, priority=10),
+             _task("after_a", log, deps=("a",), priority=5), _task("mid", log, priority=50)]
+    run = Scheduler(workers=1).submit("v1", tasks, {})
+    assert run.wait(5)
+    # after_a becomes ready once a is done and then outranks b
+    assert log == ["a", "after_a", "b", "mid", "slow"]
+    assert run.progress()["done"] == 5
+
+def test_background_tier_starts_after_publish():
+    log: list = []
+    published = []
+    tasks = [_task("fg", log, priority=50), _task("bg", log, priority=1, publish=False)]
+    run = Scheduler(workers=1).submit("v1", tasks, {"x": 1},
+                                      on_publish=lambda ctx: published.append((list(log), ctx["x"])))
+    assert run.wait(5) and run.published.is_set()
+    assert published == [(["fg"], 1)]
+    assert log == ["fg", "bg"]
+
+def test_failure_skips_dependents_and_still_publishes():
+    log: list = []
+    tasks = [_task("load", log), _task("cube", log, deps=("load",), fail=True),
+             _task("query", log, deps=("cube",)), _task("charts", log, deps=("query",), publish=False),
+             _task("teams", log, deps=("load",))]
+    published = []
+    run = Scheduler(workers=2).submit("v1", tasks, {}, on_publish=lambda ctx: published.append(True))
+    assert run.wait(5) and published == [True]
+    progress = run.progress()
+    assert progress["failed"] == {"cube": "error: cube broke", "query": "skipped (cube failed)",
+                                  "charts": "skipped (cube failed)"}
+    assert sorted(log) == ["cube", "load", "teams"]
+
+def test_failed_publish_hook_is_reported():
+    def hook(ctx):
+        raise OSError("disk full")
+    run = Scheduler(workers=1).submit("v1", [_task("a", [])], {}, on_publish=hook)
+    assert run.wait(5) and run.published.is_set()
+    assert run.progress()["publish_error"] == "disk full"
+
+def test_newer_submit_supersedes_queued_tasks():
+    scheduler = Scheduler(workers=1)
+    gate = threading.Event()
+    old_log: list = []
+    old = scheduler.submit("v1", [_task("load", old_log, gate=gate), _task("cube", old_log, deps=("load",)),
+                                  _task("teams", old_log)], {})
+    assert scheduler.submit("v1", [], {}) is old  # same key: no new run
+    new_log: list = []
+    new = scheduler.submit("v2", [_task("load", new_log), _task("cube", new_log, deps=("load",))], {})
+    gate.set()
+    assert old.wait(5) and new.wait(5)
+    assert old_log == ["load"]  # the running task finished, nothing else of v1 started
+    assert old.state["teams"] == "cancelled" and old.state["cube"] == "queued"
+    assert not old.published.is_set()
+    assert new_log == ["load", "cube"] and new.published.is_set()
+    assert scheduler.current is new and list(scheduler.runs) == ["v2"]
+
+def test_bad_graph_is_refused():
+    with pytest.raises(ValueError, match="bad task graph"):
+        Scheduler(workers=1).submit("v1", [_task("a", [], deps=("missing",))], {})
+    with pytest.raises(ValueError, match="bad task graph"):
+        Scheduler(workers=1).submit("v1", [_task("a", []), _task("a", [])], {})